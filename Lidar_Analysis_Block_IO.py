@@ -0,0 +1,238 @@
+'''
+Block I/O - Prefetching and Write-Behind Raster Block Processing
+----------------------------------------------------------------
+Script created by Robert Grow 10/2026
+
+Processes rasters block by block with a bounded thread pool that prefetches the next input
+windows while the current block computes and flushes finished output blocks in the background.
+Back-pressure keeps the number of blocks in flight bounded, and the time spent waiting on I/O
+is reported so slow network workspaces are visible.
+'''
+
+import os
+import time
+import shutil
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+DEFAULT_BLOCK_SIZE = 1024
+
+# ArcPy is not thread-safe: every arcpy call made from the I/O threads holds this lock, so block
+# reads are serialized; block writes go to a memory-mapped file without ArcPy and run alongside them
+ARCPY_LOCK = threading.RLock()
+
+# NoData value of the float32 block files (NaN is not a valid BIL NoData value)
+BLOCK_NODATA = np.float32(-3.4028235e38)
+
+def log_message(message):
+    # Log a message to ArcGIS
+    import arcpy
+    arcpy.AddMessage(message)
+
+def raster_grid(raster_path):
+    # Extent, cell size, shape, and coordinate system of a raster
+    import arcpy
+    desc = arcpy.Describe(raster_path)
+    cell = desc.meanCellWidth
+    return {
+        "xmin": desc.extent.XMin,
+        "ymax": desc.extent.YMax,
+        "cell_size": cell,
+        "nrows": int(round(desc.extent.height / cell)),
+        "ncols": int(round(desc.extent.width / cell)),
+        "spatial_reference": desc.spatialReference,
+    }
+
+def block_windows(nrows, ncols, block_size=DEFAULT_BLOCK_SIZE, halo=0):
+    # Row-major block windows as (row, col, rows, cols, halo)
+    for row in range(0, nrows, block_size):
+        for col in range(0, ncols, block_size):
+            yield (row, col, min(block_size, nrows - row), min(block_size, ncols - col), halo)
+
+def read_window(raster_path, grid, window):
+    # Read a block plus its halo as float32, with NoData and cells outside the raster set to NaN
+    import arcpy
+    row, col, rows, cols, halo = window
+    top, left = row - halo, col - halo
+    bottom, right = row + rows + halo, col + cols + halo
+    read_top, read_left = max(top, 0), max(left, 0)
+    read_bottom, read_right = min(bottom, grid["nrows"]), min(right, grid["ncols"])
+
+    cell = grid["cell_size"]
+    with ARCPY_LOCK:
+        lower_left = arcpy.Point(grid["xmin"] + read_left * cell, grid["ymax"] - read_bottom * cell)
+        raster = arcpy.Raster(raster_path)
+        nodata = raster.noDataValue
+        # Float rasters read NoData straight to NaN; integer rasters through their NoData value
+        fill = nodata if raster.isInteger and nodata is not None else (0 if raster.isInteger else np.nan)
+        values = arcpy.RasterToNumPyArray(
+            raster, lower_left, read_right - read_left, read_bottom - read_top, nodata_to_value=fill
+        )
+    values = values.astype(np.float32)
+    if nodata is not None:
+        values[values == np.float32(nodata)] = np.nan
+
+    # Multiband rasters are read as (bands, rows, cols)
+    pad = ((read_top - top, bottom - read_bottom), (read_left - left, right - read_right))
+    if any(any(side) for side in pad):
+        values = np.pad(values, ((0, 0),) * (values.ndim - 2) + pad, constant_values=np.nan)
+    return values
+
+def rasterize_zones(polygons, zone_field, template, scratch):
+    # Rasterize polygons by object ID on the template grid and map the ids to the zone field values
+    import arcpy
+    zone_raster = os.path.join(scratch, "Block_Zones")
+    oid_field = arcpy.Describe(polygons).OIDFieldName
+    with arcpy.EnvManager(snapRaster=template, cellSize=template, extent=template):
+        arcpy.conversion.PolygonToRaster(polygons, oid_field, zone_raster, "CELL_CENTER")
+    with arcpy.da.SearchCursor(polygons, [oid_field, zone_field]) as cursor:
+        zone_names = {oid: str(value) for oid, value in cursor}
+    return zone_raster, zone_names
+
+def accumulate_zones(zones, stack, sums, counts=None):
+    # Add the per-zone sums and counts of a (layer, y, x) block to (zone, layer) accumulators
+    layers = stack.shape[0]
+    zone_ids = np.broadcast_to(zones, stack.shape)
+    layer_ids = np.broadcast_to(np.arange(layers).reshape(-1, 1, 1), stack.shape)
+    keep = (zone_ids > 0) & ~np.isnan(stack)
+    bins = zone_ids[keep].astype(np.int64) * layers + layer_ids[keep]
+    size = sums.size
+    sums += np.bincount(bins, weights=stack[keep], minlength=size)[:size].reshape(sums.shape)
+    if counts is not None:
+        counts += np.bincount(bins, minlength=size)[:size].reshape(counts.shape)
+
+class BlockOutput:
+    # Output raster preallocated as a memory-mapped ESRI BIL file in the scratch folder; blocks are
+    # written straight into it and it is copied to the output once at the end. That final copy is
+    # the only extra pass: one sequential read and write of the output size.
+
+    def __init__(self, out_path, grid, scratch_folder):
+        self.out_path = out_path
+        self.grid = grid
+        self.block_folder = os.path.join(scratch_folder, f"{os.path.basename(out_path)}_{id(self)}_blocks")
+        os.makedirs(self.block_folder, exist_ok=True)
+        self.bil_path = os.path.join(self.block_folder, "blocks.bil")
+        self.values = np.memmap(self.bil_path, dtype="<f4", mode="w+", shape=(grid["nrows"], grid["ncols"]))
+        self.write_header()
+
+    def write_header(self):
+        # ESRI BIL header describing the block file on the output grid
+        grid = self.grid
+        cell = grid["cell_size"]
+        lines = [
+            "BYTEORDER I", "LAYOUT BIL", f"NROWS {grid['nrows']}", f"NCOLS {grid['ncols']}", "NBANDS 1",
+            "NBITS 32", "PIXELTYPE FLOAT", f"ULXMAP {grid['xmin'] + cell / 2!r}",
+            f"ULYMAP {grid['ymax'] - cell / 2!r}", f"XDIM {cell!r}", f"YDIM {cell!r}", f"NODATA {float(BLOCK_NODATA)!r}",
+        ]
+        with open(os.path.splitext(self.bil_path)[0] + ".hdr", "w") as header_file:
+            header_file.write("\n".join(lines) + "\n")
+
+    def write(self, window, values):
+        # Copy the core of a computed block into its window of the block file; blocks never overlap,
+        # so writes need no lock
+        row, col, rows, cols, _ = window
+        values = np.asarray(values, dtype=np.float32)
+        self.values[row:row + rows, col:col + cols] = np.where(np.isnan(values), BLOCK_NODATA, values)
+
+    def save(self):
+        # Copy the block file into the output raster with the template's coordinate system
+        import arcpy
+        self.values.flush()
+        del self.values
+        with ARCPY_LOCK:
+            if arcpy.Exists(self.out_path):
+                arcpy.management.Delete(self.out_path)
+            arcpy.management.CopyRaster(
+                self.bil_path, self.out_path, "", "", float(BLOCK_NODATA), "NONE", "NONE", "32_BIT_FLOAT"
+            )
+            arcpy.management.DefineProjection(self.out_path, self.grid["spatial_reference"])
+        shutil.rmtree(self.block_folder, ignore_errors=True)
+        log_message(f"Block output saved to {self.out_path}")
+
+class BlockScheduler:
+    # Prefetches input windows and writes output blocks behind the compute loop
+
+    def __init__(self, read_block, windows, prefetch=2, io_threads=4, max_pending_writes=8):
+        self.read_block = read_block
+        self.windows = iter(windows)
+        self.prefetch = prefetch
+        self.max_pending_writes = max_pending_writes
+        self.pool = ThreadPoolExecutor(max_workers=io_threads)
+        self.reads = deque()
+        self.writes = deque()
+        self.read_wait = 0.0
+        self.write_wait = 0.0
+        self.started = time.perf_counter()
+        self.blocks = 0
+
+    def _queue_reads(self):
+        # Keep up to `prefetch` windows reading ahead of the compute loop
+        while len(self.reads) < self.prefetch:
+            window = next(self.windows, None)
+            if window is None:
+                return
+            self.reads.append((window, self.pool.submit(self.read_block, window)))
+
+    def __iter__(self):
+        # Yield (window, inputs) as soon as each prefetched read completes
+        self._queue_reads()
+        while self.reads:
+            window, future = self.reads.popleft()
+            waited = time.perf_counter()
+            inputs = future.result()
+            self.read_wait += time.perf_counter() - waited
+            self._queue_reads()
+            yield window, inputs
+            self.blocks += 1
+
+    def write(self, outputs, window, blocks):
+        # Queue the output blocks for writing, waiting on the oldest write when too many are pending
+        for name, values in blocks.items():
+            self.writes.append(self.pool.submit(outputs[name].write, window, values))
+        while len(self.writes) > self.max_pending_writes:
+            waited = time.perf_counter()
+            self.writes.popleft().result()
+            self.write_wait += time.perf_counter() - waited
+
+    def close(self):
+        # Wait for outstanding writes and report where the time went
+        waited = time.perf_counter()
+        while self.writes:
+            self.writes.popleft().result()
+        self.write_wait += time.perf_counter() - waited
+        self.pool.shutdown()
+        compute_time = time.perf_counter() - self.started - self.read_wait - self.write_wait
+        log_message(
+            f"{self.blocks} blocks: compute {compute_time:.1f} s, "
+            f"waiting on reads {self.read_wait:.1f} s, waiting on writes {self.write_wait:.1f} s"
+        )
+
+def process_blocks(input_rasters, output_paths, compute, template=None, block_size=DEFAULT_BLOCK_SIZE,
+                   halo=0, prefetch=2, io_threads=4, scratch_folder=None):
+    # Run compute(inputs) -> {name: array} block by block over rasters sharing the template grid.
+    # Inputs are read with `halo` extra cells on each side; outputs are the block core only.
+    import arcpy
+    grid = raster_grid(template or next(iter(input_rasters.values())))
+    scratch_folder = scratch_folder or arcpy.env.scratchFolder
+    outputs = {name: BlockOutput(path, grid, scratch_folder) for name, path in output_paths.items()}
+
+    def read_block(window):
+        return {name: read_window(path, grid, window) for name, path in input_rasters.items()}
+
+    scheduler = BlockScheduler(
+        read_block, block_windows(grid["nrows"], grid["ncols"], block_size, halo), prefetch, io_threads
+    )
+    try:
+        for window, inputs in scheduler:
+            blocks = compute(inputs)
+            if halo:
+                blocks = {name: values[halo:-halo, halo:-halo] for name, values in blocks.items()}
+            scheduler.write(outputs, window, blocks)
+    finally:
+        scheduler.close()
+
+    for output in outputs.values():
+        output.save()
+    return output_paths
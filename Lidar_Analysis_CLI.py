@@ -0,0 +1,318 @@
+'''
+Command-Line Entry Point - Run Any Step Outside ArcGIS Pro
+----------------------------------------------------------
+Script created by Robert Grow 10/2026
+
+Parses named arguments for each step, validates inputs cheaply (existence, LAS extents and
+coordinate systems) and only then imports ArcPy and the step script, so --help, validation,
+and dry runs start in well under a second. For example:
+
+    python Lidar_Analysis_CLI.py step3 --dem DEM.tif --dsm DSM.tif --workspace C:/Output.gdb
+'''
+
+import os
+import sys
+import argparse
+
+# Script tool parameters of each step, in GetParameterAsText order:
+# (option, kind, required, help). Kinds drive the cheap validation below.
+STEP_PARAMETERS = {
+    "step1": [
+        ("--input-las", "las", True, "Input LAS files or folder"),
+        ("--target-folder", "folder", True, "Folder for the converted LAS files"),
+        ("--output-las", "output", True, "Output LAS dataset"),
+        ("--projection", "text", True, "Output coordinate system"),
+        ("--stats-text", "output", True, "Output statistics text file"),
+        ("--workspace", "folder", True, "Output workspace"),
+        ("--extent", "extent", False, "Processing extent (xmin ymin xmax ymax) or polygon"),
+        ("--class-store", "output", False, "Folder for the class-sorted point store"),
+        ("--catalog", "output", False, "SQLite statistics catalog to build and aggregate the statistics from"),
+        ("--streaming-reprojection", "text", False, "true to reproject point chunks in parallel instead of ConvertLas"),
+    ],
+    "step2": [
+        ("--input-las", "las", True, "Input LAS dataset, file, or class store folder"),
+        ("--ground-layer", "text", True, "Output ground LAS dataset layer"),
+        ("--vegetation-layer", "text", True, "Output vegetation LAS dataset layer"),
+        ("--dem", "output", True, "Output DEM raster"),
+        ("--dsm", "output", True, "Output DSM raster"),
+        ("--extent", "extent", False, "Processing extent (xmin ymin xmax ymax) or polygon"),
+        ("--thinning-method", "text", False, "Ground point thinning: LOWEST, CLOSEST_TO_MEAN, or Z_TOLERANCE"),
+        ("--thinning-cell-size", "number", False, "Thinning cell size (default 0.5)"),
+        ("--z-tolerance", "number", False, "Z_TOLERANCE departure that keeps extra points (default 0.15)"),
+        ("--report-dem-error", "text", False, "true to compare the thinned DEM with an unthinned DEM"),
+    ],
+    "step2_1": [
+        ("--input-las", "las", True, "Input LAS dataset, file, or class store folder"),
+        ("--vegetation-layer", "text", True, "Output vegetation LAS dataset layer"),
+        ("--dsm", "output", True, "Output DSM raster"),
+        ("--extent", "extent", False, "Processing extent (xmin ymin xmax ymax) or polygon"),
+    ],
+    "step3": [
+        ("--dem", "dataset", True, "Input DEM raster"),
+        ("--dsm", "dataset", True, "Input DSM raster"),
+        ("--workspace", "folder", True, "Output workspace"),
+        ("--azimuths", "text", False, "Hillshade azimuths, e.g. 0;45;90;135;180;225;270;315"),
+        ("--altitudes", "text", False, "Hillshade altitudes (default 45)"),
+        ("--cast-shadows", "text", False, "true to add cast shadows to the azimuth hillshades"),
+    ],
+    "step4": [
+        ("--image", "dataset", True, "Multiband raster input"),
+        ("--band-1", "text", True, "Output band 1 layer"),
+        ("--band-2", "text", True, "Output band 2 layer"),
+        ("--band-3", "text", True, "Output band 3 layer"),
+        ("--band-4", "text", True, "Output band 4 layer"),
+        ("--workspace", "folder", True, "Output workspace"),
+        ("--crop-boundary", "dataset", True, "Crop boundary feature class"),
+        ("--crop-field", "text", True, "Crop boundary zone field"),
+    ],
+    "step5": [
+        ("--red", "dataset", True, "Red band raster"),
+        ("--green", "dataset", True, "Green band raster"),
+        ("--blue", "dataset", True, "Blue band raster"),
+        ("--nir", "dataset", True, "Near-infrared band raster"),
+        ("--ndvi", "dataset", True, "NDVI raster"),
+        ("--workspace", "folder", True, "Output workspace"),
+        ("--block-size", "integer", False, "Process indices in blocks of this many cells"),
+        ("--align-cell-size", "text", False, "Align inputs on one grid: a cell size, MINOF, MAXOF, or a raster"),
+    ],
+    "time_series": [
+        ("--images", "text", True, "Multiband images, separated by semicolons"),
+        ("--dates", "text", True, "Image dates (YYYY-MM-DD), separated by semicolons"),
+        ("--workspace", "folder", True, "Output workspace"),
+        ("--cube-folder", "output", True, "Folder for the index cubes"),
+        ("--indices", "text", False, "Indices to calculate, e.g. NDVI;EVI"),
+        ("--crop-boundary", "dataset", False, "Crop boundary feature class"),
+        ("--crop-field", "text", False, "Crop boundary zone field"),
+        ("--block-size", "integer", False, "Block size in cells"),
+    ],
+    "step6": [
+        ("--dsm", "dataset", True, "Input DSM raster"),
+        ("--dem", "dataset", True, "Input DEM raster"),
+        ("--slope", "dataset", True, "Input slope raster"),
+        ("--workspace", "folder", True, "Output workspace"),
+        ("--ndvi", "dataset", True, "NDVI raster"),
+        ("--ndvi-field-boundary", "dataset", True, "NDVI field boundary raster"),
+        ("--align-cell-size", "text", False, "Align inputs on one grid: a cell size, MINOF, MAXOF, or a raster"),
+    ],
+    "step7": [
+        ("--dem", "dataset", True, "Input DEM raster"),
+        ("--fill-output", "output", True, "Output filled DEM"),
+        ("--workspace", "folder", True, "Output workspace"),
+    ],
+    "las_reproject": [
+        ("--input-las", "las", True, "Input LAS file, folder, or LAS dataset"),
+        ("--output-folder", "output", True, "Output folder for the reprojected LAS files"),
+        ("--projection", "text", True, "Output coordinate system (EPSG code, WKT, or ArcGIS coordinate system)"),
+        ("--scale", "number", False, "Output XY scale (default from the input)"),
+        ("--workers", "integer", False, "Reprojection processes"),
+    ],
+    "las_catalog": [
+        ("--input-las", "las", False, "LAS files to add to or refresh in the catalog"),
+        ("--catalog", "output", True, "SQLite statistics catalog"),
+        ("--extent", "extent", False, "Query extent (xmin ymin xmax ymax) or polygon"),
+        ("--class-codes", "text", False, "Query class codes, e.g. 7;18"),
+    ],
+    "trees": [
+        ("--canopy-height", "dataset", True, "Step 6 Canopy_Height raster"),
+        ("--output-table", "output", True, "Output tree table"),
+        ("--min-height", "number", False, "Minimum tree height (default 3)"),
+        ("--smoothing", "number", False, "Gaussian smoothing sigma in cells (default 1)"),
+        ("--max-crown-diameter", "number", False, "Largest expected crown diameter (default 15)"),
+        ("--block-size", "integer", False, "Block size in cells"),
+    ],
+    "quick_look": [
+        ("--inputs", "text", True, "Class rasters or workspaces, separated by ;"),
+        ("--output-folder", "output", True, "Output folder for the PNGs and tiles"),
+        ("--layerfile-folder", "folder", False, "Folder of .lyrx files (default ArcGIS_Pro_Layerfiles)"),
+        ("--tiles", "text", False, "true to also write XYZ tile pyramids"),
+        ("--min-zoom", "integer", False, "Lowest tile zoom (default 4 below the highest)"),
+        ("--max-zoom", "integer", False, "Highest tile zoom (default from the cell size)"),
+        ("--threads", "integer", False, "PNG encoding threads (default 8)"),
+    ],
+    "catchments": [
+        ("--flow-direction", "dataset", True, "Step 7 Hydro_D8_Flow_Direction raster"),
+        ("--pour-points", "dataset", True, "Pour point feature class"),
+        ("--workspace", "folder", True, "Output workspace"),
+        ("--slope", "dataset", False, "Slope raster for mean slope per catchment"),
+        ("--ndvi", "dataset", False, "NDVI raster for mean NDVI per catchment"),
+    ],
+    "step8": [
+        ("--slope", "dataset", True, "Input slope raster"),
+        ("--flow-accumulation", "dataset", True, "Input flow accumulation raster"),
+        ("--curvature", "dataset", True, "Input curvature raster"),
+        ("--workspace", "folder", True, "Output workspace"),
+        ("--weights", "text", False, "Weight sets to sweep, e.g. \"0.4 0.3 0.3;0.6 0.2 0.2\" or a step such as 0.1"),
+        ("--normalization", "text", False, "MINMAX, ZSCORE, or PERCENTILE"),
+        ("--crop-boundary", "dataset", False, "Crop boundary feature class for per-field summaries"),
+        ("--crop-field", "text", False, "Crop boundary zone field"),
+        ("--block-size", "integer", False, "Block size in cells"),
+    ],
+    "las_index": [
+        ("--input-las", "las", True, "Input LAS file, folder, or LAS dataset"),
+        ("--cell-size", "number", False, "Index cell size in map units"),
+    ],
+    "class_store": [
+        ("--input-las", "las", True, "Input LAS file, folder, or LAS dataset"),
+        ("--store-folder", "output", True, "Output folder for the class-sorted point store"),
+    ],
+    "incremental": [
+        ("--las-folder", "las", True, "Folder of LAS tiles"),
+        ("--workspace", "folder", True, "Workspace holding the existing outputs"),
+        ("--dem", "dataset", True, "Existing DEM raster"),
+        ("--dsm", "dataset", True, "Existing DSM raster"),
+        ("--ndvi", "dataset", True, "NDVI raster"),
+        ("--ndvi-field-boundary", "dataset", True, "NDVI field boundary raster"),
+        ("--fill-output", "dataset", True, "Existing filled DEM"),
+        ("--tile-size", "number", False, "Raster tile size in map units"),
+        ("--halo-cells", "integer", False, "Halo around dirty tiles in cells"),
+    ],
+}
+
+def dest_name(option):
+    # argparse attribute name of an option
+    return option.lstrip("-").replace("-", "_")
+
+def dataset_exists(path):
+    # Existence check without ArcPy; datasets inside a geodatabase are checked at the geodatabase
+    if os.path.exists(path):
+        return True
+    parent = os.path.dirname(path)
+    while parent and parent != os.path.dirname(parent):
+        if parent.lower().endswith((".gdb", ".sde", ".gpkg")):
+            return os.path.exists(parent)
+        parent = os.path.dirname(parent)
+    return False
+
+def parse_extent_text(text):
+    # Extent tuple from "xmin ymin xmax ymax", or None for a polygon dataset
+    values = text.replace(",", " ").split()
+    try:
+        xmin, ymin, xmax, ymax = (float(value) for value in values[:4])
+    except ValueError:
+        return None
+    return (xmin, ymin, xmax, ymax)
+
+def validate_las(path, errors, warnings):
+    # Check LAS inputs from their headers only and return their combined bounds; a missing
+    # coordinate system is only a warning, since a projection parameter or ArcGIS can supply it
+    from Lidar_Analysis_LAS_Index import read_las_header, read_las_crs
+
+    if os.path.isdir(path):
+        las_files = [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.lower().endswith(".las")]
+    elif path.lower().endswith(".las"):
+        las_files = [path]
+    else:
+        return None  # LAS datasets are resolved by ArcPy
+    if not las_files:
+        errors.append(f"No LAS files found in {path}")
+        return None
+
+    bounds = None
+    crs_values = set()
+    for las_path in las_files:
+        try:
+            header = read_las_header(las_path)
+        except ValueError as e:
+            errors.append(str(e))
+            continue
+        crs_values.add(read_las_crs(las_path))
+        b = header["bounds"]
+        bounds = b if bounds is None else (
+            min(bounds[0], b[0]), min(bounds[1], b[1]), max(bounds[2], b[2]), max(bounds[3], b[3])
+        )
+    if None in crs_values:
+        warnings.append(f"LAS files without a coordinate system in {path}")
+    if len(crs_values - {None}) > 1:
+        errors.append(f"LAS files with mixed coordinate systems in {path}")
+    return bounds
+
+def validate(step, args, warnings=None):
+    # Cheap validation of the parsed arguments; returns a list of problems and adds
+    # non-fatal ones to warnings
+    errors = []
+    warnings = [] if warnings is None else warnings
+    las_bounds = None
+    for option, kind, _, _ in STEP_PARAMETERS[step]:
+        value = getattr(args, dest_name(option))
+        if not value:
+            continue
+        if kind == "las":
+            if not os.path.exists(value):
+                errors.append(f"{option}: does not exist: {value}")
+            else:
+                las_bounds = validate_las(value, errors, warnings)
+        elif kind in ("dataset", "folder"):
+            if not dataset_exists(value):
+                errors.append(f"{option}: does not exist: {value}")
+        elif kind == "output":
+            parent = os.path.dirname(os.path.abspath(value))
+            if not dataset_exists(parent):
+                errors.append(f"{option}: output location does not exist: {parent}")
+        elif kind == "number":
+            try:
+                float(value)
+            except ValueError:
+                errors.append(f"{option}: not a number: {value}")
+        elif kind == "integer":
+            try:
+                int(value)
+            except ValueError:
+                errors.append(f"{option}: not a whole number: {value}")
+        elif kind == "extent":
+            extent = parse_extent_text(value)
+            if extent is None:
+                if not dataset_exists(value):
+                    errors.append(f"{option}: not an extent or existing polygon: {value}")
+            elif extent[0] >= extent[2] or extent[1] >= extent[3]:
+                errors.append(f"{option}: empty extent: {value}")
+            elif las_bounds and (extent[0] > las_bounds[2] or extent[2] < las_bounds[0]
+                                 or extent[1] > las_bounds[3] or extent[3] < las_bounds[1]):
+                errors.append(f"{option}: does not intersect the LAS data extent {las_bounds}")
+    return errors
+
+def build_parser():
+    # Argument parser with one sub-command per step
+    parser = argparse.ArgumentParser(
+        prog="Lidar_Analysis_CLI.py", description="Run the LiDAR analysis steps from the command line."
+    )
+    commands = parser.add_subparsers(dest="step", required=True)
+    for step, parameters in STEP_PARAMETERS.items():
+        step_parser = commands.add_parser(step)
+        for option, _, required, help_text in parameters:
+            step_parser.add_argument(option, required=required, default="", help=help_text)
+        step_parser.add_argument("--dry-run", action="store_true", help="Validate inputs and exit")
+        step_parser.add_argument("--worker", nargs="?", const="", default=None,
+                                 help="Submit to a running warm worker (optional socket address)")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    step = args.step
+    parameters = [getattr(args, dest_name(option)) for option, _, _, _ in STEP_PARAMETERS[step]]
+
+    warnings = []
+    errors = validate(step, args, warnings)
+    for warning in warnings:
+        print(f"WARNING: {warning}", file=sys.stderr)
+    if errors:
+        for error in errors:
+            print(f"ERROR: {error}", file=sys.stderr)
+        return 2
+    if args.dry_run:
+        print(f"{step}: inputs valid; parameters {parameters}")
+        return 0
+
+    # Only the compute path pays for the ArcPy import
+    from Lidar_Analysis_Worker import Worker, submit, print_response
+    if args.worker is not None:
+        response = submit(step, parameters, args.worker or None)
+    else:
+        worker = Worker()
+        try:
+            response = worker.respond({"id": 1, "method": "run_step", "params": {"step": step, "parameters": parameters}})
+        finally:
+            worker.close()
+    return print_response(response)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+'''
+Catchments - Pour Point Catchment Delineation on the D8 Flow Direction Grid
+---------------------------------------------------------------------------
+Script created by Robert Grow 10/2026
+
+Builds the reverse D8 tree of Hydro_D8_Flow_Direction once and labels the upstream area of every
+pour point (field outlets, culverts) in a single breadth-first traversal, stopping at nested pour
+points so each cell belongs to its nearest outlet downstream. Nested basins are linked with
+union-find, and per-basin area and mean slope/NDVI are accumulated during the same traversal,
+so hundreds of outlets cost about as much as one.
+'''
+
+import os
+import numpy as np
+from Lidar_Analysis_Block_IO import raster_grid, read_window
+from Lidar_Analysis_Grid_Align import read_aligned_window
+
+# ESRI D8 codes and the (row, column) step to the downstream neighbour
+D8_STEPS = {1: (0, 1), 2: (1, 1), 4: (1, 0), 8: (1, -1), 16: (0, -1), 32: (-1, -1), 64: (-1, 0), 128: (-1, 1)}
+
+def log_message(message):
+    # Log a message to ArcGIS
+    import arcpy
+    arcpy.AddMessage(message)
+
+def downstream_cells(flow_direction):
+    # Flat index of each cell's downstream neighbour, -1 for sinks, NoData, and flow off the grid
+    nrows, ncols = flow_direction.shape
+    row_step = np.zeros(256, dtype=np.int64)
+    col_step = np.zeros(256, dtype=np.int64)
+    valid_code = np.zeros(256, dtype=bool)
+    for code, (row, col) in D8_STEPS.items():
+        row_step[code], col_step[code], valid_code[code] = row, col, True
+
+    codes = np.nan_to_num(flow_direction, nan=0).astype(np.int64)
+    codes[(codes < 0) | (codes > 255)] = 0
+    rows, cols = np.indices(codes.shape)
+    down_rows = rows + row_step[codes]
+    down_cols = cols + col_step[codes]
+    valid = valid_code[codes] & (down_rows >= 0) & (down_rows < nrows) & (down_cols >= 0) & (down_cols < ncols)
+    return np.where(valid, down_rows * ncols + down_cols, -1).ravel()
+
+def reverse_tree(down):
+    # Upstream neighbours of every cell in compressed form: upstream[start[i]:start[i] + count[i]]
+    has_down = np.flatnonzero(down >= 0)
+    upstream = has_down[np.argsort(down[has_down], kind="stable")]
+    count = np.bincount(down[has_down], minlength=down.size)
+    start = np.concatenate(([0], np.cumsum(count)[:-1]))
+    return upstream, start, count
+
+def pour_point_cells(pour_points, grid):
+    # Grid cells and object IDs of the pour points; points outside the grid or sharing a cell are skipped
+    import arcpy
+    cell = grid["cell_size"]
+    cells, oids = [], []
+    seen = set()
+    with arcpy.da.SearchCursor(pour_points, ["OID@", "SHAPE@XY"]) as cursor:
+        for oid, (x, y) in cursor:
+            row = int(np.floor((grid["ymax"] - y) / cell))
+            col = int(np.floor((x - grid["xmin"]) / cell))
+            index = row * grid["ncols"] + col
+            if not (0 <= row < grid["nrows"] and 0 <= col < grid["ncols"]):
+                arcpy.AddWarning(f"Pour point {oid} is outside the flow direction raster.")
+            elif index in seen:
+                arcpy.AddWarning(f"Pour point {oid} shares a cell with another pour point and is skipped.")
+            else:
+                seen.add(index)
+                cells.append(index)
+                oids.append(oid)
+    return np.array(cells, dtype=np.int64), np.array(oids, dtype=np.int64)
+
+def label_catchments(down, pour_cells, values=None):
+    # Label each cell with its nearest pour point downstream (1-based, 0 = none) in one traversal
+    # upstream from all pour points, accumulating per-basin cell counts and value sums on the way.
+    # No traversal is deeper than the cell count, which bounds it if the flow direction has a cycle.
+    upstream, start, count = reverse_tree(down)
+    basins = pour_cells.size
+    labels = np.zeros(down.size, dtype=np.int64)
+    labels[pour_cells] = np.arange(1, basins + 1)
+    is_pour = np.zeros(down.size, dtype=bool)
+    is_pour[pour_cells] = True
+
+    values = values or {}
+    cells = np.zeros(basins + 1, dtype=np.int64)
+    sums = {name: np.zeros(basins + 1) for name in values}
+    valid_counts = {name: np.zeros(basins + 1, dtype=np.int64) for name in values}
+
+    frontier = pour_cells
+    for _ in range(down.size + 1):
+        if not frontier.size:
+            break
+        frontier_labels = labels[frontier]
+        cells += np.bincount(frontier_labels, minlength=basins + 1)
+        for name, grid_values in values.items():
+            frontier_values = grid_values[frontier]
+            valid = ~np.isnan(frontier_values)
+            sums[name] += np.bincount(frontier_labels[valid], weights=frontier_values[valid], minlength=basins + 1)
+            valid_counts[name] += np.bincount(frontier_labels[valid], minlength=basins + 1)
+
+        # Gather the upstream neighbours of the whole frontier at once
+        counts = count[frontier]
+        total = counts.sum()
+        offsets = np.repeat(start[frontier] - np.cumsum(counts) + counts, counts) + np.arange(total)
+        neighbours = upstream[offsets]
+        neighbour_labels = np.repeat(frontier_labels, counts)
+        keep = ~is_pour[neighbours]
+        labels[neighbours[keep]] = neighbour_labels[keep]
+        frontier = neighbours[keep]
+    else:
+        raise ValueError("The flow direction raster has a flow cycle; catchments could not be labelled.")
+
+    return labels, cells, sums, valid_counts
+
+def nest_basins(down, labels, pour_cells):
+    # Downstream basin of every basin (0 = none) and its outermost basin by union-find
+    basins = pour_cells.size
+    outlet_down = down[pour_cells]
+    downstream = np.where(outlet_down >= 0, labels[np.maximum(outlet_down, 0)], 0)
+    downstream = np.concatenate(([0], downstream))
+
+    parent = np.arange(basins + 1)
+
+    def find(basin):
+        root = basin
+        while parent[root] != root:
+            root = parent[root]
+        while parent[basin] != root:
+            parent[basin], basin = root, parent[basin]
+        return root
+
+    for basin in range(1, basins + 1):
+        if downstream[basin]:
+            parent[find(basin)] = find(downstream[basin])
+    outer = np.array([find(basin) for basin in range(basins + 1)])
+    return downstream, outer
+
+def total_upstream(downstream, values):
+    # Sum per-basin values over each basin and all basins nested upstream of it, leaves first
+    totals = values.astype(np.float64).copy()
+    children = np.bincount(downstream[1:], minlength=downstream.size)
+    children[0] = 0
+    ready = [basin for basin in range(1, downstream.size) if children[basin] == 0]
+    while ready:
+        basin = ready.pop()
+        parent = downstream[basin]
+        if parent:
+            totals[parent] += totals[basin]
+            children[parent] -= 1
+            if children[parent] == 0:
+                ready.append(parent)
+    return totals
+
+def write_catchment_table(oids, downstream, outer, cells, sums, valid_counts, cell_area, output_table):
+    # Save incremental and nested totals of area and mean values per pour point
+    import arcpy
+    totals_cells = total_upstream(downstream, cells)
+    fields = [("POUR_OID", "i8"), ("DOWNSTREAM_OID", "i8"), ("OUTER_OID", "i8"),
+              ("CELL_COUNT", "i8"), ("AREA", "f8"), ("TOTAL_AREA", "f8")]
+    columns = {
+        "POUR_OID": oids,
+        "DOWNSTREAM_OID": np.concatenate(([0], oids))[downstream[1:]],
+        "OUTER_OID": np.concatenate(([0], oids))[outer[1:]],
+        "CELL_COUNT": cells[1:],
+        "AREA": cells[1:] * cell_area,
+        "TOTAL_AREA": totals_cells[1:] * cell_area,
+    }
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for name in sums:
+            fields += [(f"MEAN_{name.upper()}", "f8"), (f"TOTAL_MEAN_{name.upper()}", "f8")]
+            columns[f"MEAN_{name.upper()}"] = (sums[name] / valid_counts[name])[1:]
+            columns[f"TOTAL_MEAN_{name.upper()}"] = (
+                total_upstream(downstream, sums[name]) / total_upstream(downstream, valid_counts[name])
+            )[1:]
+    table = np.zeros(oids.size, dtype=fields)
+    for name, values in columns.items():
+        table[name] = values
+    if arcpy.Exists(output_table):
+        arcpy.management.Delete(output_table)
+    arcpy.da.NumPyArrayToTable(table, output_table)
+    log_message(f"Catchment statistics saved to {output_table}")
+
+def delineate_catchments(flow_direction, pour_points, workspace, slope_raster=None, ndvi_raster=None):
+    # Catchment raster, polygons, and statistics table for all pour points at once
+    import arcpy
+    grid = raster_grid(flow_direction)
+    full_window = (0, 0, grid["nrows"], grid["ncols"], 0)
+    down = downstream_cells(read_window(flow_direction, grid, full_window))
+    pour_cells, oids = pour_point_cells(pour_points, grid)
+    if not pour_cells.size:
+        raise ValueError("No pour points fall on the flow direction raster.")
+
+    values = {}
+    for name, raster in (("slope", slope_raster), ("ndvi", ndvi_raster)):
+        if raster:
+            values[name] = read_aligned_window(raster, raster_grid(raster), grid, full_window).ravel()
+
+    labels, cells, sums, valid_counts = label_catchments(down, pour_cells, values)
+    downstream, outer = nest_basins(down, labels, pour_cells)
+    log_message(f"{pour_cells.size} catchments labelled, {int((downstream[1:] > 0).sum())} nested in another")
+
+    # Catchment raster valued by pour point object ID
+    catchment_path = os.path.join(workspace, "Catchments")
+    cell = grid["cell_size"]
+    lower_left = arcpy.Point(grid["xmin"], grid["ymax"] - grid["nrows"] * cell)
+    catchment_ids = np.concatenate(([0], oids))[labels].reshape(grid["nrows"], grid["ncols"])
+    raster = arcpy.NumPyArrayToRaster(catchment_ids.astype(np.int32), lower_left, cell, cell, 0)
+    raster.save(catchment_path)
+    arcpy.management.DefineProjection(catchment_path, grid["spatial_reference"])
+    log_message(f"Catchment raster saved to {catchment_path}")
+
+    polygon_path = os.path.join(workspace, "Catchment_Polygons")
+    arcpy.conversion.RasterToPolygon(catchment_path, polygon_path, "NO_SIMPLIFY", "Value")
+    log_message(f"Catchment polygons saved to {polygon_path}")
+
+    write_catchment_table(
+        oids, downstream, outer, cells, sums, valid_counts, cell * cell,
+        os.path.join(workspace, "Catchment_Statistics")
+    )
+
+def main():
+    import arcpy
+    try:
+        # Set overwrite to True
+        arcpy.env.overwriteOutput = True
+
+        # Get parameters
+        flow_direction = arcpy.GetParameterAsText(0)  # Hydro_D8_Flow_Direction from Step 7
+        pour_points = arcpy.GetParameterAsText(1)
+        workspace = arcpy.GetParameterAsText(2)
+        slope_raster = arcpy.GetParameterAsText(3)
+        ndvi_raster = arcpy.GetParameterAsText(4)
+
+        arcpy.env.workspace = workspace
+        delineate_catchments(flow_direction, pour_points, workspace, slope_raster, ndvi_raster)
+
+        log_message("Catchment delineation complete.")
+
+    except Exception as e:
+        arcpy.AddError(f"Error: {e}")
+        raise
+
+if __name__ == "__main__":
+    main()
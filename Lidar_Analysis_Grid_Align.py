@@ -0,0 +1,200 @@
+'''
+Grid Align - Target Grid and Cached Resampling for Mixed-Resolution Inputs
+--------------------------------------------------------------------------
+Script created by Robert Grow 10/2026
+
+Computes one target grid for a set of rasters (snapped origin, cell size, and the intersection
+of their extents) and resamples every input block onto it with nearest, bilinear, or
+block-average index maps. The maps are separable per axis and cached per source and target
+grid pair, so expressions over imagery and LiDAR rasters pay for the alignment once instead of
+once per output.
+'''
+
+import math
+import numpy as np
+from Lidar_Analysis_Block_IO import (
+    DEFAULT_BLOCK_SIZE, raster_grid, block_windows, read_window, BlockOutput, BlockScheduler
+)
+
+RESAMPLING_METHODS = ("AUTO", "NEAREST", "BILINEAR", "AVERAGE")
+GRID_TOLERANCE = 1e-6
+
+# Index maps per (source grid, target grid, method), kept for the life of the process
+_INDEX_MAPS = {}
+
+def log_message(message):
+    # Log a message to ArcGIS
+    import arcpy
+    arcpy.AddMessage(message)
+
+def grid_key(grid):
+    # Hashable description of a grid's origin, cell size, and shape
+    return (round(grid["xmin"], 6), round(grid["ymax"], 6), grid["cell_size"], grid["nrows"], grid["ncols"])
+
+def target_grid(rasters, cell_size=None, snap_raster=None):
+    # Common grid of the rasters: cell size (a number, MINOF, MAXOF, a raster, or the snap raster's),
+    # origin snapped to the snap raster (the first raster by default), and the extent intersection
+    grids = [raster_grid(raster) for raster in rasters]
+    snap = raster_grid(snap_raster) if snap_raster else grids[0]
+    cell_sizes = [grid["cell_size"] for grid in grids]
+    if not cell_size:
+        cell = snap["cell_size"]
+    elif str(cell_size).upper() == "MAXOF":
+        cell = max(cell_sizes)
+    elif str(cell_size).upper() == "MINOF":
+        cell = min(cell_sizes)
+    else:
+        try:
+            cell = float(cell_size)
+        except ValueError:
+            cell = raster_grid(cell_size)["cell_size"]
+
+    xmin = max(grid["xmin"] for grid in grids)
+    xmax = min(grid["xmin"] + grid["ncols"] * grid["cell_size"] for grid in grids)
+    ymax = min(grid["ymax"] for grid in grids)
+    ymin = max(grid["ymax"] - grid["nrows"] * grid["cell_size"] for grid in grids)
+
+    # Snap inward so every target cell lies inside all inputs
+    xmin = snap["xmin"] + math.ceil((xmin - snap["xmin"]) / cell - GRID_TOLERANCE) * cell
+    ymax = snap["ymax"] - math.ceil((snap["ymax"] - ymax) / cell - GRID_TOLERANCE) * cell
+    ncols = int(math.floor((xmax - xmin) / cell + GRID_TOLERANCE))
+    nrows = int(math.floor((ymax - ymin) / cell + GRID_TOLERANCE))
+    if nrows <= 0 or ncols <= 0:
+        raise ValueError("The input rasters do not overlap.")
+    grid = {
+        "xmin": xmin,
+        "ymax": ymax,
+        "cell_size": cell,
+        "nrows": nrows,
+        "ncols": ncols,
+        "spatial_reference": snap["spatial_reference"],
+    }
+    log_message(f"Target grid: {ncols} x {nrows} cells of {cell} from ({xmin}, {ymax})")
+    return grid
+
+def grid_offset(source, target):
+    # Offset of the target origin from the source origin in source cells (rows, cols)
+    cell = source["cell_size"]
+    return (source["ymax"] - target["ymax"]) / cell, (target["xmin"] - source["xmin"]) / cell
+
+def resolve_method(method, source, target):
+    # Resampling method for a source grid, or None when the grids share cells and only need a shift.
+    # AUTO block-averages finer sources and interpolates bilinearly from coarser ones.
+    if abs(source["cell_size"] - target["cell_size"]) <= GRID_TOLERANCE * target["cell_size"]:
+        offsets = grid_offset(source, target)
+        if all(abs(offset - round(offset)) <= GRID_TOLERANCE for offset in offsets):
+            return None
+    method = (method or "AUTO").upper()
+    if method not in RESAMPLING_METHODS:
+        raise ValueError(f"Resampling method must be one of {', '.join(RESAMPLING_METHODS)}")
+    if method == "AUTO":
+        return "AVERAGE" if source["cell_size"] < target["cell_size"] else "BILINEAR"
+    return method
+
+def axis_map(offset, target_cell, source_cell, count, method):
+    # Source positions of `count` target cells along one axis, offset in map units from the source origin.
+    # NEAREST: (index, None); BILINEAR: (index below, weight of the next); AVERAGE: (start, stop)
+    edges = (offset + np.arange(count + 1) * target_cell) / source_cell
+    if method == "AVERAGE":
+        start = np.ceil(edges[:-1] - 0.5).astype(np.int64)
+        stop = np.maximum(np.ceil(edges[1:] - 0.5).astype(np.int64), start + 1)
+        return start, stop
+    centers = (edges[:-1] + edges[1:]) / 2
+    if method == "NEAREST":
+        return np.floor(centers).astype(np.int64), None
+    below = np.floor(centers - 0.5)
+    return below.astype(np.int64), (centers - 0.5 - below).astype(np.float32)
+
+def index_maps(source, target, method):
+    # Cached (row map, column map) from a target grid into a source grid
+    key = (grid_key(source), grid_key(target), method)
+    if key not in _INDEX_MAPS:
+        source_cell, target_cell = source["cell_size"], target["cell_size"]
+        _INDEX_MAPS[key] = (
+            axis_map(source["ymax"] - target["ymax"], target_cell, source_cell, target["nrows"], method),
+            axis_map(target["xmin"] - source["xmin"], target_cell, source_cell, target["ncols"], method),
+        )
+    return _INDEX_MAPS[key]
+
+def resample_block(values, row_map, col_map, method):
+    # Resample a source block onto target cells along its last two axes, so multiband
+    # (bands, y, x) blocks resample every band at once; the maps are relative to the block origin
+    rows, row_extra = row_map
+    cols, col_extra = col_map
+    if method == "NEAREST":
+        return values[..., rows[:, np.newaxis], cols]
+    if method == "BILINEAR":
+        top, bottom = values[..., rows, :], values[..., rows + 1, :]
+        vertical = top + (bottom - top) * row_extra[:, np.newaxis]
+        left, right = vertical[..., cols], vertical[..., cols + 1]
+        return left + (right - left) * col_extra
+
+    # Block average over the source cells whose centers fall in each target cell, ignoring NoData
+    values = values[..., :row_extra[-1], :col_extra[-1]]
+    valid = ~np.isnan(values)
+    sums = np.add.reduceat(np.add.reduceat(np.where(valid, values, 0), rows, axis=-2), cols, axis=-1)
+    counts = np.add.reduceat(np.add.reduceat(valid.astype(np.int32), rows, axis=-2), cols, axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan).astype(np.float32)
+
+def read_aligned_window(raster_path, source, target, window, method="AUTO"):
+    # Read a target-grid window of a raster on another grid, resampled with the cached index maps
+    row, col, rows, cols, _ = window
+    method = resolve_method(method, source, target)
+    if method is None:
+        row_offset, col_offset = (int(round(offset)) for offset in grid_offset(source, target))
+        return read_window(raster_path, source, (row + row_offset, col + col_offset, rows, cols, 0))
+
+    row_map, col_map = index_maps(source, target, method)
+    row_map = tuple(part[row:row + rows] if part is not None else None for part in row_map)
+    col_map = tuple(part[col:col + cols] if part is not None else None for part in col_map)
+
+    # Source window covering the maps (one extra cell below and right for bilinear)
+    first_row, first_col = row_map[0][0], col_map[0][0]
+    if method == "AVERAGE":
+        last_row, last_col = row_map[1][-1], col_map[1][-1]
+    else:
+        extra = 2 if method == "BILINEAR" else 1
+        last_row, last_col = row_map[0][-1] + extra, col_map[0][-1] + extra
+    values = read_window(
+        raster_path, source, (first_row, first_col, last_row - first_row, last_col - first_col, 0)
+    )
+
+    def relative(axis_maps, first):
+        index, extra = axis_maps
+        return index - first, extra - first if method == "AVERAGE" else extra
+
+    return resample_block(values, relative(row_map, first_row), relative(col_map, first_col), method)
+
+def process_aligned_blocks(input_rasters, output_paths, compute, grid, methods=None,
+                           block_size=DEFAULT_BLOCK_SIZE, prefetch=2, io_threads=4, scratch_folder=None):
+    # Run compute(inputs) -> {name: array} block by block on the target grid, resampling each
+    # input onto it as it is read. `methods` maps input names to a resampling method (AUTO by default).
+    import arcpy
+    sources = {name: raster_grid(path) for name, path in input_rasters.items()}
+    methods = methods or {}
+    for name, source in sources.items():
+        method = resolve_method(methods.get(name), source, grid)
+        log_message(f"{name}: {method.lower() if method else 'aligned'} onto the target grid")
+
+    scratch_folder = scratch_folder or arcpy.env.scratchFolder
+    outputs = {name: BlockOutput(path, grid, scratch_folder) for name, path in output_paths.items()}
+
+    def read_block(window):
+        return {
+            name: read_aligned_window(path, sources[name], grid, window, methods.get(name))
+            for name, path in input_rasters.items()
+        }
+
+    scheduler = BlockScheduler(
+        read_block, block_windows(grid["nrows"], grid["ncols"], block_size), prefetch, io_threads
+    )
+    try:
+        for window, inputs in scheduler:
+            scheduler.write(outputs, window, compute(inputs))
+    finally:
+        scheduler.close()
+
+    for output in outputs.values():
+        output.save()
+    return output_paths
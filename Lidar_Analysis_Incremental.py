@@ -0,0 +1,517 @@
+'''
+Incremental Re-processing - Update Outputs for New or Replaced LAS Tiles
+------------------------------------------------------------------------
+Script created by Robert Grow 10/2026
+
+Tracks which raster tiles each LAS tile touches and, when a flight adds or replaces tiles,
+regenerates only the affected DEM/DSM tiles plus a neighborhood halo. The dirty region is
+then propagated through the local derivatives of Step 3, Step 6, and Step 8, while the
+non-local hydrology of Step 7 is recomputed only for the drainage basins it touches.
+'''
+
+import os
+import json
+import numpy as np
+from Lidar_Analysis_LAS_Index import read_las_header, list_las_files, las_fingerprint, extract_las_extent
+
+MANIFEST_NAME = "Incremental_Manifest.json"
+
+# Passes that grow the hydrology window until the old and new drainage basins agree
+MAX_BASIN_PASSES = 5
+
+# ArcGIS pixel types by the pixelType of arcpy.Describe
+PIXEL_TYPES = {
+    "U1": "1_BIT", "U2": "2_BIT", "U4": "4_BIT", "U8": "8_BIT_UNSIGNED", "S8": "8_BIT_SIGNED",
+    "U16": "16_BIT_UNSIGNED", "S16": "16_BIT_SIGNED", "U32": "32_BIT_UNSIGNED", "S32": "32_BIT_SIGNED",
+    "F32": "32_BIT_FLOAT", "F64": "64_BIT",
+}
+
+STEP_3_OUTPUTS = [
+    f"{prefix}_{name}"
+    for prefix in ("DEM", "DSM")
+    for name in (
+        "Hillshade", "Slope_Degree", "Slope_Percent_Rise", "Aspect", "Mean_Curvature",
+        "Profile_Curvature", "Tangential_Curvature", "Plan_Curvature", "Gaussian_Curvature",
+        "Casorati_Curvature"
+    )
+]
+STEP_6_OUTPUTS = [
+    "Canopy_Height", "Canopy_Height_Reclass", "Canopy_Cover", "Equipment_Obstacles",
+    "Irrigation_Efficiency", "Irrigation_Efficiency_Reclass", "Steepness_For_Equipment",
+    "NDVI_Field_Boundary_Excluding_Trees"
+]
+STEP_7_OUTPUTS = [
+    f"Hydro_{method}_{name}"
+    for method in ("D8", "DINF")
+    for name in (
+        "Drop", "Flow_Direction", "Flow_Accumulation", "Flow_Accumulation_Reclass", "Stream_Order"
+    )
+]
+
+def log_message(message):
+    # Log a message to ArcGIS
+    import arcpy
+    arcpy.AddMessage(message)
+
+def check_out_extensions():
+    # Check out required ArcGIS extensions
+    import arcpy
+    try:
+        arcpy.CheckOutExtension("Spatial")
+        log_message("Spatial Analyst extension checked out successfully.")
+    except arcpy.ExecuteError:
+        arcpy.AddError("Could not check out Spatial Analyst extension.")
+        raise
+
+def check_in_extensions():
+    # Check in ArcGIS extensions
+    import arcpy
+    arcpy.CheckInExtension("Spatial")
+    log_message("Spatial Analyst extension checked in.")
+
+def extent_text(extent):
+    # Format an extent tuple as an ArcGIS extent string
+    return " ".join(str(value) for value in extent)
+
+def extent_contains(outer, inner):
+    # True when the inner extent lies within the outer extent
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and outer[2] >= inner[2] and outer[3] >= inner[3]
+
+def union_extent(extents):
+    # Extent covering all of the extents
+    extents = list(extents)
+    return (min(e[0] for e in extents), min(e[1] for e in extents),
+            max(e[2] for e in extents), max(e[3] for e in extents))
+
+def expand_extent(extent, distance):
+    # Grow an extent by a halo distance on every side
+    return (extent[0] - distance, extent[1] - distance, extent[2] + distance, extent[3] + distance)
+
+def raster_tiles_for_bounds(bounds, tile_size):
+    # Raster tile (column, row) ids touched by a bounding box
+    col_lo, row_lo = int(bounds[0] // tile_size), int(bounds[1] // tile_size)
+    col_hi, row_hi = int(bounds[2] // tile_size), int(bounds[3] // tile_size)
+    return [[col, row] for col in range(col_lo, col_hi + 1) for row in range(row_lo, row_hi + 1)]
+
+def scan_las_tiles(las_folder, tile_size):
+    # Fingerprint, bounds, and touched raster tiles of every LAS tile in a folder
+    tiles = {}
+    for las_path in list_las_files(las_folder):
+        bounds = read_las_header(las_path)["bounds"]
+        tiles[os.path.basename(las_path)] = {
+            "fingerprint": las_fingerprint(las_path).tolist(),
+            "bounds": list(bounds),
+            "raster_tiles": raster_tiles_for_bounds(bounds, tile_size),
+        }
+    return tiles
+
+def load_manifest(manifest_path):
+    # Load the manifest written by the previous run, if any
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as manifest_file:
+        return json.load(manifest_file)
+
+def save_manifest(manifest_path, tile_size, tiles):
+    # Record the current LAS tiles for the next incremental run
+    with open(manifest_path, "w") as manifest_file:
+        json.dump({"tile_size": tile_size, "las_tiles": tiles}, manifest_file, indent=2)
+
+def find_dirty_tiles(previous_tiles, current_tiles):
+    # Raster tiles touched by added, replaced, or removed LAS tiles, before and after the change
+    dirty = set()
+    for name in set(previous_tiles) | set(current_tiles):
+        previous = previous_tiles.get(name)
+        current = current_tiles.get(name)
+        if previous and current and previous["fingerprint"] == current["fingerprint"]:
+            continue
+        for entry in (previous, current):
+            if entry:
+                dirty.update(tuple(tile) for tile in entry["raster_tiles"])
+    return dirty
+
+def group_dirty_tiles(dirty_tiles):
+    # Split dirty tiles into groups of touching tiles so distant changes are processed separately
+    remaining = set(dirty_tiles)
+    groups = []
+    while remaining:
+        stack = [remaining.pop()]
+        group = []
+        while stack:
+            col, row = stack.pop()
+            group.append((col, row))
+            for neighbour in [(col + dc, row + dr) for dc in (-1, 0, 1) for dr in (-1, 0, 1)]:
+                if neighbour in remaining:
+                    remaining.remove(neighbour)
+                    stack.append(neighbour)
+        groups.append(group)
+    return groups
+
+def tile_group_extent(group, tile_size):
+    # Extent covered by a group of raster tiles
+    cols = [col for col, _ in group]
+    rows = [row for _, row in group]
+    return (min(cols) * tile_size, min(rows) * tile_size,
+            (max(cols) + 1) * tile_size, (max(rows) + 1) * tile_size)
+
+def raster_extent(raster):
+    # Extent tuple of a raster
+    import arcpy
+    extent = arcpy.Describe(raster).extent
+    return (extent.XMin, extent.YMin, extent.XMax, extent.YMax)
+
+def mosaic_into(source, target, scratch):
+    # Mosaic a raster into an existing output, rebuilding the output on the union extent
+    # when the source reaches beyond it (Mosaic never grows its target)
+    import arcpy
+    source_extent, target_extent = raster_extent(source), raster_extent(target)
+    if extent_contains(target_extent, source_extent):
+        arcpy.management.Mosaic(source, target, "LAST", "FIRST")
+        return
+    desc = arcpy.Describe(target)
+    grown_name = f"{os.path.basename(target)}_Grown"
+    arcpy.management.MosaicToNewRaster(
+        [target, source], scratch, grown_name, desc.spatialReference, PIXEL_TYPES.get(desc.pixelType, "32_BIT_FLOAT"),
+        desc.meanCellWidth, desc.bandCount, "LAST"
+    )
+    arcpy.management.Delete(target)
+    arcpy.management.CopyRaster(os.path.join(scratch, grown_name), target)
+    log_message(f"Extent of {target} grown to {extent_text(union_extent([source_extent, target_extent]))}")
+
+def mosaic_patch(patch, target, core_extent, scratch):
+    # Clip a patch computed with a halo to its core extent and mosaic it into the existing output
+    import arcpy
+    clipped = os.path.join(scratch, f"{os.path.basename(patch)}_Core")
+    arcpy.management.Clip(patch, extent_text(core_extent), clipped, "#", "#", "NONE", "NO_MAINTAIN_EXTENT")
+    mosaic_into(clipped, target, scratch)
+    log_message(f"Updated {target} within {extent_text(core_extent)}")
+
+def clear_extent(target, core_extent, scratch):
+    # Set the cells of an existing output inside the core extent to NoData
+    # (mosaicking a NoData patch would leave the old values in place)
+    import arcpy
+    from arcpy.sa import ExtractByRectangle
+    cleared_path = os.path.join(scratch, f"{os.path.basename(target)}_Cleared")
+    with arcpy.EnvManager(extent=target):
+        ExtractByRectangle(target, arcpy.Extent(*core_extent), "OUTSIDE").save(cleared_path)
+    arcpy.management.Delete(target)
+    arcpy.management.CopyRaster(cleared_path, target)
+    log_message(f"Cleared {target} within {extent_text(core_extent)}")
+
+def update_local_outputs(dirty_extents, halo, scratch, runner, targets, feature_targets=None, empty_extents=()):
+    # Recompute a local derivative over each dirty extent plus halo and mosaic the core back in;
+    # feature class patches are swapped in per extent, before the next extent overwrites them.
+    # Extents left without points are cleared instead of recomputed.
+    import arcpy
+    for core_extent in dirty_extents:
+        if core_extent in empty_extents:
+            for target in targets.values():
+                clear_extent(target, core_extent, scratch)
+            for target in (feature_targets or {}).values():
+                replace_features_in_extent(target, None, core_extent, scratch)
+            continue
+        arcpy.env.extent = extent_text(expand_extent(core_extent, halo))
+        try:
+            runner(scratch)
+        finally:
+            arcpy.env.extent = None
+        for name, target in targets.items():
+            mosaic_patch(os.path.join(scratch, name), target, core_extent, scratch)
+        for name, target in (feature_targets or {}).items():
+            replace_features_in_extent(target, os.path.join(scratch, name), core_extent, scratch)
+
+def regenerate_surfaces(las_folder, dem, dsm, dirty_extents, halo, scratch):
+    # Rebuild the DEM and DSM over each dirty extent from the LAS points inside it; returns the
+    # extents left without points (removed tiles), which are set to NoData
+    import arcpy
+    import Lidar_Analysis_Step_2__V2 as step_2
+    empty_extents = []
+    for number, core_extent in enumerate(dirty_extents):
+        extent = extent_text(expand_extent(core_extent, halo))
+        subset = extract_las_extent(
+            las_folder, extent, os.path.join(arcpy.env.scratchFolder, f"Incremental_Extent_{number}"),
+            allow_empty=True
+        )
+        if subset is None:
+            log_message(f"No LAS points left within {extent_text(core_extent)}; setting it to NoData")
+            clear_extent(dem, core_extent, scratch)
+            clear_extent(dsm, core_extent, scratch)
+            empty_extents.append(core_extent)
+            continue
+        arcpy.env.extent = extent
+        try:
+            step_2.make_las_dataset_layer(subset, "Incremental_Ground", step_2.GROUND_POINT_FILTERS, step_2.RETURN_VALUES)
+            step_2.make_las_dataset_layer(subset, "Incremental_Vegetation", step_2.VEG_POINT_FILTERS, step_2.RETURN_VALUES)
+            step_2.create_raster_from_las("Incremental_Ground", os.path.join(scratch, "DEM_Patch"), "DEM")
+            step_2.create_raster_from_las("Incremental_Vegetation", os.path.join(scratch, "DSM_Patch"), "DSM")
+        finally:
+            arcpy.env.extent = None
+        mosaic_patch(os.path.join(scratch, "DEM_Patch"), dem, core_extent, scratch)
+        mosaic_patch(os.path.join(scratch, "DSM_Patch"), dsm, core_extent, scratch)
+    return empty_extents
+
+def run_step_3(dem, dsm):
+    # Step 3 terrain products written to a scratch workspace
+    import Lidar_Analysis_Step_3__V2 as step_3
+    def runner(scratch):
+        step_3.process_dem_products(dem, scratch, "DEM")
+        step_3.process_dem_products(dsm, scratch, "DSM")
+    return runner
+
+def run_step_6(dem, dsm, slope_raster, ndvi_input):
+    # Step 6 canopy, irrigation, and equipment products written to a scratch workspace
+    import Lidar_Analysis_Step_6__V2 as step_6
+    def runner(scratch):
+        canopy_height = step_6.calculate_canopy_height(dsm, dem, os.path.join(scratch, "Canopy_Height"))
+        step_6.reclassify_canopy_height(canopy_height, os.path.join(scratch, "Canopy_Height_Reclass"))
+        step_6.calculate_canopy_cover(canopy_height, 3, os.path.join(scratch, "Canopy_Cover"))
+        step_6.create_obstacles_layer(canopy_height, os.path.join(scratch, "Equipment_Obstacles"))
+        irrigation_eff = step_6.calculate_irrigation_efficiency(
+            ndvi_input, slope_raster, canopy_height, os.path.join(scratch, "Irrigation_Efficiency")
+        )
+        step_6.reclassify_irrigation_efficiency(irrigation_eff, os.path.join(scratch, "Irrigation_Efficiency_Reclass"))
+        step_6.reclassify_slope_for_equipment(slope_raster, os.path.join(scratch, "Steepness_For_Equipment"))
+        step_6.convert_canopy_cover_to_polygon(
+            os.path.join(scratch, "Canopy_Cover"), os.path.join(scratch, "Canopy_Cover_Trees_Polygon")
+        )
+    return runner
+
+def run_ndvi_exclusion(ndvi_field_boundary, canopy_polygon):
+    # Step 6 NDVI field boundary excluding trees written to a scratch workspace
+    import Lidar_Analysis_Step_6__V2 as step_6
+    def runner(scratch):
+        step_6.extract_ndvi_excluding_trees(
+            ndvi_field_boundary, canopy_polygon, os.path.join(scratch, "NDVI_Field_Boundary_Excluding_Trees")
+        )
+    return runner
+
+def run_step_8(slope_raster, flow_accum, curvature_raster):
+    # Step 8 soil composition index written to a scratch workspace
+    import Lidar_Analysis_Step_8__V2 as step_8
+    def runner(scratch):
+        step_8.calculate_soil_composition(
+            slope_raster, flow_accum, curvature_raster, os.path.join(scratch, "Soil_Composition")
+        )
+    return runner
+
+def replace_features_in_extent(target_fc, patch_fc, core_extent, scratch):
+    # Replace the features of target_fc inside the core extent with the clipped patch features,
+    # or only remove them when there is no patch
+    import arcpy
+    core = arcpy.Extent(*core_extent).polygon
+    layer = "incremental_target_layer"
+    arcpy.management.MakeFeatureLayer(target_fc, layer)
+    arcpy.management.SelectLayerByLocation(layer, "INTERSECT", core)
+    outside = os.path.join(scratch, "Features_Outside_Core")
+    arcpy.analysis.Erase(layer, core, outside)
+    appended = [outside]
+    if patch_fc is not None:
+        inside = os.path.join(scratch, "Features_Inside_Core")
+        arcpy.analysis.Clip(patch_fc, core, inside)
+        appended.append(inside)
+    arcpy.management.DeleteFeatures(layer)
+    arcpy.management.Append(appended, target_fc, "NO_TEST")
+    arcpy.management.Delete(layer)
+    log_message(f"Updated {target_fc} within {extent_text(core_extent)}")
+
+def basin_grid(flow_direction):
+    # Basin raster of a flow direction raster, its array (0 for NoData), and its (left, top, cell)
+    import arcpy
+    from arcpy.sa import Basin, Raster
+    basins = Basin(Raster(flow_direction))
+    desc = arcpy.Describe(flow_direction)
+    geometry = (desc.extent.XMin, desc.extent.YMax, desc.meanCellWidth)
+    return basins, arcpy.RasterToNumPyArray(basins, nodata_to_value=0), geometry
+
+def extent_window(extent, geometry, shape):
+    # Row and column slices of an array grid covered by an extent, clipped to the array
+    left, top, cell = geometry
+    xmin, ymin, xmax, ymax = extent
+    row_lo, row_hi = max(int((top - ymax) // cell), 0), min(int(np.ceil((top - ymin) / cell)), shape[0])
+    col_lo, col_hi = max(int((xmin - left) // cell), 0), min(int(np.ceil((xmax - left) / cell)), shape[1])
+    return slice(row_lo, max(row_hi, row_lo)), slice(col_lo, max(col_hi, col_lo))
+
+def basins_touching(basin_array, geometry, extents):
+    # Ids of the basins with cells inside any of the extents
+    touched = set()
+    for extent in extents:
+        rows, cols = extent_window(extent, geometry, basin_array.shape)
+        touched.update(np.unique(basin_array[rows, cols]).tolist())
+    touched.discard(0)
+    return touched
+
+def basins_extent(basin_array, geometry, basin_ids):
+    # Extent of the cells of the given basins, or None
+    if not basin_ids:
+        return None
+    left, top, cell = geometry
+    rows, cols = np.nonzero(np.isin(basin_array, list(basin_ids)))
+    return (left + cols.min() * cell, top - (rows.max() + 1) * cell,
+            left + (cols.max() + 1) * cell, top - rows.min() * cell)
+
+def drainage_reach(new_array, new_geometry, dirty_extents):
+    # Extent reached by the recomputed drainage of the dirty extents, grown by one cell where the
+    # new basins run into the edge of the recompute window, since they may continue beyond it
+    new_ids = basins_touching(new_array, new_geometry, dirty_extents)
+    reach = basins_extent(new_array, new_geometry, new_ids)
+    if reach is None:
+        return new_ids, None
+    affected = np.isin(new_array, list(new_ids))
+    cell = new_geometry[2]
+    at_edge = (affected[:, 0].any(), affected[-1, :].any(), affected[:, -1].any(), affected[0, :].any())
+    reach = tuple(value + cell * sign * edge for value, sign, edge in zip(reach, (-1, -1, 1, 1), at_edge))
+    return new_ids, reach
+
+def grow_basin_ids(basin_ids, old_array, old_geometry, reach):
+    # Old basin ids grown with every old basin the new drainage reaches
+    if reach is None:
+        return set(basin_ids)
+    return set(basin_ids) | basins_touching(old_array, old_geometry, [reach])
+
+def update_hydrology(dem, fill_output, workspace, dirty_extents, scratch):
+    # Recompute Step 7 only for the drainage basins touching the dirty extents, in both the old
+    # and the recomputed flow direction: the window grows until the new drainage of the dirty
+    # extents stays inside the old basins being replaced
+    import arcpy
+    from arcpy.sa import Raster, Con, InList, IsNull
+    import Lidar_Analysis_Step_7__V2 as step_7
+    old_basins, old_array, old_geometry = basin_grid(os.path.join(workspace, "Hydro_D8_Flow_Direction"))
+    basin_ids = basins_touching(old_array, old_geometry, dirty_extents)
+    window = union_extent([basins_extent(old_array, old_geometry, basin_ids) or dirty_extents[0]] + dirty_extents)
+
+    prefix = os.path.join(scratch, "Hydro")
+    try:
+        for number in range(1, MAX_BASIN_PASSES + 1):
+            arcpy.env.extent = extent_text(window)
+            filled_dem = step_7.fill_dem(dem, os.path.join(scratch, "Fill_Patch"))
+            d8_flow = step_7.calculate_flow_direction(filled_dem, prefix, "D8")
+            new_basins, new_array, new_geometry = basin_grid(d8_flow)
+            new_ids, reach = drainage_reach(new_array, new_geometry, dirty_extents)
+            grown_ids = grow_basin_ids(basin_ids, old_array, old_geometry, reach)
+            grown_window = union_extent(
+                [window] + [extent for extent in (basins_extent(old_array, old_geometry, grown_ids), reach) if extent]
+            )
+            if grown_ids == basin_ids and extent_contains(window, grown_window):
+                break
+            if number == MAX_BASIN_PASSES:
+                # Keep the last window so the merged basins stay inside the recomputed rasters
+                arcpy.AddWarning(
+                    f"Drainage still changing after {MAX_BASIN_PASSES} passes; run Step 7 over the full DEM to be safe."
+                )
+                break
+            basin_ids, window = grown_ids, grown_window
+        log_message(f"Hydrology recomputed within {extent_text(window)} for {len(basin_ids)} old basins")
+
+        dinf_flow = step_7.calculate_flow_direction(filled_dem, prefix, "DINF")
+        d8_accum = step_7.calculate_flow_accumulation(d8_flow, prefix, "D8")
+        dinf_accum = step_7.calculate_flow_accumulation(dinf_flow, prefix, "DINF")
+        step_7.reclassify_flow_accumulation(d8_accum, f"{prefix}_D8_Flow_Accumulation_Reclass")
+        step_7.reclassify_flow_accumulation(dinf_accum, f"{prefix}_DINF_Flow_Accumulation_Reclass")
+        step_7.calculate_stream_order(f"{prefix}_D8_Flow_Accumulation_Reclass", d8_flow, prefix, "D8")
+        step_7.calculate_stream_order(f"{prefix}_DINF_Flow_Accumulation_Reclass", d8_flow, prefix, "DINF")
+
+        # Replace the union of the old affected basins and the new basins of the dirty extents,
+        # and keep the existing values everywhere else
+        arcpy.env.extent = "MAXOF"
+        in_old = Con(IsNull(old_basins), 0, InList(old_basins, sorted(basin_ids)))
+        in_new = Con(IsNull(new_basins), 0, InList(new_basins, sorted(new_ids)))
+        in_basins = (in_old + in_new) > 0
+        patches = {os.path.join(scratch, "Fill_Patch"): fill_output}
+        patches.update({os.path.join(scratch, name): os.path.join(workspace, name) for name in STEP_7_OUTPUTS})
+        for patch, target in patches.items():
+            merged = Con(in_basins, Raster(patch), Raster(target))
+            merged_path = f"{patch}_Merged"
+            merged.save(merged_path)
+            mosaic_into(merged_path, target, scratch)
+            log_message(f"Updated {target} within the affected basins")
+    finally:
+        arcpy.env.extent = None
+    return window
+
+def main():
+    import arcpy
+    check_out_extensions()
+    try:
+        # Set overwrite to True
+        arcpy.env.overwriteOutput = True
+
+        # Get parameters
+        las_folder = arcpy.GetParameterAsText(0)
+        workspace = arcpy.GetParameterAsText(1)
+        dem = arcpy.GetParameterAsText(2)
+        dsm = arcpy.GetParameterAsText(3)
+        ndvi_input = arcpy.GetParameterAsText(4)
+        ndvi_field_boundary = arcpy.GetParameterAsText(5)
+        fill_output = arcpy.GetParameterAsText(6)
+        tile_size = float(arcpy.GetParameterAsText(7) or 500)
+        halo_cells = int(arcpy.GetParameterAsText(8) or 3)
+
+        arcpy.env.workspace = workspace
+        scratch = arcpy.env.scratchGDB
+        manifest_path = os.path.join(las_folder, MANIFEST_NAME)
+
+        current_tiles = scan_las_tiles(las_folder, tile_size)
+        previous = load_manifest(manifest_path)
+        if previous is None or previous["tile_size"] != tile_size:
+            save_manifest(manifest_path, tile_size, current_tiles)
+            log_message("No previous manifest for this tile size; baseline recorded, run the full workflow once.")
+            return
+
+        dirty_tiles = find_dirty_tiles(previous["las_tiles"], current_tiles)
+        if not dirty_tiles:
+            log_message("No LAS tiles changed since the last run.")
+            return
+
+        dirty_extents = [tile_group_extent(group, tile_size) for group in group_dirty_tiles(dirty_tiles)]
+        log_message(f"{len(dirty_tiles)} raster tiles changed in {len(dirty_extents)} regions")
+
+        # Keep every patch on the existing raster grid
+        arcpy.env.snapRaster = dem
+        arcpy.env.cellSize = dem
+        halo = halo_cells * arcpy.Describe(dem).meanCellWidth
+
+        # Step 2 surfaces, then the local derivatives of Step 3 and Step 6
+        empty_extents = regenerate_surfaces(las_folder, dem, dsm, dirty_extents, halo, scratch)
+        update_local_outputs(
+            dirty_extents, halo, scratch, run_step_3(dem, dsm),
+            {name: os.path.join(workspace, name) for name in STEP_3_OUTPUTS}, empty_extents=empty_extents
+        )
+        slope_raster = os.path.join(workspace, "DEM_Slope_Percent_Rise")
+        canopy_polygon = os.path.join(workspace, "Canopy_Cover_Trees_Polygon")
+        update_local_outputs(
+            dirty_extents, halo, scratch,
+            run_step_6(dem, dsm, slope_raster, ndvi_input),
+            {name: os.path.join(workspace, name) for name in STEP_6_OUTPUTS if name != "NDVI_Field_Boundary_Excluding_Trees"},
+            {"Canopy_Cover_Trees_Polygon": canopy_polygon}, empty_extents=empty_extents
+        )
+        update_local_outputs(
+            dirty_extents, halo, scratch,
+            run_ndvi_exclusion(ndvi_field_boundary, canopy_polygon),
+            {"NDVI_Field_Boundary_Excluding_Trees": os.path.join(workspace, "NDVI_Field_Boundary_Excluding_Trees")}
+        )
+
+        # Step 7 is not local, so it is recomputed per affected drainage basin
+        basin_extent = update_hydrology(dem, fill_output, workspace, dirty_extents, scratch)
+
+        # Step 8 follows both the local changes and the changed flow accumulation
+        step_8_extents = dirty_extents + ([basin_extent] if basin_extent else [])
+        update_local_outputs(
+            step_8_extents, halo, scratch,
+            run_step_8(
+                slope_raster, os.path.join(workspace, "Hydro_D8_Flow_Accumulation"),
+                os.path.join(workspace, "DEM_Mean_Curvature")
+            ),
+            {"Soil_Composition": os.path.join(workspace, "Soil_Composition")}, empty_extents=empty_extents
+        )
+
+        save_manifest(manifest_path, tile_size, current_tiles)
+        log_message("Incremental re-processing complete.")
+
+    except Exception as e:
+        arcpy.AddError(f"Error: {e}")
+        raise
+    finally:
+        check_in_extensions()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+'''
+Index Formulas - NumPy Vegetation and Soil Indices Shared by the Block Workflows
+-------------------------------------------------------------------------------
+Script created by Robert Grow 10/2026
+
+NumPy form of the Step 5 index functions, applied to band arrays normalized to 0-1, together
+with the band order of the 4-band imagery. Step 5 block processing and the Index Time Series
+both calculate their indices here, so a date in a time series matches Step 5 for that image.
+'''
+
+import numpy as np
+
+# Zero-based position of each band in the 4-band imagery, as labelled in Step 4 and Step 5:
+# band 1 Red, band 2 Green, band 3 Blue, band 4 NIR
+BAND_INDEX = {"red": 0, "green": 1, "blue": 2, "nir": 3}
+
+# Numpy form of the Step 5 index functions, applied to bands normalized to 0-1
+BLOCK_INDICES = {
+    "ndvi": lambda b: (b["nir"] - b["red"]) / (b["nir"] + b["red"]),
+    "evi": lambda b: np.clip(
+        2.5 * ((b["nir"] - b["red"]) / (b["nir"] + (6.0 * b["red"]) - (7.5 * b["blue"]) + 1.0)), -1, 1
+    ),
+    "msavi": lambda b: (2 * b["nir"] + 1 - np.sqrt((2 * b["nir"] + 1) ** 2 - 8 * (b["nir"] - b["red"]))) / 2,
+    "msavi2": lambda b: 0.5 * (2 * (b["nir"] + 1) - np.sqrt((2 * b["nir"] + 1) ** 2 - 8 * (b["nir"] - b["red"]))),
+    "clg": lambda b: (b["nir"] / b["green"]) - 1,
+    "gndvi": lambda b: (b["nir"] - b["green"]) / (b["nir"] + b["green"]),
+    "iron_oxide": lambda b: b["red"] / b["blue"],
+    "mtvi2": lambda b: (
+        1.5 * (1.2 * (b["nir"] - b["green"]) - 2.5 * (b["red"] - b["green"]))
+        / np.sqrt((2 * b["nir"] + 1) ** 2 - (6 * b["nir"] - 5 * np.sqrt(b["red"])) - 0.5)
+    ),
+    "ndwi": lambda b: (b["green"] - b["nir"]) / (b["green"] + b["nir"]),
+    "sr": lambda b: b["nir"] / b["red"],
+    "vari": lambda b: (b["green"] - b["red"]) / (b["green"] + b["red"] - b["blue"]),
+}
+
+BLOCK_OUTPUTS = ("evi", "evi_ndvi", "msavi", "msavi2", "clg", "gndvi", "iron_oxide", "mtvi2", "ndwi", "sr", "vari")
+
+def calculate_indices_block(blocks, names=BLOCK_OUTPUTS):
+    # Calculate the named indices for one block of band arrays; blocks may stack several dates
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bands = {band: blocks[band] / 255.0 for band in ("red", "green", "blue", "nir")}
+        results = {name: BLOCK_INDICES[name](bands) for name in names if name != "evi_ndvi"}
+        if "evi_ndvi" in names:
+            evi = results["evi"] if "evi" in results else BLOCK_INDICES["evi"](bands)
+            results["evi_ndvi"] = evi - blocks["ndvi"]
+    return results
@@ -0,0 +1,420 @@
+'''
+LAS Catalog - SQLite Statistics Catalog of LAS Tiles and Chunks
+---------------------------------------------------------------
+Script created by Robert Grow 10/2026
+
+Records per-tile and per-chunk summaries of LAS files in an embedded SQLite catalog: bounds,
+point counts with elevation and intensity ranges by class and by return number, and elevation
+and intensity histograms. The catalog is filled during the read pass that builds the spatial
+indexes, so questions such as which tiles hold class 7 noise or the point density inside a
+field are answered by SQL queries without touching the point data, and the dataset statistics
+of Step 1 are an aggregation over it.
+'''
+
+import os
+import sqlite3
+from contextlib import closing
+import numpy as np
+from Lidar_Analysis_LAS_Index import (
+    CHUNK_SIZE, read_las_header, open_las_points, point_coordinates, point_classification,
+    point_returns, build_spatial_index, load_spatial_index, parse_extent, list_las_files, las_fingerprint
+)
+
+CATALOG_NAME = "LAS_Catalog.sqlite"
+CATALOG_GRID_DIM = 8
+Z_BIN_WIDTH = 1.0
+INTENSITY_BIN_WIDTH = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tiles (
+    tile_id INTEGER PRIMARY KEY, path TEXT UNIQUE, file_size INTEGER, mtime_ns INTEGER,
+    point_format INTEGER, point_count INTEGER,
+    xmin REAL, ymin REAL, xmax REAL, ymax REAL, zmin REAL, zmax REAL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    tile_id INTEGER, chunk_id INTEGER, point_count INTEGER,
+    xmin REAL, ymin REAL, xmax REAL, ymax REAL, zmin REAL, zmax REAL,
+    intensity_min INTEGER, intensity_max INTEGER,
+    cell_xmin REAL, cell_ymin REAL, cell_xmax REAL, cell_ymax REAL,
+    PRIMARY KEY (tile_id, chunk_id)
+);
+CREATE TABLE IF NOT EXISTS class_counts (
+    tile_id INTEGER, chunk_id INTEGER, class_code INTEGER, point_count INTEGER,
+    zmin REAL, zmax REAL, intensity_min INTEGER, intensity_max INTEGER
+);
+CREATE TABLE IF NOT EXISTS return_counts (
+    tile_id INTEGER, chunk_id INTEGER, return_number INTEGER, point_count INTEGER,
+    zmin REAL, zmax REAL, intensity_min INTEGER, intensity_max INTEGER
+);
+CREATE TABLE IF NOT EXISTS histograms (
+    tile_id INTEGER, chunk_id INTEGER, attribute TEXT, bin_start REAL, point_count INTEGER
+);
+CREATE INDEX IF NOT EXISTS chunk_bounds ON chunks (xmin, xmax, ymin, ymax);
+CREATE INDEX IF NOT EXISTS class_code_index ON class_counts (class_code, tile_id);
+CREATE INDEX IF NOT EXISTS return_number_index ON return_counts (return_number, tile_id);
+CREATE INDEX IF NOT EXISTS histogram_index ON histograms (attribute, tile_id);
+"""
+
+def log_message(message):
+    # Log a message to ArcGIS
+    import arcpy
+    arcpy.AddMessage(message)
+
+def catalog_path_for(input_las, catalog_path=None):
+    # Catalog path, by default beside the LAS files of a folder
+    if catalog_path:
+        return catalog_path
+    folder = input_las if os.path.isdir(input_las) else os.path.dirname(input_las)
+    return os.path.join(folder, CATALOG_NAME)
+
+def open_catalog(catalog_path):
+    # Open the catalog database, creating its tables on first use
+    connection = sqlite3.connect(catalog_path)
+    connection.executescript(SCHEMA)
+    return connection
+
+def group_ranges(keys, size, z, intensity):
+    # Counts and elevation/intensity ranges per key
+    counts = np.bincount(keys, minlength=size)
+    ranges = np.empty((4, size))
+    ranges[0], ranges[1] = np.inf, -np.inf
+    ranges[2], ranges[3] = np.inf, -np.inf
+    np.minimum.at(ranges[0], keys, z)
+    np.maximum.at(ranges[1], keys, z)
+    np.minimum.at(ranges[2], keys, intensity)
+    np.maximum.at(ranges[3], keys, intensity)
+    return counts, ranges
+
+class TileSummary:
+    # Per-chunk counts, ranges, and histograms of one LAS file, accumulated from its point chunks
+
+    def __init__(self, las_path, header, grid_dim=CATALOG_GRID_DIM):
+        self.las_path = las_path
+        self.header = header
+        xmin, ymin, xmax, ymax = header["bounds"]
+        self.cell_size = max(xmax - xmin, ymax - ymin, 1.0) / grid_dim
+        self.ncols = max(int(np.ceil((xmax - xmin) / self.cell_size)), 1)
+        self.nrows = max(int(np.ceil((ymax - ymin) / self.cell_size)), 1)
+        cells = self.nrows * self.ncols
+        self.z_first_bin = int(np.floor(header["z_range"][0] / Z_BIN_WIDTH))
+        self.z_bins = int(np.floor(header["z_range"][1] / Z_BIN_WIDTH)) - self.z_first_bin + 1
+
+        self.counts = np.zeros(cells, dtype=np.int64)
+        self.mins = np.full((cells, 4), np.inf)
+        self.maxs = np.full((cells, 4), -np.inf)
+        self.class_counts = np.zeros(cells * 256, dtype=np.int64)
+        self.class_ranges = np.tile(np.array([[np.inf], [-np.inf], [np.inf], [-np.inf]]), cells * 256)
+        self.return_counts = np.zeros(cells * 16, dtype=np.int64)
+        self.return_ranges = np.tile(np.array([[np.inf], [-np.inf], [np.inf], [-np.inf]]), cells * 16)
+        self.z_histogram = np.zeros(cells * self.z_bins, dtype=np.int64)
+        self.intensity_histogram = np.zeros(cells * (65536 // INTENSITY_BIN_WIDTH), dtype=np.int64)
+
+    def add(self, chunk):
+        # Accumulate one chunk of point records
+        header = self.header
+        x, y, z = point_coordinates(chunk, header)
+        intensity = chunk["intensity"].astype(np.float64)
+        xmin, ymin = header["bounds"][:2]
+        cols = np.clip(((x - xmin) // self.cell_size).astype(np.int64), 0, self.ncols - 1)
+        rows = np.clip(((y - ymin) // self.cell_size).astype(np.int64), 0, self.nrows - 1)
+        cell = rows * self.ncols + cols
+        cells = self.counts.size
+
+        self.counts += np.bincount(cell, minlength=cells)
+        for axis, values in enumerate((x, y, z, intensity)):
+            np.minimum.at(self.mins[:, axis], cell, values)
+            np.maximum.at(self.maxs[:, axis], cell, values)
+
+        counts, ranges = group_ranges(cell * 256 + point_classification(chunk, header), cells * 256, z, intensity)
+        self.class_counts += counts
+        self.merge_ranges(self.class_ranges, ranges)
+        return_number, _ = point_returns(chunk, header)
+        counts, ranges = group_ranges(cell * 16 + return_number, cells * 16, z, intensity)
+        self.return_counts += counts
+        self.merge_ranges(self.return_ranges, ranges)
+
+        z_bin = np.clip(np.floor(z / Z_BIN_WIDTH).astype(np.int64) - self.z_first_bin, 0, self.z_bins - 1)
+        self.z_histogram += np.bincount(cell * self.z_bins + z_bin, minlength=self.z_histogram.size)
+        intensity_bins = 65536 // INTENSITY_BIN_WIDTH
+        intensity_bin = chunk["intensity"].astype(np.int64) // INTENSITY_BIN_WIDTH
+        self.intensity_histogram += np.bincount(
+            cell * intensity_bins + intensity_bin, minlength=self.intensity_histogram.size
+        )
+
+    @staticmethod
+    def merge_ranges(current, ranges):
+        # Combine (zmin, zmax, imin, imax) rows with those of a new chunk
+        np.minimum(current[0::2], ranges[0::2], out=current[0::2])
+        np.maximum(current[1::2], ranges[1::2], out=current[1::2])
+
+    def chunk_rows(self, tile_id):
+        # Rows of the chunks table for the occupied chunks
+        xmin, ymin, xmax, ymax = self.header["bounds"]
+        rows = []
+        for chunk_id in np.flatnonzero(self.counts):
+            row, col = divmod(int(chunk_id), self.ncols)
+            cell_xmin = xmin + col * self.cell_size
+            cell_ymin = ymin + row * self.cell_size
+            rows.append((
+                tile_id, int(chunk_id), int(self.counts[chunk_id]),
+                *self.mins[chunk_id, :2], *self.maxs[chunk_id, :2],
+                self.mins[chunk_id, 2], self.maxs[chunk_id, 2],
+                int(self.mins[chunk_id, 3]), int(self.maxs[chunk_id, 3]),
+                cell_xmin, cell_ymin,
+                min(cell_xmin + self.cell_size, xmax), min(cell_ymin + self.cell_size, ymax),
+            ))
+        return rows
+
+    @staticmethod
+    def group_rows(tile_id, counts, ranges, groups):
+        # Rows of a class or return count table for the occupied (chunk, group) pairs
+        rows = []
+        for key in np.flatnonzero(counts):
+            chunk_id, group = divmod(int(key), groups)
+            zmin, zmax, imin, imax = ranges[:, key]
+            rows.append((tile_id, chunk_id, group, int(counts[key]), zmin, zmax, int(imin), int(imax)))
+        return rows
+
+    def histogram_rows(self, tile_id):
+        # Rows of the histograms table for the occupied bins
+        rows = []
+        for attribute, histogram, bins, first, width in (
+            ("Z", self.z_histogram, self.z_bins, self.z_first_bin, Z_BIN_WIDTH),
+            ("INTENSITY", self.intensity_histogram, 65536 // INTENSITY_BIN_WIDTH, 0, INTENSITY_BIN_WIDTH),
+        ):
+            for key in np.flatnonzero(histogram):
+                chunk_id, bin_index = divmod(int(key), bins)
+                rows.append((tile_id, chunk_id, attribute, (first + bin_index) * width, int(histogram[key])))
+        return rows
+
+    def write(self, connection):
+        # Replace the catalog rows of this LAS file
+        remove_tile(connection, self.las_path)
+        header = self.header
+        file_size, mtime_ns = (int(value) for value in las_fingerprint(self.las_path))
+        cursor = connection.execute(
+            "INSERT INTO tiles (path, file_size, mtime_ns, point_format, point_count, "
+            "xmin, ymin, xmax, ymax, zmin, zmax) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (os.path.abspath(self.las_path), file_size, mtime_ns, header["point_format"],
+             int(self.counts.sum()), *header["bounds"], *header["z_range"])
+        )
+        tile_id = cursor.lastrowid
+        connection.executemany(f"INSERT INTO chunks VALUES ({', '.join('?' * 15)})", self.chunk_rows(tile_id))
+        connection.executemany(
+            "INSERT INTO class_counts VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            self.group_rows(tile_id, self.class_counts, self.class_ranges, 256)
+        )
+        connection.executemany(
+            "INSERT INTO return_counts VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            self.group_rows(tile_id, self.return_counts, self.return_ranges, 16)
+        )
+        connection.executemany("INSERT INTO histograms VALUES (?, ?, ?, ?, ?)", self.histogram_rows(tile_id))
+        connection.commit()
+
+def remove_tile(connection, las_path):
+    # Delete the catalog rows of a LAS file
+    path = os.path.abspath(las_path)
+    for table in ("chunks", "class_counts", "return_counts", "histograms"):
+        connection.execute(f"DELETE FROM {table} WHERE tile_id IN (SELECT tile_id FROM tiles WHERE path = ?)", (path,))
+    connection.execute("DELETE FROM tiles WHERE path = ?", (path,))
+
+def is_current(connection, las_path):
+    # True when the catalog holds the LAS file as it is on disk
+    row = connection.execute(
+        "SELECT file_size, mtime_ns FROM tiles WHERE path = ?", (os.path.abspath(las_path),)
+    ).fetchone()
+    return row is not None and list(row) == [int(value) for value in las_fingerprint(las_path)]
+
+def summarize_las_file(las_path, chunk_size=CHUNK_SIZE):
+    # Summarize a LAS file in its own read pass
+    header = read_las_header(las_path)
+    points = open_las_points(las_path, header)
+    summary = TileSummary(las_path, header)
+    for start in range(0, len(points), chunk_size):
+        summary.add(points[start:start + chunk_size])
+    return summary
+
+def build_las_catalog(input_las, catalog_path=None, with_indexes=False):
+    # Catalog every changed LAS file in a folder or LAS dataset, optionally building the spatial
+    # indexes in the same read pass; rows of LAS files that no longer exist are removed
+    catalog_path = catalog_path_for(input_las, catalog_path)
+    las_files = list_las_files(input_las)
+    updated = 0
+    with closing(open_catalog(catalog_path)) as connection:
+        for (path,) in connection.execute("SELECT path FROM tiles").fetchall():
+            if not os.path.exists(path):
+                remove_tile(connection, path)
+        connection.commit()
+
+        for las_path in las_files:
+            # Files already catalogued (and indexed, when indexes are wanted) are not read again
+            if is_current(connection, las_path) and (
+                not with_indexes or load_spatial_index(las_path, build_missing=False) is not None
+            ):
+                continue
+            if with_indexes:
+                summary = TileSummary(las_path, read_las_header(las_path))
+                build_spatial_index(las_path, summary=summary)
+            else:
+                summary = summarize_las_file(las_path)
+            summary.write(connection)
+            updated += 1
+    log_message(f"Statistics catalog {catalog_path}: {updated} of {len(las_files)} LAS files summarized")
+    return catalog_path
+
+def extent_filter(extent, prefix="chunks."):
+    # SQL condition and parameters selecting chunks whose point bounds intersect an extent
+    if extent is None:
+        return "1 = 1", []
+    xmin, ymin, xmax, ymax = extent
+    return (
+        f"{prefix}xmax >= ? AND {prefix}xmin <= ? AND {prefix}ymax >= ? AND {prefix}ymin <= ?",
+        [xmin, xmax, ymin, ymax],
+    )
+
+def query_tiles(catalog_path, extent=None, class_codes=None):
+    # (path, matching point count) of the tiles with points of the classes inside an extent
+    condition, parameters = extent_filter(extent)
+    if class_codes:
+        sql = (
+            "SELECT tiles.path, SUM(class_counts.point_count) FROM class_counts "
+            "JOIN chunks USING (tile_id, chunk_id) JOIN tiles USING (tile_id) "
+            f"WHERE {condition} AND class_counts.class_code IN ({', '.join('?' * len(class_codes))}) "
+            "GROUP BY tiles.path ORDER BY tiles.path"
+        )
+        parameters += list(class_codes)
+    else:
+        sql = (
+            "SELECT tiles.path, SUM(chunks.point_count) FROM chunks JOIN tiles USING (tile_id) "
+            f"WHERE {condition} GROUP BY tiles.path ORDER BY tiles.path"
+        )
+    with closing(open_catalog(catalog_path)) as connection:
+        return connection.execute(sql, parameters).fetchall()
+
+def point_density(catalog_path, extent, class_codes=None):
+    # Points per unit area inside an extent, counting each chunk by the share of its cell inside
+    condition, parameters = extent_filter(extent)
+    columns = "chunks.cell_xmin, chunks.cell_ymin, chunks.cell_xmax, chunks.cell_ymax"
+    if class_codes:
+        sql = (
+            f"SELECT {columns}, SUM(class_counts.point_count) FROM class_counts "
+            "JOIN chunks USING (tile_id, chunk_id) "
+            f"WHERE {condition} AND class_counts.class_code IN ({', '.join('?' * len(class_codes))}) "
+            "GROUP BY chunks.tile_id, chunks.chunk_id"
+        )
+        parameters += list(class_codes)
+    else:
+        sql = f"SELECT {columns}, chunks.point_count FROM chunks WHERE {condition}"
+    with closing(open_catalog(catalog_path)) as connection:
+        rows = np.array(connection.execute(sql, parameters).fetchall(), dtype=np.float64).reshape(-1, 5)
+
+    xmin, ymin, xmax, ymax = extent
+    area = (xmax - xmin) * (ymax - ymin)
+    if not rows.size or area <= 0:
+        return 0.0
+    cell_area = (rows[:, 2] - rows[:, 0]) * (rows[:, 3] - rows[:, 1])
+    overlap = (
+        np.clip(np.minimum(rows[:, 2], xmax) - np.maximum(rows[:, 0], xmin), 0, None)
+        * np.clip(np.minimum(rows[:, 3], ymax) - np.maximum(rows[:, 1], ymin), 0, None)
+    )
+    share = np.divide(overlap, cell_area, out=np.ones_like(overlap), where=cell_area > 0)
+    return float((rows[:, 4] * share).sum() / area)
+
+def select_tiles(connection, las_files):
+    # SQL condition limiting chunks to the tiles of the given LAS files, through a temporary table
+    connection.execute("CREATE TEMP TABLE IF NOT EXISTS selected_paths (path TEXT PRIMARY KEY)")
+    connection.execute("DELETE FROM selected_paths")
+    connection.executemany(
+        "INSERT OR IGNORE INTO selected_paths VALUES (?)", [(os.path.abspath(path),) for path in las_files]
+    )
+    return "chunks.tile_id IN (SELECT tile_id FROM tiles JOIN selected_paths USING (path))"
+
+def dataset_statistics(catalog_path, extent=None, las_files=None):
+    # Dataset totals, per-class and per-return rows, and histograms aggregated from the catalog,
+    # limited to the tiles of las_files when given (a catalog can hold tiles of several folders)
+    condition, parameters = extent_filter(extent)
+    with closing(open_catalog(catalog_path)) as connection:
+        if las_files is not None:
+            condition = f"{condition} AND {select_tiles(connection, las_files)}"
+        totals = connection.execute(
+            "SELECT SUM(point_count), MIN(xmin), MIN(ymin), MAX(xmax), MAX(ymax), MIN(zmin), MAX(zmax), "
+            f"MIN(intensity_min), MAX(intensity_max), COUNT(DISTINCT tile_id) FROM chunks WHERE {condition}",
+            parameters
+        ).fetchone()
+        groups = {}
+        for table, column in (("class_counts", "class_code"), ("return_counts", "return_number")):
+            groups[column] = connection.execute(
+                f"SELECT {table}.{column}, SUM({table}.point_count), MIN({table}.zmin), MAX({table}.zmax), "
+                f"MIN({table}.intensity_min), MAX({table}.intensity_max) FROM {table} "
+                f"JOIN chunks USING (tile_id, chunk_id) WHERE {condition} "
+                f"GROUP BY {table}.{column} ORDER BY {table}.{column}",
+                parameters
+            ).fetchall()
+        histograms = {}
+        for attribute in ("Z", "INTENSITY"):
+            histograms[attribute] = connection.execute(
+                "SELECT histograms.bin_start, SUM(histograms.point_count) FROM histograms "
+                f"JOIN chunks USING (tile_id, chunk_id) WHERE histograms.attribute = ? AND {condition} "
+                "GROUP BY histograms.bin_start ORDER BY histograms.bin_start",
+                [attribute] + parameters
+            ).fetchall()
+    return {
+        "point_count": totals[0] or 0,
+        "bounds": totals[1:5],
+        "z_range": totals[5:7],
+        "intensity_range": totals[7:9],
+        "tile_count": totals[9],
+        "classes": groups["class_code"],
+        "returns": groups["return_number"],
+        "histograms": histograms,
+    }
+
+def write_statistics_text(statistics, stats_text):
+    # Write the aggregated statistics as comma-delimited text. This is the catalog's own layout, not
+    # the LasDatasetStatistics report: one Category,Item row per dataset total, class code, return
+    # number, and histogram bin, with no synthetic, withheld, or overlap point counts
+    total = statistics["point_count"]
+    lines = ["Category,Item,Points,Percent,Z_Min,Z_Max,Intensity_Min,Intensity_Max"]
+    zmin, zmax = statistics["z_range"]
+    imin, imax = statistics["intensity_range"]
+    lines.append(f"Dataset,All Points,{total},100.00,{zmin},{zmax},{imin},{imax}")
+    for category, rows in (("ClassCodes", statistics["classes"]), ("Returns", statistics["returns"])):
+        for item, points, zmin, zmax, imin, imax in rows:
+            lines.append(f"{category},{item},{points},{100 * points / total:.2f},{zmin},{zmax},{imin},{imax}")
+    for attribute, rows in statistics["histograms"].items():
+        for bin_start, points in rows:
+            lines.append(f"Histogram_{attribute},{bin_start:g},{points},{100 * points / total:.2f},,,,")
+    with open(stats_text, "w") as stats_file:
+        stats_file.write("\n".join(lines) + "\n")
+    log_message(f"LAS statistics for {total:,} points in {statistics['tile_count']} tiles saved to {stats_text}")
+
+def main():
+    # ArcPy is imported here so catalog queries stay lightweight
+    import arcpy
+    try:
+        # Get parameters from user
+        input_las = arcpy.GetParameterAsText(0)  # Optional, refreshes the catalog for changed LAS files
+        catalog_path = arcpy.GetParameterAsText(1)
+        extent_text = arcpy.GetParameterAsText(2)  # Optional bounding box or polygon
+        class_codes = arcpy.GetParameterAsText(3)  # Optional, e.g. "7;18"
+
+        if input_las:
+            catalog_path = build_las_catalog(input_las, catalog_path)
+
+        extent = parse_extent(extent_text)
+        codes = [int(code) for code in class_codes.split(";") if code.strip()] if class_codes else None
+        tiles = query_tiles(catalog_path, extent, codes)
+        for path, points in tiles:
+            log_message(f"{path}: {points:,} points")
+        log_message(f"{len(tiles)} tiles match")
+        if extent is not None:
+            log_message(f"Point density inside the extent: {point_density(catalog_path, extent, codes):.2f} points per unit area")
+
+        log_message("LAS catalog query complete.")
+
+    except Exception as e:
+        arcpy.AddError(f"Error: {e}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+'''
+LAS Class Store - Classification-Sorted Point Layout
+-----------------------------------------------------
+Script created by Robert Grow 10/2026
+
+Rewrites LAS files so that points are grouped by classification code, with a per-class
+offset table and a precomputed return-type bitmask column. Class and return filters such as
+"3;4;5" and "LAST;FIRST_OF_MANY;...;1..15" then resolve to a few contiguous slices plus one
+vectorized mask instead of a scan over every point.
+'''
+
+import os
+import numpy as np
+from Lidar_Analysis_LAS_Index import (
+    CHUNK_SIZE, read_las_header, open_las_points, select_records, point_coordinates,
+    point_classification, point_returns, build_spatial_index, load_spatial_index, query_point_ranges,
+    write_las_points, parse_area, points_in_polygons, list_las_files, las_fingerprint
+)
+
+STORE_SUFFIX = ".lcls.npz"
+RETURN_MASK_SUFFIX = ".lret.npy"
+
+# Bit positions of the return values accepted by MakeLasDatasetLayer
+RETURN_TYPE_BITS = {str(number): number - 1 for number in range(1, 16)}
+RETURN_TYPE_BITS.update({"LAST": 15, "FIRST_OF_MANY": 16, "LAST_OF_MANY": 17, "SINGLE": 18})
+
+def log_message(message):
+    # Log a message to ArcGIS
+    import arcpy
+    arcpy.AddMessage(message)
+
+def return_type_mask(return_number, number_of_returns):
+    # Bitmask of every return value keyword each point satisfies
+    return_number = return_number.astype(np.uint32)
+    number_of_returns = number_of_returns.astype(np.uint32)
+    mask = np.where(return_number > 0, np.uint32(1) << (return_number - 1), 0).astype(np.uint32)
+    last = return_number == number_of_returns
+    many = number_of_returns > 1
+    mask |= np.where(last, 1 << RETURN_TYPE_BITS["LAST"], 0).astype(np.uint32)
+    mask |= np.where((return_number == 1) & many, 1 << RETURN_TYPE_BITS["FIRST_OF_MANY"], 0).astype(np.uint32)
+    mask |= np.where(last & many, 1 << RETURN_TYPE_BITS["LAST_OF_MANY"], 0).astype(np.uint32)
+    mask |= np.where(number_of_returns == 1, 1 << RETURN_TYPE_BITS["SINGLE"], 0).astype(np.uint32)
+    return mask
+
+def parse_class_codes(point_filters):
+    # Parse a "3;4;5" class code filter
+    return sorted({int(code) for code in point_filters.split(";") if code.strip()})
+
+def parse_return_values(return_values):
+    # Parse a return value filter into the bits a point must match at least one of
+    if not return_values:
+        return None
+    wanted = 0
+    for value in return_values.split(";"):
+        value = value.strip().upper()
+        if value:
+            wanted |= 1 << RETURN_TYPE_BITS[value]
+    return np.uint32(wanted)
+
+def store_path_for(las_path):
+    # Path of the class offset table for a class-sorted LAS file
+    return las_path + STORE_SUFFIX
+
+def is_class_store(input_las):
+    # True when the input is a folder of class-sorted LAS files
+    if not os.path.isdir(input_las):
+        return False
+    las_files = list_las_files(input_las)
+    return bool(las_files) and all(os.path.exists(store_path_for(path)) for path in las_files)
+
+def build_class_store(las_path, out_las, chunk_size=CHUNK_SIZE):
+    # Write a copy of a LAS file with points grouped by class, keeping the spatial order within each class
+    header = read_las_header(las_path)
+    points = open_las_points(las_path, header)
+
+    class_counts = np.zeros(256, dtype=np.int64)
+    for start in range(0, len(points), chunk_size):
+        chunk = points[start:start + chunk_size]
+        class_counts += np.bincount(point_classification(chunk, header), minlength=256)
+    class_offsets = np.concatenate([[0], np.cumsum(class_counts)]).astype(np.int64)
+
+    with open(las_path, "rb") as las_file:
+        header_bytes = las_file.read(header["offset_to_points"])
+    with open(out_las, "wb") as out_file:
+        out_file.write(header_bytes)
+        out_file.truncate(header["offset_to_points"] + len(points) * header["record_length"])
+
+    sorted_points = np.memmap(out_las, dtype=points.dtype, mode="r+",
+                              offset=header["offset_to_points"], shape=(len(points),))
+    return_mask = np.lib.format.open_memmap(out_las + RETURN_MASK_SUFFIX, mode="w+",
+                                            dtype=np.uint32, shape=(len(points),))
+
+    # Scatter each chunk into its class segments; a stable sort keeps the spatial order
+    cursor = class_offsets[:-1].copy()
+    raw_dtype = np.dtype((np.void, header["record_length"]))
+    sorted_raw = sorted_points.view(raw_dtype)
+    for start in range(0, len(points), chunk_size):
+        chunk = points[start:start + chunk_size]
+        classes = point_classification(chunk, header)
+        order = np.argsort(classes, kind="stable")
+        chunk_counts = np.bincount(classes, minlength=256)
+        targets = np.repeat(cursor, chunk_counts) + (
+            np.arange(len(chunk)) - np.repeat(np.cumsum(chunk_counts) - chunk_counts, chunk_counts)
+        )
+        sorted_raw[targets] = chunk.view(raw_dtype)[order]
+        return_mask[targets] = return_type_mask(*point_returns(chunk[order], header))
+        cursor += chunk_counts
+
+    sorted_points.flush()
+    return_mask.flush()
+    del sorted_points, sorted_raw, return_mask
+    np.savez(store_path_for(out_las), class_offsets=class_offsets, fingerprint=las_fingerprint(out_las))
+    build_spatial_index(out_las)
+    log_message(f"Class-sorted point store saved to {out_las}")
+    return out_las
+
+def build_class_stores(input_las, store_folder):
+    # Build class-sorted copies of every LAS file in a folder or LAS dataset
+    os.makedirs(store_folder, exist_ok=True)
+    for las_path in list_las_files(input_las):
+        build_class_store(las_path, os.path.join(store_folder, os.path.basename(las_path)))
+    return store_folder
+
+def load_class_store(las_path):
+    # Load the class offset table and memory-mapped return mask of a class-sorted LAS file
+    with np.load(store_path_for(las_path)) as stored:
+        class_offsets = stored["class_offsets"]
+        fingerprint = stored["fingerprint"]
+    if not np.array_equal(fingerprint, las_fingerprint(las_path)):
+        raise ValueError(f"Class store is out of date, rebuild it: {las_path}")
+    return_mask = np.load(las_path + RETURN_MASK_SUFFIX, mmap_mode="r")
+    return class_offsets, return_mask
+
+def class_slices(class_offsets, class_codes):
+    # Contiguous record ranges holding the requested classes, with neighbouring classes merged
+    slices = []
+    for code in class_codes:
+        start, stop = int(class_offsets[code]), int(class_offsets[code + 1])
+        if start == stop:
+            continue
+        if slices and slices[-1][1] == start:
+            slices[-1] = (slices[-1][0], stop)
+        else:
+            slices.append((start, stop))
+    return slices
+
+def intersect_ranges(first, second):
+    # Intersection of two sorted lists of (start, stop) ranges
+    result = []
+    i = j = 0
+    while i < len(first) and j < len(second):
+        start = max(first[i][0], second[j][0])
+        stop = min(first[i][1], second[j][1])
+        if start < stop:
+            result.append((start, stop))
+        if first[i][1] < second[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+def read_filtered_points(las_path, point_filters, return_values, extent=None, chunk_size=CHUNK_SIZE, polygons=None):
+    # Yield the points of a class-sorted LAS file matching class, return, and optional extent
+    # (and polygon) filters
+    header = read_las_header(las_path)
+    points = open_las_points(las_path, header)
+    class_offsets, return_mask = load_class_store(las_path)
+    wanted = parse_return_values(return_values)
+
+    ranges = class_slices(class_offsets, parse_class_codes(point_filters))
+    if extent is not None:
+        ranges = intersect_ranges(ranges, query_point_ranges(load_spatial_index(las_path), extent))
+
+    for range_start, range_stop in ranges:
+        for start in range(range_start, range_stop, chunk_size):
+            stop = min(start + chunk_size, range_stop)
+            chunk = points[start:stop]
+            keep = np.ones(len(chunk), dtype=bool)
+            if wanted is not None:
+                keep &= (return_mask[start:stop] & wanted) != 0
+            if extent is not None:
+                x, y, _ = point_coordinates(chunk, header)
+                keep &= (x >= extent[0]) & (x <= extent[2]) & (y >= extent[1]) & (y <= extent[3])
+                if polygons is not None and keep.any():
+                    candidates = np.flatnonzero(keep)
+                    keep[candidates] = points_in_polygons(x[candidates], y[candidates], polygons)
+            if keep.all():
+                yield chunk
+            elif keep.any():
+                yield select_records(chunk, keep)
+
+def extract_filtered_las(store_folder, point_filters, return_values, extent_text, out_folder):
+    # Write the filtered points of a class store folder to a LAS dataset
+    extent, polygons = parse_area(extent_text)
+    os.makedirs(out_folder, exist_ok=True)
+    filtered_files = []
+    for las_path in list_las_files(store_folder):
+        out_las = os.path.join(out_folder, os.path.basename(las_path))
+        chunks = read_filtered_points(las_path, point_filters, return_values, extent, polygons=polygons)
+        if write_las_points(las_path, out_las, chunks):
+            filtered_files.append(out_las)
+        else:
+            os.remove(out_las)
+
+    if not filtered_files:
+        raise ValueError(f"No LAS points match class codes {point_filters}")
+
+    import arcpy
+    out_lasd = os.path.join(out_folder, "Filtered_Points.lasd")
+    arcpy.management.CreateLasDataset(filtered_files, out_lasd, "NO_RECURSION", None, None, "COMPUTE_STATS")
+    log_message(f"Points with class codes {point_filters} written to {out_lasd}")
+    return out_lasd
+
+def main():
+    import arcpy
+    try:
+        # Get parameters from user
+        input_las = arcpy.GetParameterAsText(0)
+        store_folder = arcpy.GetParameterAsText(1)
+
+        build_class_stores(input_las, store_folder)
+
+        log_message("Class-sorted point store complete.")
+
+    except Exception as e:
+        arcpy.AddError(f"Error: {e}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,526 @@
+'''
+LAS Spatial Index - Sidecar Grid Index for LAS Files
+-----------------------------------------------------
+Script created by Robert Grow 10/2026
+
+Builds a sidecar grid index for each LAS file once Step 1 has spatially sorted the points
+(REARRANGE_POINTS), so later steps can read only the point records that intersect a
+bounding box or polygon instead of the full dataset.
+'''
+
+import os
+import glob
+import struct
+import numpy as np
+
+INDEX_SUFFIX = ".lidx.npz"
+DEFAULT_GRID_DIM = 64
+CHUNK_SIZE = 2000000
+
+def log_message(message):
+    # Log a message to ArcGIS
+    import arcpy
+    arcpy.AddMessage(message)
+
+def read_las_header(las_path):
+    # Read the fields of the LAS public header block needed for point access
+    with open(las_path, "rb") as las_file:
+        raw = las_file.read(375)
+    if raw[:4] != b"LASF":
+        raise ValueError(f"Not a LAS file: {las_path}")
+
+    version_minor = raw[25]
+    point_format = raw[104] & 0x3F
+    if raw[104] & 0xC0:
+        raise ValueError(f"Compressed LAS is not supported, convert with NO_COMPRESSION: {las_path}")
+
+    header = {
+        "version_minor": version_minor,
+        "header_size": struct.unpack_from("<H", raw, 94)[0],
+        "offset_to_points": struct.unpack_from("<I", raw, 96)[0],
+        "point_format": point_format,
+        "record_length": struct.unpack_from("<H", raw, 105)[0],
+        "point_count": struct.unpack_from("<I", raw, 107)[0],
+        "scale": struct.unpack_from("<3d", raw, 131),
+        "offset": struct.unpack_from("<3d", raw, 155),
+    }
+    max_x, min_x, max_y, min_y, max_z, min_z = struct.unpack_from("<6d", raw, 179)
+    header["bounds"] = (min_x, min_y, max_x, max_y)
+    header["z_range"] = (min_z, max_z)
+
+    # LAS 1.4 stores the full 64-bit point count after the EVLR fields
+    if version_minor >= 4 and len(raw) >= 255:
+        point_count_64 = struct.unpack_from("<Q", raw, 247)[0]
+        if point_count_64:
+            header["point_count"] = point_count_64
+    return header
+
+def read_las_crs(las_path):
+    # Coordinate system stored in the LAS projection records, as WKT or "EPSG:<code>", or None
+    with open(las_path, "rb") as las_file:
+        raw = las_file.read(375)
+        version_minor = raw[25]
+        header_size, offset_to_points, vlr_count = struct.unpack_from("<HII", raw, 94)
+        records = []
+        las_file.seek(header_size)
+        for _ in range(vlr_count):
+            user_id, record_id, length = struct.unpack("<2x16sHH32x", las_file.read(54))
+            records.append((user_id, record_id, las_file.read(length)))
+        if version_minor >= 4:
+            evlr_start, evlr_count = struct.unpack_from("<QI", raw, 235)
+            if evlr_start:
+                las_file.seek(evlr_start)
+                for _ in range(evlr_count):
+                    user_id, record_id, length = struct.unpack("<2x16sHQ32x", las_file.read(60))
+                    records.append((user_id, record_id, las_file.read(length)))
+
+    geo_keys = None
+    for user_id, record_id, data in records:
+        if user_id.rstrip(b"\0") != b"LASF_Projection":
+            continue
+        if record_id == 2112:
+            return data.rstrip(b"\0").decode("ascii", "replace")
+        if record_id == 34735:
+            geo_keys = data
+
+    # GeoTIFF keys: ProjectedCSTypeGeoKey (3072) or GeographicTypeGeoKey (2048)
+    if geo_keys:
+        key_count = struct.unpack_from("<H", geo_keys, 6)[0]
+        keys = {}
+        for number in range(key_count):
+            key_id, location, _, value = struct.unpack_from("<4H", geo_keys, 8 + number * 8)
+            if location == 0:
+                keys[key_id] = value
+        for key_id in (3072, 2048):
+            if keys.get(key_id, 32767) not in (0, 32767):
+                return f"EPSG:{keys[key_id]}"
+    return None
+
+def point_dtype(header):
+    # Structured dtype covering the point record fields used by the analysis scripts
+    class_offset = 16 if header["point_format"] >= 6 else 15
+    return np.dtype({
+        "names": ["X", "Y", "Z", "intensity", "return_byte", "class_byte"],
+        "formats": ["<i4", "<i4", "<i4", "<u2", "u1", "u1"],
+        "offsets": [0, 4, 8, 12, 14, class_offset],
+        "itemsize": header["record_length"],
+    })
+
+def open_las_points(las_path, header=None, mode="r"):
+    # Memory-map the point records of a LAS file as a structured array, read-only unless mode is "r+"
+    if header is None:
+        header = read_las_header(las_path)
+    return np.memmap(
+        las_path,
+        dtype=point_dtype(header),
+        mode=mode,
+        offset=header["offset_to_points"],
+        shape=(header["point_count"],)
+    )
+
+def select_records(points, selector):
+    # Index point records through a raw view so the unmapped record bytes are copied too
+    raw_dtype = np.dtype((np.void, points.dtype.itemsize))
+    return points.view(raw_dtype)[selector].view(points.dtype)
+
+def point_coordinates(points, header):
+    # Scale the integer X/Y/Z records to real-world coordinates
+    scale = header["scale"]
+    offset = header["offset"]
+    x = points["X"] * scale[0] + offset[0]
+    y = points["Y"] * scale[1] + offset[1]
+    z = points["Z"] * scale[2] + offset[2]
+    return x, y, z
+
+def point_classification(points, header):
+    # Classification code of each point
+    if header["point_format"] >= 6:
+        return points["class_byte"]
+    return points["class_byte"] & 0x1F
+
+def point_returns(points, header):
+    # Return number and number of returns of each point
+    if header["point_format"] >= 6:
+        return points["return_byte"] & 0x0F, points["return_byte"] >> 4
+    return points["return_byte"] & 0x07, (points["return_byte"] >> 3) & 0x07
+
+def index_path_for(las_path):
+    # Path of the sidecar index for a LAS file
+    return las_path + INDEX_SUFFIX
+
+def las_fingerprint(las_path):
+    # File size and modification time used to detect a stale sidecar index
+    stat = os.stat(las_path)
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+def cell_ids(x, y, origin, cell_size, ncols, nrows):
+    # Grid cell id of each coordinate, clamped to the grid
+    cols = np.clip(((x - origin[0]) // cell_size).astype(np.int64), 0, ncols - 1)
+    rows = np.clip(((y - origin[1]) // cell_size).astype(np.int64), 0, nrows - 1)
+    return rows * ncols + cols
+
+def build_spatial_index(las_path, cell_size=None, grid_dim=DEFAULT_GRID_DIM, chunk_size=CHUNK_SIZE, summary=None):
+    # Build the grid index of contiguous point-record runs for one LAS file; each chunk read is also
+    # passed to summary.add(chunk) when a statistics catalog summary is given
+    header = read_las_header(las_path)
+    points = open_las_points(las_path, header)
+    min_x, min_y, max_x, max_y = header["bounds"]
+    if cell_size is None:
+        cell_size = max(max_x - min_x, max_y - min_y, 1.0) / grid_dim
+    ncols = max(int(np.ceil((max_x - min_x) / cell_size)), 1)
+    nrows = max(int(np.ceil((max_y - min_y) / cell_size)), 1)
+    origin = (min_x, min_y)
+
+    run_starts = []
+    run_cells = []
+    previous_cell = -1
+    for start in range(0, len(points), chunk_size):
+        chunk = points[start:start + chunk_size]
+        if summary is not None:
+            summary.add(chunk)
+        x, y, _ = point_coordinates(chunk, header)
+        ids = cell_ids(x, y, origin, cell_size, ncols, nrows)
+        changed = np.empty(len(ids), dtype=bool)
+        changed[0] = ids[0] != previous_cell
+        changed[1:] = ids[1:] != ids[:-1]
+        positions = np.flatnonzero(changed)
+        run_starts.append(positions + start)
+        run_cells.append(ids[positions])
+        previous_cell = ids[-1]
+
+    run_start = np.concatenate(run_starts) if run_starts else np.zeros(0, dtype=np.int64)
+    run_cell = np.concatenate(run_cells) if run_cells else np.zeros(0, dtype=np.int64)
+    run_stop = np.append(run_start[1:], len(points))
+
+    # Group runs by cell so a query only touches the cells it intersects
+    order = np.lexsort((run_start, run_cell))
+    run_cell = run_cell[order]
+    index = {
+        "origin": np.array(origin, dtype=np.float64),
+        "cell_size": np.float64(cell_size),
+        "shape": np.array([nrows, ncols], dtype=np.int64),
+        "run_start": run_start[order].astype(np.int64),
+        "run_stop": run_stop[order].astype(np.int64),
+        "cell_offsets": np.searchsorted(run_cell, np.arange(nrows * ncols + 1)).astype(np.int64),
+        "fingerprint": las_fingerprint(las_path),
+    }
+    np.savez(index_path_for(las_path), **index)
+    log_message(f"Spatial index with {len(run_start)} runs saved to {index_path_for(las_path)}")
+    return index
+
+def load_spatial_index(las_path, build_missing=True):
+    # Load the sidecar index for a LAS file, rebuilding it when missing or stale
+    path = index_path_for(las_path)
+    if os.path.exists(path):
+        with np.load(path) as stored:
+            index = {name: stored[name] for name in stored.files}
+        if np.array_equal(index["fingerprint"], las_fingerprint(las_path)):
+            return index
+    if not build_missing:
+        return None
+    return build_spatial_index(las_path)
+
+def query_point_ranges(index, extent):
+    # Merged (start, stop) record ranges of the grid cells intersecting an extent
+    xmin, ymin, xmax, ymax = extent
+    nrows, ncols = (int(value) for value in index["shape"])
+    origin = index["origin"]
+    cell_size = float(index["cell_size"])
+
+    col_lo = max(int((xmin - origin[0]) // cell_size), 0)
+    col_hi = min(int((xmax - origin[0]) // cell_size), ncols - 1)
+    row_lo = max(int((ymin - origin[1]) // cell_size), 0)
+    row_hi = min(int((ymax - origin[1]) // cell_size), nrows - 1)
+    if col_lo > col_hi or row_lo > row_hi:
+        return []
+
+    rows, cols = np.mgrid[row_lo:row_hi + 1, col_lo:col_hi + 1]
+    cells = (rows * ncols + cols).ravel()
+    offsets = index["cell_offsets"]
+    run_ids = np.concatenate([np.arange(offsets[c], offsets[c + 1]) for c in cells])
+    if len(run_ids) == 0:
+        return []
+
+    starts = index["run_start"][run_ids]
+    stops = index["run_stop"][run_ids]
+    order = np.argsort(starts)
+    starts = starts[order]
+    stops = stops[order]
+
+    # Runs that touch each other become a single contiguous read
+    breaks = np.flatnonzero(starts[1:] > np.maximum.accumulate(stops)[:-1]) + 1
+    merged_starts = starts[np.r_[0, breaks]]
+    merged_stops = np.maximum.reduceat(stops, np.r_[0, breaks])
+    return list(zip(merged_starts.tolist(), merged_stops.tolist()))
+
+def read_points_in_extent(las_path, extent, chunk_size=CHUNK_SIZE, polygons=None):
+    # Yield the point records inside an extent, reading only the indexed ranges that intersect it;
+    # with polygons, the extent is the envelope prefilter and points must also fall inside a polygon
+    header = read_las_header(las_path)
+    points = open_las_points(las_path, header)
+    index = load_spatial_index(las_path)
+    xmin, ymin, xmax, ymax = extent
+    for range_start, range_stop in query_point_ranges(index, extent):
+        for start in range(range_start, range_stop, chunk_size):
+            chunk = points[start:min(start + chunk_size, range_stop)]
+            x, y, _ = point_coordinates(chunk, header)
+            inside = (x >= xmin) & (x <= xmax) & (y >= ymin) & (y <= ymax)
+            if polygons is not None and inside.any():
+                candidates = np.flatnonzero(inside)
+                inside[candidates] = points_in_polygons(x[candidates], y[candidates], polygons)
+            if inside.any():
+                yield select_records(chunk, inside)
+
+def allocate_las(out_las, header_bytes, point_count, record_length):
+    # Create a LAS file of header_bytes followed by zeroed room for point_count records, which are then
+    # filled in place through open_las_points(out_las, mode="r+")
+    with open(out_las, "wb") as out_file:
+        out_file.write(header_bytes)
+        out_file.truncate(len(header_bytes) + point_count * record_length)
+
+def summarize_points(chunks, header):
+    # Point count, counts by return number, and coordinate minimums and maximums of point record chunks
+    count = 0
+    by_return = np.zeros(16, dtype=np.int64)
+    mins = np.full(3, np.inf)
+    maxs = np.full(3, -np.inf)
+    for chunk in chunks:
+        if len(chunk) == 0:
+            continue
+        count += len(chunk)
+        return_number, _ = point_returns(chunk, header)
+        by_return += np.bincount(return_number, minlength=16)[:16]
+        for axis, values in enumerate(point_coordinates(chunk, header)):
+            mins[axis] = min(mins[axis], values.min())
+            maxs[axis] = max(maxs[axis], values.max())
+
+    if count == 0:
+        mins[:] = 0.0
+        maxs[:] = 0.0
+    return count, by_return, mins, maxs
+
+def write_point_summary(las_path, header_bytes, header, summary):
+    # Write the point counts and bounds of summarize_points into the public header of a LAS file
+    count, by_return, mins, maxs = summary
+    header_bytes = bytearray(header_bytes)
+    # Legacy counts are only valid for the original point formats
+    legacy = header["point_format"] < 6 and count < 2 ** 32
+    struct.pack_into("<I", header_bytes, 107, count if legacy else 0)
+    struct.pack_into("<5I", header_bytes, 111, *(by_return[1:6] if legacy else [0] * 5))
+    struct.pack_into("<6d", header_bytes, 179, maxs[0], mins[0], maxs[1], mins[1], maxs[2], mins[2])
+    if header["version_minor"] >= 4:
+        struct.pack_into("<Q", header_bytes, 235, 0)  # Extended VLRs are not carried over
+        struct.pack_into("<I", header_bytes, 243, 0)
+        struct.pack_into("<Q", header_bytes, 247, count)
+        struct.pack_into("<15Q", header_bytes, 255, *by_return[1:16])
+    with open(las_path, "r+b") as las_file:
+        las_file.write(header_bytes[:header["header_size"]])
+
+def write_las_points(source_las, out_las, chunks, header_bytes=None):
+    # Write point records from source_las to a new LAS file, updating header counts and bounds.
+    # header_bytes replaces the source header and VLRs, e.g. with a new scale, offset, and CRS.
+    header = read_las_header(source_las)
+    if header_bytes is None:
+        with open(source_las, "rb") as las_file:
+            header_bytes = las_file.read(header["offset_to_points"])
+    else:
+        header = dict(header, scale=struct.unpack_from("<3d", header_bytes, 131),
+                      offset=struct.unpack_from("<3d", header_bytes, 155))
+
+    raw_dtype = np.dtype((np.void, header["record_length"]))
+    with open(out_las, "wb") as out_file:
+        out_file.write(header_bytes)
+
+        def written():
+            for chunk in chunks:
+                chunk.view(raw_dtype).tofile(out_file)
+                yield chunk
+
+        summary = summarize_points(written(), header)
+    write_point_summary(out_las, header_bytes, header, summary)
+    return summary[0]
+
+def sort_las_points(las_path, grid_dim=DEFAULT_GRID_DIM, chunk_size=CHUNK_SIZE):
+    # Rewrite a LAS file with its points ordered by the index grid cell of build_spatial_index,
+    # so each cell becomes one contiguous run when the file was not spatially sorted.
+    # A counting sort in two chunked passes: the first counts the points of each cell, the second
+    # sorts each chunk by cell and places its points after those of the earlier chunks, so memory
+    # stays at one chunk plus the cell counts whatever the size of the file.
+    header = read_las_header(las_path)
+    points = open_las_points(las_path, header)
+    min_x, min_y, max_x, max_y = header["bounds"]
+    cell_size = max(max_x - min_x, max_y - min_y, 1.0) / grid_dim
+    ncols = max(int(np.ceil((max_x - min_x) / cell_size)), 1)
+    nrows = max(int(np.ceil((max_y - min_y) / cell_size)), 1)
+    chunk_starts = range(0, len(points), chunk_size)
+
+    def chunk_ids(start):
+        x, y, _ = point_coordinates(points[start:start + chunk_size], header)
+        return cell_ids(x, y, (min_x, min_y), cell_size, ncols, nrows)
+
+    counts = np.zeros(nrows * ncols, dtype=np.int64)
+    for start in chunk_starts:
+        counts += np.bincount(chunk_ids(start), minlength=nrows * ncols)
+    # Next free record of each cell in the sorted file
+    cursor = np.cumsum(counts) - counts
+
+    with open(las_path, "rb") as las_file:
+        header_bytes = las_file.read(header["offset_to_points"])
+    sorted_las = las_path + ".sorting"
+    allocate_las(sorted_las, header_bytes, len(points), header["record_length"])
+    sorted_points = open_las_points(sorted_las, header, mode="r+")
+    raw_dtype = np.dtype((np.void, header["record_length"]))
+    for start in chunk_starts:
+        ids = chunk_ids(start)
+        order = np.argsort(ids, kind="stable")
+        ids = ids[order]
+        # Rank of each point among the points of its cell in this chunk
+        rank = np.arange(len(ids)) - np.searchsorted(ids, ids)
+        sorted_points.view(raw_dtype)[cursor[ids] + rank] = select_records(
+            points[start:start + chunk_size], order
+        ).view(raw_dtype)
+        cursor += np.bincount(ids, minlength=nrows * ncols)
+    sorted_points.flush()
+
+    # Release the memory maps before the sorted file replaces the original; the points and their
+    # bounds are unchanged, so the original header is kept
+    del points, sorted_points
+    os.replace(sorted_las, las_path)
+    log_message(f"Points of {las_path} sorted into {nrows * ncols} index cells")
+
+def parse_extent(extent_text):
+    # Parse a "xmin ymin xmax ymax" extent string or use the extent of a polygon feature class
+    extent, _ = parse_area(extent_text)
+    return extent
+
+def parse_area(extent_text):
+    # Envelope and polygons (None for a plain extent) of an extent string or polygon feature class
+    if not extent_text:
+        return None, None
+    values = extent_text.replace(",", " ").split()
+    try:
+        float(values[0])
+    except ValueError:
+        return polygon_area(extent_text)
+    try:
+        if len(values) != 4:
+            raise ValueError
+        xmin, ymin, xmax, ymax = (float(value) for value in values)
+    except ValueError:
+        raise ValueError(f'Extent must be four numbers "xmin ymin xmax ymax": {extent_text}') from None
+    if xmin > xmax or ymin > ymax:
+        raise ValueError(f'Extent minimums exceed its maximums ("xmin ymin xmax ymax"): {extent_text}')
+    return (xmin, ymin, xmax, ymax), None
+
+def polygon_area(feature_class):
+    # Envelope and rings of every polygon in a feature class; each polygon is a list of (n, 2) rings
+    import arcpy
+    polygons = []
+    with arcpy.da.SearchCursor(feature_class, ["SHAPE@"]) as cursor:
+        for (shape,) in cursor:
+            if shape is None:
+                continue
+            rings = []
+            for part in shape:
+                ring = []
+                # Interior rings follow their part's exterior ring after a None separator
+                for point in list(part) + [None]:
+                    if point is None:
+                        if len(ring) >= 3:
+                            rings.append(np.array(ring, dtype=np.float64))
+                        ring = []
+                    else:
+                        ring.append((point.X, point.Y))
+            polygons.append(rings)
+    if not polygons:
+        raise ValueError(f"No polygons in {feature_class}")
+    extent = arcpy.Describe(feature_class).extent
+    return (extent.XMin, extent.YMin, extent.XMax, extent.YMax), polygons
+
+def points_in_polygons(x, y, polygons):
+    # Even-odd point-in-polygon test against each polygon's rings (holes excluded), OR-ed over polygons
+    inside = np.zeros(len(x), dtype=bool)
+    for rings in polygons:
+        crossings = np.zeros(len(x), dtype=bool)
+        for ring in rings:
+            ring_box = (x >= ring[:, 0].min()) & (x <= ring[:, 0].max()) & (y >= ring[:, 1].min()) & (y <= ring[:, 1].max())
+            candidates = np.flatnonzero(ring_box)
+            if not candidates.size:
+                continue
+            px, py = x[candidates], y[candidates]
+            odd = np.zeros(len(candidates), dtype=bool)
+            x1, y1 = ring[:, 0], ring[:, 1]
+            x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+            for ax, ay, bx, by in zip(x1, y1, x2, y2):
+                if ay == by:
+                    continue
+                spans = (ay > py) != (by > py)
+                odd ^= spans & (px < (bx - ax) * (py - ay) / (by - ay) + ax)
+            crossings[candidates] ^= odd
+        inside |= crossings
+    return inside
+
+def list_las_files(input_las):
+    # Resolve a LAS file, folder of LAS files, or LAS dataset to its LAS files
+    if input_las.lower().endswith(".las"):
+        return [input_las]
+    if os.path.isdir(input_las):
+        return sorted(glob.glob(os.path.join(input_las, "*.las")))
+    import arcpy
+    children = arcpy.Describe(input_las).children
+    return [child.catalogPath for child in children if child.catalogPath.lower().endswith(".las")]
+
+def build_las_indexes(input_las):
+    # Build sidecar indexes for every LAS file in a folder or LAS dataset
+    las_files = list_las_files(input_las)
+    for las_path in las_files:
+        build_spatial_index(las_path)
+    log_message(f"Spatial indexes built for {len(las_files)} LAS files")
+    return las_files
+
+def extract_las_extent(input_las, extent_text, out_folder, allow_empty=False):
+    # Write the points inside an extent or polygon feature class to a LAS dataset, reading only
+    # the intersecting chunks; with allow_empty an area without points returns None
+    extent, polygons = parse_area(extent_text)
+    os.makedirs(out_folder, exist_ok=True)
+    subset_files = []
+    for las_path in list_las_files(input_las):
+        bounds = read_las_header(las_path)["bounds"]
+        if bounds[0] > extent[2] or bounds[2] < extent[0] or bounds[1] > extent[3] or bounds[3] < extent[1]:
+            continue
+        out_las = os.path.join(out_folder, os.path.basename(las_path))
+        if write_las_points(las_path, out_las, read_points_in_extent(las_path, extent, polygons=polygons)):
+            subset_files.append(out_las)
+        else:
+            os.remove(out_las)
+
+    if not subset_files:
+        if allow_empty:
+            return None
+        raise ValueError(f"No LAS points found inside extent: {extent_text}")
+
+    import arcpy
+    out_lasd = os.path.join(out_folder, "Extent_Subset.lasd")
+    arcpy.management.CreateLasDataset(subset_files, out_lasd, "NO_RECURSION", None, None, "COMPUTE_STATS")
+    log_message(f"{len(subset_files)} LAS files clipped to extent in {out_lasd}")
+    return out_lasd
+
+def main():
+    # ArcPy is imported here so header reads and validation stay lightweight
+    import arcpy
+    try:
+        # Get parameters from user
+        input_las = arcpy.GetParameterAsText(0)
+        cell_size = arcpy.GetParameterAsText(1)
+
+        for las_path in list_las_files(input_las):
+            build_spatial_index(las_path, float(cell_size) if cell_size else None)
+
+        log_message("LAS spatial indexing complete.")
+
+    except Exception as e:
+        arcpy.AddError(f"Error: {e}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+'''
+LAS Reproject - Streaming, Chunk-Parallel Point Reprojection
+------------------------------------------------------------
+Script created by Robert Grow 10/2026
+
+Reprojects LAS points as part of the read pipeline instead of one monolithic ConvertLas call.
+Point chunks are transformed in vectorized batches on a process pool with cached pyproj
+transformers, rescaled to the output scale and offset (with integer arithmetic when only the
+offset changes), and written by the workers straight into the preallocated output file, so only
+point counts cross the process boundary. Finished chunks are yielded in file order from the output
+file, so any streaming grids fed from them fill as the points arrive. Each finished file is then
+sorted by spatial index cell, as ConvertLas REARRANGE_POINTS would, so the sidecar indexes stay compact.
+'''
+
+import os
+import sys
+import struct
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from Lidar_Analysis_LAS_Index import (
+    CHUNK_SIZE, read_las_header, open_las_points, read_las_crs, point_coordinates, point_classification,
+    allocate_las, summarize_points, write_point_summary, sort_las_points, list_las_files
+)
+
+DEFAULT_WORKERS = max((os.cpu_count() or 2) - 1, 1)
+GEOGRAPHIC_SCALE = 1e-7
+PROJECTED_SCALE = 0.001
+# Range of the signed 32-bit X/Y/Z point records
+RECORD_MIN, RECORD_MAX = -2 ** 31, 2 ** 31 - 1
+
+# Transformers per (source, target) CRS, kept for the life of each process
+_TRANSFORMERS = {}
+
+def log_message(message):
+    # Log a message to ArcGIS
+    import arcpy
+    arcpy.AddMessage(message)
+
+def resolve_crs(projection):
+    # CRS text pyproj accepts for a Step 1 projection: "EPSG:<code>", a code, WKT, or an ArcGIS coordinate system
+    projection = projection.strip()
+    if projection.isdigit():
+        return f"EPSG:{projection}"
+    if projection.upper().startswith("EPSG:"):
+        return projection
+    import arcpy
+    spatial_reference = arcpy.SpatialReference()
+    spatial_reference.loadFromString(projection)
+    if spatial_reference.factoryCode:
+        return f"EPSG:{spatial_reference.factoryCode}"
+    return spatial_reference.exportToString()
+
+def same_crs(source_crs, target_crs):
+    # True when two CRS descriptions are the same coordinate system
+    if source_crs == target_crs:
+        return True
+    from pyproj import CRS
+    return CRS.from_user_input(source_crs) == CRS.from_user_input(target_crs)
+
+def transformer_for(source_crs, target_crs):
+    # Cached always-xy transformer between two CRS, or None when no transformation is needed
+    key = (source_crs, target_crs)
+    if key not in _TRANSFORMERS:
+        if same_crs(source_crs, target_crs):
+            _TRANSFORMERS[key] = None
+        else:
+            # pyproj is only needed when points are reprojected
+            from pyproj import Transformer
+            _TRANSFORMERS[key] = Transformer.from_crs(source_crs, target_crs, always_xy=True)
+    return _TRANSFORMERS[key]
+
+def fitting_offset(offset, low, high, scale):
+    # The offset when low to high fits the 32-bit record range from it at the scale, otherwise the
+    # middle of the range, which fits whenever the span does
+    if RECORD_MIN <= (low - offset) / scale and (high - offset) / scale <= RECORD_MAX:
+        return offset
+    if (high - low) / scale > RECORD_MAX - RECORD_MIN:
+        raise ValueError(f"Coordinates {low} to {high} overflow the LAS record range at scale {scale}; "
+                         "use a coarser output scale")
+    return float(np.floor((low + high) / 2))
+
+def output_scale_offset(header, source_crs, target_crs, scale=None):
+    # Output scale and offset of a reprojected LAS file from its bounds in the target CRS; an offset
+    # the rescaled records would overflow from is moved to the middle of the bounds
+    transformer = transformer_for(source_crs, target_crs)
+    xmin, ymin, xmax, ymax = header["bounds"]
+    if transformer is None:
+        out_scale = (scale, scale, header["scale"][2]) if scale else header["scale"]
+        offset = header["offset"]
+    else:
+        from pyproj import CRS
+        xmin, ymin, xmax, ymax = transformer.transform_bounds(xmin, ymin, xmax, ymax, densify_pts=21)
+        if scale is None:
+            geographic = CRS.from_user_input(target_crs).is_geographic
+            scale = GEOGRAPHIC_SCALE if geographic else (
+                header["scale"][0] if not CRS.from_user_input(source_crs).is_geographic else PROJECTED_SCALE
+            )
+        out_scale = (scale, scale, header["scale"][2])
+        offset = (float(np.floor(xmin)), float(np.floor(ymin)), header["offset"][2])
+    # Heights keep their source range; vertical shifts are far smaller than the record range
+    lows, highs = (xmin, ymin, header["z_range"][0]), (xmax, ymax, header["z_range"][1])
+    out_offset = tuple(
+        fitting_offset(offset[axis], lows[axis], highs[axis], out_scale[axis]) for axis in range(3)
+    )
+    return tuple(out_scale), out_offset
+
+def rescale_integers(values, scale, offset, out_scale, out_offset):
+    # Integer record values moved to a new offset, staying in integers when the scale is unchanged
+    # and the offset shift is a whole number of steps
+    steps = (offset - out_offset) / scale
+    if scale == out_scale and steps == round(steps):
+        shifted = values.astype(np.int64) + int(round(steps))
+    else:
+        shifted = np.round((values * scale + (offset - out_offset)) / out_scale)
+    return shifted
+
+def to_records(values, axis_name):
+    # Integer record values checked against the 32-bit range of LAS coordinates
+    if values.size and (values.min() < RECORD_MIN or values.max() > RECORD_MAX):
+        raise ValueError(f"Reprojected {axis_name} values overflow the LAS record range; use a coarser output scale")
+    return values.astype(np.int32)
+
+def transform_records(records, header, transformer, out_scale, out_offset, out=None):
+    # The point records with X/Y/Z transformed and rescaled to the output scale and offset, written
+    # into out (a slice of the output file) or into a copy
+    raw_dtype = np.dtype((np.void, records.dtype.itemsize))
+    if out is None:
+        out = records.view(raw_dtype).copy().view(records.dtype)
+    else:
+        out.view(raw_dtype)[:] = records.view(raw_dtype)
+    if transformer is None:
+        for axis, name in enumerate(("X", "Y", "Z")):
+            out[name] = to_records(rescale_integers(
+                records[name], header["scale"][axis], header["offset"][axis], out_scale[axis], out_offset[axis]
+            ), name)
+        return out
+
+    x, y, z = point_coordinates(records, header)
+    x, y, z = transformer.transform(x, y, z)
+    for axis, (name, values) in enumerate((("X", x), ("Y", y), ("Z", z))):
+        out[name] = to_records(np.round((values - out_offset[axis]) / out_scale[axis]), name)
+    return out
+
+def reproject_range(las_path, out_las, start, stop, source_crs, target_crs, out_scale, out_offset):
+    # Process pool task: transform one record range of a LAS file into its place in the preallocated
+    # output file; only the point count goes back to the parent process
+    header = read_las_header(las_path)
+    records = open_las_points(las_path, header)[start:stop]
+    out_points = open_las_points(out_las, mode="r+")
+    transform_records(
+        records, header, transformer_for(source_crs, target_crs), out_scale, out_offset, out_points[start:stop]
+    )
+    out_points.flush()
+    return stop - start
+
+def reproject_into(las_path, out_las, source_crs, target_crs, out_scale, out_offset, pool=None,
+                   chunk_size=CHUNK_SIZE, prefetch=None):
+    # Transform the point records of a LAS file into out_las (made by allocate_las) chunk by chunk, with
+    # up to `prefetch` chunks transforming ahead on the process pool (in this process without a pool),
+    # and yield each finished chunk in file order as a read-only view of the output file
+    header = read_las_header(las_path)
+    out_points = open_las_points(out_las)
+    ranges = [(start, min(start + chunk_size, header["point_count"]))
+              for start in range(0, header["point_count"], chunk_size)]
+    if pool is None:
+        for start, stop in ranges:
+            reproject_range(las_path, out_las, start, stop, source_crs, target_crs, out_scale, out_offset)
+            yield out_points[start:stop]
+        return
+
+    prefetch = prefetch or DEFAULT_WORKERS * 2
+    pending = []
+    for start, stop in ranges:
+        pending.append((start, stop, pool.submit(
+            reproject_range, las_path, out_las, start, stop, source_crs, target_crs, out_scale, out_offset
+        )))
+        if len(pending) > prefetch:
+            done_start, done_stop, future = pending.pop(0)
+            future.result()
+            yield out_points[done_start:done_stop]
+    for done_start, done_stop, future in pending:
+        future.result()
+        yield out_points[done_start:done_stop]
+
+def read_vlrs(las_path):
+    # Public header bytes and the variable length records as (user id, record id, record bytes)
+    header = read_las_header(las_path)
+    with open(las_path, "rb") as las_file:
+        raw = las_file.read(header["offset_to_points"])
+    vlr_count = struct.unpack_from("<I", raw, 100)[0]
+    records = []
+    position = header["header_size"]
+    for _ in range(vlr_count):
+        user_id, record_id, length = struct.unpack_from("<2x16sHH", raw, position)
+        records.append((user_id.rstrip(b"\0"), record_id, raw[position:position + 54 + length]))
+        position += 54 + length
+    return raw[:header["header_size"]], records
+
+def vlr(user_id, record_id, data, description):
+    # Variable length record bytes
+    return struct.pack(
+        "<H16sHH32s", 0, user_id, record_id, len(data), description.encode("ascii")[:32]
+    ) + data
+
+def projection_vlrs(target_crs, version_minor):
+    # Projection records for the target CRS: OGC WKT for LAS 1.4, GeoTIFF keys for older versions
+    from pyproj import CRS
+    crs = CRS.from_user_input(target_crs)
+    if version_minor >= 4:
+        return [vlr(b"LASF_Projection", 2112, crs.to_wkt("WKT1_GDAL").encode() + b"\0", "OGC WKT")]
+    code = crs.to_epsg()
+    if code is None:
+        raise ValueError(f"LAS 1.{version_minor} output needs a coordinate system with an EPSG code: {target_crs}")
+    # GTModelTypeGeoKey, GTRasterTypeGeoKey, and ProjectedCSTypeGeoKey or GeographicTypeGeoKey
+    keys = [(1024, 0, 1, 2 if crs.is_geographic else 1), (1025, 0, 1, 1),
+            (2048 if crs.is_geographic else 3072, 0, 1, code)]
+    directory = struct.pack("<4H", 1, 1, 0, len(keys)) + b"".join(struct.pack("<4H", *key) for key in keys)
+    return [vlr(b"LASF_Projection", 34735, directory, "GeoTIFF GeoKeyDirectoryTag")]
+
+def reprojected_header(las_path, target_crs, out_scale, out_offset):
+    # Header and VLR bytes of the output file with the new scale, offset, and projection records
+    header = read_las_header(las_path)
+    public_header, records = read_vlrs(las_path)
+    kept = [raw for user_id, _, raw in records if user_id != b"LASF_Projection"]
+    kept += projection_vlrs(target_crs, header["version_minor"])
+    header_bytes = bytearray(public_header)
+    struct.pack_into("<I", header_bytes, 96, len(header_bytes) + sum(len(raw) for raw in kept))
+    struct.pack_into("<I", header_bytes, 100, len(kept))
+    struct.pack_into("<3d", header_bytes, 131, *out_scale)
+    struct.pack_into("<3d", header_bytes, 155, *out_offset)
+    if header["version_minor"] >= 4:
+        # Global encoding bit 4: the CRS is stored as WKT
+        encoding = struct.unpack_from("<H", header_bytes, 6)[0] | 0x10
+        struct.pack_into("<H", header_bytes, 6, encoding)
+    return bytes(header_bytes) + b"".join(kept)
+
+class StreamingGrid:
+    # Point count or maximum elevation grid filled from reprojected chunks as they are produced;
+    # int32 counts or float32 elevations keep a 1 m grid over the whole dataset compact
+
+    def __init__(self, bounds, cell_size, statistic="COUNT", class_codes=None):
+        self.xmin, self.ymin = np.floor(bounds[0] / cell_size) * cell_size, np.floor(bounds[1] / cell_size) * cell_size
+        self.cell_size = cell_size
+        self.ncols = int(np.ceil((bounds[2] - self.xmin) / cell_size)) + 1
+        self.nrows = int(np.ceil((bounds[3] - self.ymin) / cell_size)) + 1
+        self.statistic = statistic.upper()
+        self.class_codes = class_codes
+        if self.statistic == "COUNT":
+            self.values = np.zeros(self.nrows * self.ncols, dtype=np.int32)
+        else:
+            self.values = np.full(self.nrows * self.ncols, -np.inf, dtype=np.float32)
+
+    def add(self, records, header):
+        # Accumulate one chunk of records in the output scale and offset
+        if self.class_codes is not None:
+            records = records[np.isin(point_classification(records, header), self.class_codes)]
+        x, y, z = point_coordinates(records, header)
+        cols = np.clip(((x - self.xmin) // self.cell_size).astype(np.int64), 0, self.ncols - 1)
+        rows = np.clip(((self.ymin + self.nrows * self.cell_size - y) // self.cell_size).astype(np.int64), 0, self.nrows - 1)
+        cells = rows * self.ncols + cols
+        if self.statistic == "COUNT":
+            # Only the cells the chunk touches are updated, not a full-size count array per chunk
+            touched, counts = np.unique(cells, return_counts=True)
+            self.values[touched] += counts.astype(np.int32)
+        else:
+            np.maximum.at(self.values, cells, z.astype(np.float32))
+
+    def save(self, out_raster, spatial_reference):
+        # Save the grid as a raster; cells without points are NoData for MAX_Z
+        import arcpy
+        values = self.values.reshape(self.nrows, self.ncols)
+        if self.statistic == "COUNT":
+            nodata = -1
+        else:
+            values = np.where(np.isinf(values), np.nan, values)
+            nodata = np.nan
+        raster = arcpy.NumPyArrayToRaster(values, arcpy.Point(self.xmin, self.ymin), self.cell_size, self.cell_size, nodata)
+        raster.save(out_raster)
+        arcpy.management.DefineProjection(out_raster, spatial_reference)
+        log_message(f"Streaming {self.statistic} grid saved to {out_raster}")
+
+def reprojected_bounds(las_files, target_crs):
+    # Union of the LAS file bounds in the target CRS
+    bounds = None
+    for las_path in las_files:
+        header = read_las_header(las_path)
+        transformer = transformer_for(read_las_crs(las_path), target_crs)
+        file_bounds = header["bounds"] if transformer is None else transformer.transform_bounds(
+            *header["bounds"], densify_pts=21
+        )
+        bounds = file_bounds if bounds is None else (
+            min(bounds[0], file_bounds[0]), min(bounds[1], file_bounds[1]),
+            max(bounds[2], file_bounds[2]), max(bounds[3], file_bounds[3])
+        )
+    return bounds
+
+def process_pool(workers):
+    # Process pool that also works inside ArcGIS Pro, where sys.executable is ArcGISPro.exe and
+    # not the Python interpreter the worker processes must be started with
+    if sys.platform == "win32" and os.path.basename(sys.executable).lower() not in ("python.exe", "pythonw.exe"):
+        multiprocessing.set_executable(os.path.join(sys.exec_prefix, "python.exe"))
+    return ProcessPoolExecutor(max_workers=workers)
+
+def reproject_las(input_las, out_folder, projection, scale=None, workers=DEFAULT_WORKERS, grids=(), sort=True):
+    # Reproject every LAS file into out_folder, with the workers writing the transformed chunks into the
+    # output files and the grids fed as chunks finish, then sort each file by index cell; returns the
+    # output LAS files
+    target_crs = resolve_crs(projection)
+    os.makedirs(out_folder, exist_ok=True)
+    out_files = []
+    total = 0
+    with process_pool(workers) as pool:
+        for las_path in list_las_files(input_las):
+            source_crs = read_las_crs(las_path)
+            if source_crs is None:
+                raise ValueError(f"LAS file has no coordinate system: {las_path}")
+            header = read_las_header(las_path)
+            out_scale, out_offset = output_scale_offset(header, source_crs, target_crs, scale)
+            header_bytes = reprojected_header(las_path, target_crs, out_scale, out_offset)
+            out_las = os.path.join(out_folder, os.path.basename(las_path))
+            allocate_las(out_las, header_bytes, header["point_count"], header["record_length"])
+            out_header = read_las_header(out_las)
+
+            def chunks():
+                for records in reproject_into(las_path, out_las, source_crs, target_crs, out_scale, out_offset, pool):
+                    for grid in grids:
+                        grid.add(records, out_header)
+                    yield records
+
+            summary = summarize_points(chunks(), out_header)
+            write_point_summary(out_las, header_bytes, out_header, summary)
+            total += summary[0]
+            if sort:
+                sort_las_points(out_las)
+            out_files.append(out_las)
+    log_message(f"{total:,} points in {len(out_files)} LAS files reprojected to {out_folder}")
+    return out_files
+
+def main():
+    # ArcPy is imported here so the point work stays independent of it
+    import arcpy
+    try:
+        # Get parameters
+        input_las = arcpy.GetParameterAsText(0)
+        out_folder = arcpy.GetParameterAsText(1)
+        projection = arcpy.GetParameterAsText(2)
+        scale = arcpy.GetParameterAsText(3)  # Optional output XY scale
+        workers = int(arcpy.GetParameterAsText(4) or DEFAULT_WORKERS)
+
+        out_files = reproject_las(input_las, out_folder, projection, float(scale) if scale else None, workers)
+        out_lasd = os.path.join(out_folder, "Reprojected.lasd")
+        arcpy.management.CreateLasDataset(out_files, out_lasd, "NO_RECURSION", None, None, "COMPUTE_STATS")
+
+        log_message("LAS reprojection complete.")
+
+    except Exception as e:
+        arcpy.AddError(f"Error: {e}")
+        raise
+
+if __name__ == "__main__":
+    main()
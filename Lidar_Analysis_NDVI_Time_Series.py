@@ -0,0 +1,249 @@
+'''
+NDVI Time Series - Multi-Date Index Cube and Per-Pixel Trend Statistics
+-----------------------------------------------------------------------
+Script created by Robert Grow 10/2026
+
+Stacks N dates of 4-band imagery into chunked, memory-mapped (time, y, x) cubes, calculates the
+requested indices for all dates in one vectorized pass per block, and derives per-pixel season
+statistics (maximum and its date, linear trend, mean, and anomaly of the latest date) together
+with per-field mean index values for every date. Dates on other grids are resampled onto a common
+grid as they are read, and each spatial chunk of a cube holds all dates contiguously. Indices use
+the Step 5 formulas and band order, so every date of a cube matches Step 5 for that image.
+'''
+
+import os
+import math
+import json
+import datetime
+import numpy as np
+from Lidar_Analysis_Block_IO import (
+    DEFAULT_BLOCK_SIZE, raster_grid, block_windows, rasterize_zones, accumulate_zones, BlockOutput,
+    BlockScheduler
+)
+from Lidar_Analysis_Grid_Align import target_grid, resolve_method, read_aligned_window
+from Lidar_Analysis_Index_Formulas import BAND_INDEX, BLOCK_INDICES, calculate_indices_block
+
+CUBE_METADATA = "cube.json"
+STATISTICS = ("Max", "Max_Day_Offset", "Trend", "Mean", "Latest_Anomaly")
+
+def log_message(message):
+    # Log a message to ArcGIS
+    import arcpy
+    arcpy.AddMessage(message)
+
+def parse_dates(dates_text):
+    # Parse a "2026-05-01;2026-05-08;..." list of image dates
+    return [datetime.date.fromisoformat(value.strip()) for value in dates_text.split(";") if value.strip()]
+
+def create_cubes(cube_folder, index_names, dates, grid, block_size):
+    # Create one chunked cube per index, plus metadata to reopen them. A cube is stored as
+    # (block row, block col, time, y, x) so every block keeps all dates contiguous on disk;
+    # edge chunks are padded with NaN.
+    os.makedirs(cube_folder, exist_ok=True)
+    shape = (
+        math.ceil(grid["nrows"] / block_size), math.ceil(grid["ncols"] / block_size),
+        len(dates), block_size, block_size
+    )
+    cubes = {}
+    for name in index_names:
+        cubes[name] = np.lib.format.open_memmap(
+            os.path.join(cube_folder, f"{name.upper()}_cube.npy"), mode="w+", dtype=np.float32, shape=shape
+        )
+        cubes[name][:] = np.nan
+    metadata = {
+        "dates": [date.isoformat() for date in dates],
+        "indices": list(index_names),
+        "xmin": grid["xmin"],
+        "ymax": grid["ymax"],
+        "cell_size": grid["cell_size"],
+        "nrows": grid["nrows"],
+        "ncols": grid["ncols"],
+        "block_size": block_size,
+    }
+    with open(os.path.join(cube_folder, CUBE_METADATA), "w") as metadata_file:
+        json.dump(metadata, metadata_file, indent=2)
+    return cubes
+
+def open_cubes(cube_folder):
+    # Reopen the cubes of an earlier run read-only
+    with open(os.path.join(cube_folder, CUBE_METADATA)) as metadata_file:
+        metadata = json.load(metadata_file)
+    cubes = {
+        name: np.load(os.path.join(cube_folder, f"{name.upper()}_cube.npy"), mmap_mode="r")
+        for name in metadata["indices"]
+    }
+    return metadata, cubes
+
+def cube_window(cube, metadata, row, col, rows, cols):
+    # (time, rows, cols) window of a chunked cube, gathered from the chunks it overlaps
+    block = metadata["block_size"]
+    values = np.empty((cube.shape[2], rows, cols), dtype=np.float32)
+    for block_row in range(row // block, (row + rows - 1) // block + 1):
+        for block_col in range(col // block, (col + cols - 1) // block + 1):
+            top, left = max(row, block_row * block), max(col, block_col * block)
+            bottom, right = min(row + rows, (block_row + 1) * block), min(col + cols, (block_col + 1) * block)
+            values[:, top - row:bottom - row, left - col:right - col] = cube[
+                block_row, block_col, :, top - block_row * block:bottom - block_row * block,
+                left - block_col * block:right - block_col * block
+            ]
+    return values
+
+def index_stack(images, index_names):
+    # Indices of a block of every date, each a (time, y, x) stack, from (band, y, x) image blocks
+    stacked = np.stack(images)  # (time, band, y, x)
+    bands = {band: stacked[:, number] for band, number in BAND_INDEX.items()}
+    return calculate_indices_block(bands, index_names)
+
+def trend_statistics(stack, days):
+    # Per-pixel season statistics of a (time, y, x) stack; NaN dates are ignored. The peak is
+    # recorded as its day offset from the first date, since rasters cannot hold dates
+    valid = ~np.isnan(stack)
+    count = valid.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(valid, stack, 0).sum(axis=0) / count
+        days = days.reshape(-1, 1, 1)
+        day_mean = np.where(valid, days, 0).sum(axis=0) / count
+        day_offset = np.where(valid, days - day_mean, 0)
+        value_offset = np.where(valid, stack - mean, 0)
+        trend = (day_offset * value_offset).sum(axis=0) / (day_offset ** 2).sum(axis=0)
+
+    peak = np.where(valid, stack, -np.inf).argmax(axis=0)
+    maximum = np.take_along_axis(stack, peak[np.newaxis], axis=0)[0]
+    max_day = days.ravel()[peak].astype(np.float32)
+    empty = count == 0
+    maximum[empty] = np.nan
+    max_day[empty] = np.nan
+    return {
+        "Max": maximum,
+        "Max_Day_Offset": max_day,
+        "Trend": trend,
+        "Mean": mean,
+        "Latest_Anomaly": stack[-1] - mean,
+    }
+
+def write_zonal_table(sums, counts, zone_names, dates, index_names, output_table):
+    # Write per-field mean index values for every date as a table
+    rows = []
+    for index_number, name in enumerate(index_names):
+        for zone_id, zone_name in sorted(zone_names.items()):
+            for date_number, date in enumerate(dates):
+                count = counts[index_number, zone_id, date_number]
+                if count:
+                    mean = sums[index_number, zone_id, date_number] / count
+                    rows.append((zone_name, date.isoformat(), name.upper(), mean, count))
+    import arcpy
+    table = np.array(rows, dtype=[
+        ("ZONE", "U64"), ("DATE", "U10"), ("INDEX_NAME", "U16"), ("MEAN", "f8"), ("CELL_COUNT", "i8")
+    ])
+    if arcpy.Exists(output_table):
+        arcpy.management.Delete(output_table)
+    arcpy.da.NumPyArrayToTable(table, output_table)
+    log_message(f"Per-field time series table saved to {output_table}")
+
+def build_time_series(images, dates, index_names, workspace, cube_folder,
+                      crop_boundary=None, crop_field=None, block_size=DEFAULT_BLOCK_SIZE):
+    # Build the index cubes, per-pixel statistics, and optional per-field table in one pass
+    import arcpy
+    order = np.argsort(dates)
+    images = [images[i] for i in order]
+    dates = [dates[i] for i in order]
+    days = np.array([(date - dates[0]).days for date in dates], dtype=np.float32)
+
+    # Every date is read on one common grid; dates on other grids are resampled as they are read
+    grid = target_grid(images)
+    sources = [raster_grid(image) for image in images]
+    for image, source in zip(images, sources):
+        method = resolve_method(None, source, grid)
+        if method:
+            log_message(f"{os.path.basename(image)}: {method.lower()} onto the common grid")
+    cubes = create_cubes(cube_folder, index_names, dates, grid, block_size)
+    scratch = arcpy.env.scratchFolder
+    statistics = {
+        (name, statistic): BlockOutput(os.path.join(workspace, f"{name.upper()}_{statistic}"), grid, scratch)
+        for name in index_names
+        for statistic in STATISTICS
+    }
+    log_message(f"Peak days are counted from {dates[0].isoformat()}")
+
+    zone_raster = None
+    if crop_boundary:
+        zone_raster, zone_names = rasterize_zones(crop_boundary, crop_field, images[0], arcpy.env.scratchGDB)
+        if not zone_names:
+            raise ValueError(f"Crop boundary {crop_boundary} has no polygons to summarize.")
+        zone_grid = raster_grid(zone_raster)
+        shape = (len(index_names), max(zone_names) + 1, len(dates))
+        sums = np.zeros(shape)
+        counts = np.zeros(shape, dtype=np.int64)
+
+    def read_block(window):
+        blocks = {
+            "images": [read_aligned_window(image, source, grid, window) for image, source in zip(images, sources)]
+        }
+        if zone_raster:
+            blocks["zones"] = read_aligned_window(zone_raster, zone_grid, grid, window, "NEAREST")
+        return blocks
+
+    scheduler = BlockScheduler(read_block, block_windows(grid["nrows"], grid["ncols"], block_size))
+    try:
+        for window, blocks in scheduler:
+            row, col, rows, cols, _ = window
+            indices = index_stack(blocks["images"], index_names)
+
+            outputs = {}
+            for number, name in enumerate(index_names):
+                cubes[name][row // block_size, col // block_size, :, :rows, :cols] = indices[name]
+                for statistic, values in trend_statistics(indices[name], days).items():
+                    outputs[(name, statistic)] = values
+                if zone_raster:
+                    zones = np.nan_to_num(blocks["zones"], nan=0).astype(np.int64)
+                    accumulate_zones(zones, indices[name], sums[number], counts[number])
+            scheduler.write(statistics, window, outputs)
+    finally:
+        scheduler.close()
+
+    for cube in cubes.values():
+        cube.flush()
+    for output in statistics.values():
+        output.save()
+    if zone_raster:
+        write_zonal_table(sums, counts, zone_names, dates, index_names,
+                          os.path.join(workspace, "Index_Time_Series_Table"))
+    log_message(f"{len(index_names)} index cubes of {len(dates)} dates saved to {cube_folder}")
+
+def main():
+    import arcpy
+    try:
+        # Set overwrite to True
+        arcpy.env.overwriteOutput = True
+
+        # Get parameters
+        images = [image.strip("'") for image in arcpy.GetParameterAsText(0).split(";") if image]
+        dates = parse_dates(arcpy.GetParameterAsText(1))
+        workspace = arcpy.GetParameterAsText(2)
+        cube_folder = arcpy.GetParameterAsText(3)
+        index_text = arcpy.GetParameterAsText(4) or "NDVI"
+        crop_boundary = arcpy.GetParameterAsText(5)
+        crop_field = arcpy.GetParameterAsText(6)
+        block_size = arcpy.GetParameterAsText(7)
+
+        if len(images) != len(dates):
+            raise ValueError(f"{len(images)} images were given with {len(dates)} dates.")
+        index_names = [name.strip().lower() for name in index_text.split(";") if name.strip()]
+        unknown = [name for name in index_names if name not in BLOCK_INDICES]
+        if unknown:
+            raise ValueError(f"Unknown indices: {', '.join(unknown)}")
+
+        arcpy.env.workspace = workspace
+        build_time_series(
+            images, dates, index_names, workspace, cube_folder, crop_boundary, crop_field,
+            int(block_size) if block_size else DEFAULT_BLOCK_SIZE
+        )
+
+        log_message("Index time series complete.")
+
+    except Exception as e:
+        arcpy.AddError(f"Error: {e}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+'''
+Point Thinning - Grid and Z-Tolerance Decimation of Ground Points
+-----------------------------------------------------------------
+Script created by Robert Grow 10/2026
+
+Thins filtered LAS points before DEM triangulation so the Delaunay cost follows the output cell
+size rather than the sensor's point density. Grid decimation keeps the lowest point or the point
+closest to the mean elevation of each cell; z-tolerance thinning fits a plane per cell and keeps
+only the best-fitting point plus the points that depart from the plane by more than the
+tolerance. Points are streamed in chunks, and the effect on the DEM can be measured against the
+unthinned result.
+'''
+
+import os
+import numpy as np
+from Lidar_Analysis_LAS_Index import (
+    CHUNK_SIZE, read_las_header, open_las_points, select_records, point_coordinates,
+    point_classification, point_returns, read_points_in_extent, write_las_points, list_las_files
+)
+from Lidar_Analysis_LAS_Class_Store import (
+    return_type_mask, parse_class_codes, parse_return_values, store_path_for, read_filtered_points
+)
+
+THINNING_METHODS = ("LOWEST", "CLOSEST_TO_MEAN", "Z_TOLERANCE")
+DEFAULT_THINNING_CELL_SIZE = 0.5
+DEFAULT_Z_TOLERANCE = 0.15
+
+def log_message(message):
+    # Log a message to ArcGIS
+    import arcpy
+    arcpy.AddMessage(message)
+
+def filtered_point_chunks(las_path, point_filters, return_values, extent=None, chunk_size=CHUNK_SIZE):
+    # Yield the point records of one LAS file matching the class and return filters,
+    # through the class store slices when the file has one
+    if os.path.exists(store_path_for(las_path)):
+        yield from read_filtered_points(las_path, point_filters, return_values, extent, chunk_size)
+        return
+
+    header = read_las_header(las_path)
+    class_codes = parse_class_codes(point_filters)
+    wanted = parse_return_values(return_values)
+    if extent is not None:
+        chunks = read_points_in_extent(las_path, extent, chunk_size)
+    else:
+        points = open_las_points(las_path, header)
+        chunks = (points[start:start + chunk_size] for start in range(0, len(points), chunk_size))
+    for chunk in chunks:
+        keep = np.isin(point_classification(chunk, header), class_codes)
+        if wanted is not None:
+            keep &= (return_type_mask(*point_returns(chunk, header)) & wanted) != 0
+        if keep.any():
+            yield select_records(chunk, keep)
+
+def cell_layout(header, cell_size):
+    # Thinning grid over the LAS file bounds
+    xmin, ymin, xmax, ymax = header["bounds"]
+    ncols = int(np.floor((xmax - xmin) / cell_size)) + 1
+    nrows = int(np.floor((ymax - ymin) / cell_size)) + 1
+    return xmin, ymin, ncols, nrows
+
+def locate_cells(chunk, header, layout, cell_size):
+    # Cell index of each point and its coordinates relative to the cell center
+    xmin, ymin, ncols, nrows = layout
+    x, y, z = point_coordinates(chunk, header)
+    col = np.clip(((x - xmin) // cell_size).astype(np.int64), 0, ncols - 1)
+    row = np.clip(((y - ymin) // cell_size).astype(np.int64), 0, nrows - 1)
+    dx = x - (xmin + (col + 0.5) * cell_size)
+    dy = y - (ymin + (row + 0.5) * cell_size)
+    return row * ncols + col, dx, dy, z
+
+def fit_cell_surfaces(chunks, header, layout, cell_size, plane):
+    # Per-cell mean elevation, or least-squares plane z = a + b*dx + c*dy, from streamed moments
+    cells = layout[2] * layout[3]
+    names = ("n", "x", "y", "z", "xx", "xy", "yy", "xz", "yz")
+    moments = {name: np.zeros(cells) for name in names}
+    for chunk in chunks:
+        cell, dx, dy, z = locate_cells(chunk, header, layout, cell_size)
+        terms = {"n": None, "x": dx, "y": dy, "z": z, "xx": dx * dx, "xy": dx * dy,
+                 "yy": dy * dy, "xz": dx * z, "yz": dy * z}
+        for name, weights in terms.items():
+            moments[name] += np.bincount(cell, weights=weights, minlength=cells)
+
+    occupied = moments["n"] > 0
+    coefficients = np.zeros((cells, 3))
+    coefficients[occupied, 0] = moments["z"][occupied] / moments["n"][occupied]
+    if plane:
+        m = {name: values[occupied] for name, values in moments.items()}
+        # A small ridge keeps cells with fewer than three points or collinear points solvable
+        ridge = 1e-6 * m["n"] * cell_size ** 2
+        matrices = np.stack([
+            np.stack([m["n"], m["x"], m["y"]], axis=-1),
+            np.stack([m["x"], m["xx"] + ridge, m["xy"]], axis=-1),
+            np.stack([m["y"], m["xy"], m["yy"] + ridge], axis=-1),
+        ], axis=1)
+        targets = np.stack([m["z"], m["xz"], m["yz"]], axis=-1)
+        coefficients[occupied] = np.linalg.solve(matrices, targets[..., np.newaxis])[..., 0]
+    return coefficients
+
+def first_per_cell(cell, score):
+    # Positions of the lowest-scoring point of every cell
+    order = np.lexsort((score, cell))
+    first = np.ones(order.size, dtype=bool)
+    first[1:] = cell[order][1:] != cell[order][:-1]
+    return order[first]
+
+def thin_las_file(las_path, out_las, method, cell_size, z_tolerance, point_filters, return_values, extent=None):
+    # Write the thinned filtered points of one LAS file; returns (input count, kept count)
+    header = read_las_header(las_path)
+    layout = cell_layout(header, cell_size)
+
+    def chunks():
+        return filtered_point_chunks(las_path, point_filters, return_values, extent)
+
+    coefficients = None
+    if method != "LOWEST":
+        coefficients = fit_cell_surfaces(chunks(), header, layout, cell_size, plane=method == "Z_TOLERANCE")
+
+    # Keep each chunk's best point per cell, then reduce the candidates across chunks
+    input_count = 0
+    candidates, candidate_cells, candidate_scores, departures = [], [], [], []
+    for chunk in chunks():
+        input_count += len(chunk)
+        cell, dx, dy, z = locate_cells(chunk, header, layout, cell_size)
+        if coefficients is None:
+            score = z
+        else:
+            a, b, c = coefficients[cell].T
+            score = np.abs(z - (a + b * dx + c * dy))
+        best = first_per_cell(cell, score)
+        candidates.append(select_records(chunk, best))
+        candidate_cells.append(cell[best])
+        candidate_scores.append(score[best])
+        if method == "Z_TOLERANCE":
+            departing = score > z_tolerance
+            departing[best] = False
+            if departing.any():
+                departures.append(select_records(chunk, departing))
+
+    kept = []
+    if candidates:
+        raw_dtype = np.dtype((np.void, header["record_length"]))
+        records = np.concatenate([chunk.view(raw_dtype) for chunk in candidates]).view(candidates[0].dtype)
+        best = first_per_cell(np.concatenate(candidate_cells), np.concatenate(candidate_scores))
+        kept.append(select_records(records, np.sort(best)))
+    kept_count = write_las_points(las_path, out_las, kept + departures)
+    return input_count, kept_count
+
+def thin_las(input_las, out_folder, method="LOWEST", cell_size=DEFAULT_THINNING_CELL_SIZE,
+             z_tolerance=DEFAULT_Z_TOLERANCE, point_filters="2", return_values=None, extent=None):
+    # Thin the filtered points of every LAS file into a new LAS dataset and report the reduction
+    method = method.upper()
+    if method not in THINNING_METHODS:
+        raise ValueError(f"Thinning method must be one of {', '.join(THINNING_METHODS)}")
+    os.makedirs(out_folder, exist_ok=True)
+    thinned_files = []
+    input_total = kept_total = 0
+    for las_path in list_las_files(input_las):
+        out_las = os.path.join(out_folder, os.path.basename(las_path))
+        input_count, kept_count = thin_las_file(
+            las_path, out_las, method, cell_size, z_tolerance, point_filters, return_values, extent
+        )
+        input_total += input_count
+        kept_total += kept_count
+        if kept_count:
+            thinned_files.append(out_las)
+        else:
+            os.remove(out_las)
+
+    if not thinned_files:
+        raise ValueError(f"No LAS points match class codes {point_filters}")
+    log_message(
+        f"{method} thinning at {cell_size}: kept {kept_total:,} of {input_total:,} points "
+        f"(reduction ratio {input_total / kept_total:.1f}:1)"
+    )
+
+    import arcpy
+    out_lasd = os.path.join(out_folder, "Thinned_Points.lasd")
+    arcpy.management.CreateLasDataset(thinned_files, out_lasd, "NO_RECURSION", None, None, "COMPUTE_STATS")
+    return out_lasd
+
+def report_dem_error(thinned_dem, reference_dem):
+    # Compare a DEM from thinned points with the DEM from all points on their common cells
+    from Lidar_Analysis_Block_IO import raster_grid
+    from Lidar_Analysis_Grid_Align import target_grid, read_aligned_window
+    grid = target_grid([reference_dem, thinned_dem])
+    window = (0, 0, grid["nrows"], grid["ncols"], 0)
+    difference = (
+        read_aligned_window(thinned_dem, raster_grid(thinned_dem), grid, window)
+        - read_aligned_window(reference_dem, raster_grid(reference_dem), grid, window)
+    )
+    difference = difference[~np.isnan(difference)]
+    if not difference.size:
+        log_message("No common cells to compare the thinned and unthinned DEMs.")
+        return None
+    error = {
+        "rmse": float(np.sqrt(np.mean(difference ** 2))),
+        "mean": float(difference.mean()),
+        "p95": float(np.percentile(np.abs(difference), 95)),
+        "max": float(np.abs(difference).max()),
+    }
+    log_message(
+        f"DEM error vs unthinned: RMSE {error['rmse']:.3f}, mean {error['mean']:.3f}, "
+        f"95th percentile {error['p95']:.3f}, max {error['max']:.3f}"
+    )
+    return error
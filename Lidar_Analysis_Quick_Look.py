@@ -0,0 +1,387 @@
+'''
+Quick Look - PNG Previews and XYZ Tiles from the Project Layer Files
+--------------------------------------------------------------------
+Script created by Robert Grow 10/2026
+
+Renders the class rasters of the analysis steps without opening ArcGIS Pro. The unique value
+colorizers of the .lyrx files in ArcGIS_Pro_Layerfiles are parsed into RGBA lookup tables, each
+class raster is coloured with a single vectorized take, and quick-look PNGs and Web Mercator XYZ
+tile pyramids are written with a small zlib-based PNG encoder on a thread pool, so previews for
+many farms render in minutes. Rasters are read with GDAL, rasterio, or tifffile and tiles are
+reprojected with pyproj, so rendering runs headless; ArcPy is only used by the tool entry point.
+'''
+
+import os
+import json
+import math
+import struct
+import zlib
+import colorsys
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+LAYERFILE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ArcGIS_Pro_Layerfiles")
+
+# Layer file of each class raster written by the analysis steps
+RASTER_LAYERFILES = {
+    "NDVI_Reclass": "NDVI_Reclass.lyrx",
+    "EVI_Reclass": "EVI_Reclass.lyrx",
+    "Irrigation_Efficiency_Reclass": "Irrigation Reclass.lyrx",
+    "Equipment_Obstacles": "Equipment Obstacles.lyrx",
+    "Steepness_For_Equipment": "Steepness_For_Equipment.lyrx",
+    "Hydro_D8_Flow_Accumulation_Reclass": "D8_Flow_Accumulation_Reclass.lyrx",
+    "Hydro_DINF_Flow_Accumulation_Reclass": "D8_Flow_Accumulation_Reclass.lyrx",
+}
+
+# Lookup table row for NoData and values outside 0-255, always transparent
+NODATA_INDEX = 256
+QUICK_LOOK_SIZE = 2048
+TILE_SIZE = 256
+WEB_MERCATOR = "EPSG:3857"
+WEB_MERCATOR_HALF_WIDTH = 20037508.342789244
+DEFAULT_THREADS = 8
+
+# Raster files a folder workspace may hold the class rasters in
+RASTER_EXTENSIONS = (".tif", ".tiff", ".img")
+
+def log_message(message):
+    # Log a message to ArcGIS, or print it when rendering runs without ArcPy
+    try:
+        import arcpy
+    except ImportError:
+        print(message)
+        return
+    arcpy.AddMessage(message)
+
+def parse_color(color):
+    # RGBA (0-255) of a CIM color; CIM transparency values are 0-100 opacity
+    values = color.get("values", [0, 0, 0, 100])
+    color_type = color.get("type")
+    if color_type == "CIMHSVColor":
+        red, green, blue = colorsys.hsv_to_rgb(values[0] / 360, values[1] / 100, values[2] / 100)
+        rgb = [red * 255, green * 255, blue * 255]
+        alpha = values[3] if len(values) > 3 else 100
+    elif color_type == "CIMCMYKColor":
+        cyan, magenta, yellow, black = (value / 100 for value in values[:4])
+        rgb = [255 * (1 - cyan) * (1 - black), 255 * (1 - magenta) * (1 - black), 255 * (1 - yellow) * (1 - black)]
+        alpha = values[4] if len(values) > 4 else 100
+    elif color_type == "CIMGrayColor":
+        rgb = [values[0]] * 3
+        alpha = values[1] if len(values) > 1 else 100
+    else:
+        rgb = values[:3]
+        alpha = values[3] if len(values) > 3 else 100
+    return [int(round(channel)) for channel in rgb] + [int(round(alpha * 2.55))]
+
+def load_palette(lyrx_path):
+    # RGBA lookup table (257 x 4) and class labels from the unique value colorizer of a layer file
+    with open(lyrx_path, encoding="utf-8") as lyrx_file:
+        document = json.load(lyrx_file)
+    colorizers = [
+        layer["colorizer"] for layer in document.get("layerDefinitions", [])
+        if layer.get("colorizer", {}).get("type") == "CIMRasterUniqueValueColorizer"
+    ]
+    if not colorizers:
+        raise ValueError(f"No raster unique value colorizer in {lyrx_path}")
+
+    lut = np.zeros((NODATA_INDEX + 1, 4), dtype=np.uint8)
+    labels = {}
+    for group in colorizers[0].get("groups", []):
+        for value_class in group.get("classes", []):
+            color = parse_color(value_class.get("color", {}))
+            if value_class.get("visible") is False:
+                color[3] = 0
+            for value in value_class.get("values", []):
+                code = int(float(value))
+                if 0 <= code < NODATA_INDEX:
+                    lut[code] = color
+                    labels[code] = value_class.get("label", str(code))
+    return lut, labels
+
+def layerfile_for(raster_path, layerfile_folder=LAYERFILE_FOLDER):
+    # Layer file for a class raster by its output name, or None
+    name = os.path.splitext(os.path.basename(raster_path))[0]
+    if name in RASTER_LAYERFILES:
+        return os.path.join(layerfile_folder, RASTER_LAYERFILES[name])
+    candidate = os.path.join(layerfile_folder, f"{name}.lyrx")
+    return candidate if os.path.exists(candidate) else None
+
+def class_indices(values):
+    # Lookup table rows of class values, with NoData and out-of-range values on the transparent row
+    valid = ~np.isnan(values) & (values >= 0) & (values < NODATA_INDEX)
+    return np.where(valid, values, NODATA_INDEX).astype(np.uint16)
+
+def apply_palette(indices, lut):
+    # RGBA image of class indices in one vectorized take
+    return np.take(lut, indices, axis=0)
+
+def png_chunk(kind, data):
+    # One length-prefixed, CRC-checked PNG chunk
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+def write_png(path, rgba, level=6):
+    # Write an RGBA image as an 8-bit PNG with no filtering
+    height, width = rgba.shape[:2]
+    scanlines = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    scanlines[:, 1:] = rgba.reshape(height, width * 4)
+    with open(path, "wb") as png_file:
+        png_file.write(b"\x89PNG\r\n\x1a\n")
+        png_file.write(png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)))
+        png_file.write(png_chunk(b"IDAT", zlib.compress(scanlines.tobytes(), level)))
+        png_file.write(png_chunk(b"IEND", b""))
+
+def render_quick_look(indices, lut, out_png, max_size=QUICK_LOOK_SIZE):
+    # PNG of the whole raster, subsampled to at most max_size pixels on the long side
+    step = max(1, math.ceil(max(indices.shape) / max_size))
+    write_png(out_png, apply_palette(indices[::step, ::step], lut))
+    return out_png
+
+def gdal_path(raster_path):
+    # GDAL dataset name of a raster; rasters inside a file geodatabase go through the OpenFileGDB driver
+    workspace, name = os.path.split(raster_path)
+    if workspace.lower().endswith(".gdb"):
+        return f'OpenFileGDB:"{workspace}":{name}'
+    return raster_path
+
+def georeferenced(values, nodata, xmin, ymax, cell_size, crs):
+    # Float32 class values with NoData as NaN, and their grid
+    values = np.asarray(values, dtype=np.float32)
+    if values.ndim > 2:
+        values = values[0]
+    if nodata is not None:
+        values[values == np.float32(nodata)] = np.nan
+    grid = {
+        "xmin": float(xmin),
+        "ymax": float(ymax),
+        "cell_size": float(cell_size),
+        "nrows": values.shape[0],
+        "ncols": values.shape[1],
+        "crs": crs or None,
+    }
+    return values, grid
+
+def read_with_gdal(raster_path):
+    # First band and grid of a raster read with GDAL
+    from osgeo import gdal
+    dataset = gdal.Open(gdal_path(raster_path))
+    if dataset is None:
+        raise ValueError(f"GDAL cannot open {raster_path}")
+    band = dataset.GetRasterBand(1)
+    xmin, cell_size, _, ymax, _, _ = dataset.GetGeoTransform()
+    return georeferenced(band.ReadAsArray(), band.GetNoDataValue(), xmin, ymax, cell_size, dataset.GetProjection())
+
+def read_with_rasterio(raster_path):
+    # First band and grid of a raster read with rasterio
+    import rasterio
+    with rasterio.open(gdal_path(raster_path)) as dataset:
+        transform = dataset.transform
+        crs = dataset.crs.to_wkt() if dataset.crs else None
+        return georeferenced(dataset.read(1), dataset.nodata, transform.c, transform.f, transform.a, crs)
+
+def read_with_tifffile(raster_path):
+    # First band and grid of a GeoTIFF read with tifffile from its GeoTIFF and GDAL_NODATA tags
+    import tifffile
+    with tifffile.TiffFile(raster_path) as tiff:
+        values = tiff.pages[0].asarray()
+        geokeys = tiff.geotiff_metadata or {}
+        nodata_tag = tiff.pages[0].tags.get("GDAL_NODATA")
+    if "ModelPixelScale" not in geokeys or "ModelTiepoint" not in geokeys:
+        raise ValueError(f"{raster_path} has no GeoTIFF georeferencing")
+    scale, tiepoint = geokeys["ModelPixelScale"], geokeys["ModelTiepoint"]
+    code = geokeys.get("ProjectedCSTypeGeoKey") or geokeys.get("GeographicTypeGeoKey")
+    return georeferenced(
+        values, float(nodata_tag.value) if nodata_tag else None,
+        tiepoint[3] - tiepoint[0] * scale[0], tiepoint[4] + tiepoint[1] * scale[1], scale[0],
+        f"EPSG:{int(code)}" if code else None
+    )
+
+# Raster readers in order of preference; a reader whose library is not installed is skipped
+RASTER_READERS = (read_with_gdal, read_with_rasterio, read_with_tifffile)
+
+def read_class_raster(raster_path):
+    # Class values (NoData as NaN) and grid of a raster, read with the first available library
+    for reader in RASTER_READERS:
+        try:
+            return reader(raster_path)
+        except ImportError:
+            continue
+    raise ImportError(f"Reading {raster_path} needs GDAL, rasterio, or tifffile")
+
+def web_mercator_transformer(crs):
+    # Always-xy transformer from a raster's coordinate system to Web Mercator, or None when it is Web Mercator
+    if crs is None:
+        raise ValueError("XYZ tiles need a raster with a coordinate system")
+    if str(crs).upper() == WEB_MERCATOR:
+        return None
+    # pyproj is only needed when tiles are reprojected
+    from pyproj import CRS, Transformer
+    if CRS.from_user_input(crs).to_epsg() == 3857:
+        return None
+    return Transformer.from_crs(crs, WEB_MERCATOR, always_xy=True)
+
+def web_mercator_bounds(grid, transformer=None):
+    # Web Mercator (xmin, ymin, xmax, ymax) of a raster grid
+    xmax = grid["xmin"] + grid["ncols"] * grid["cell_size"]
+    ymin = grid["ymax"] - grid["nrows"] * grid["cell_size"]
+    if transformer is None:
+        return grid["xmin"], ymin, xmax, grid["ymax"]
+    return tuple(transformer.transform_bounds(grid["xmin"], ymin, xmax, grid["ymax"], densify_pts=21))
+
+def zoom_for_cell_size(cell_size):
+    # Smallest zoom whose tile pixels are no larger than the raster cells
+    return max(0, int(math.ceil(math.log2(2 * WEB_MERCATOR_HALF_WIDTH / TILE_SIZE / cell_size))))
+
+def tile_range(bounds, zoom):
+    # Column and row ranges of the XYZ tiles covering Web Mercator (xmin, ymin, xmax, ymax) bounds
+    xmin, ymin, xmax, ymax = bounds
+    span = 2 * WEB_MERCATOR_HALF_WIDTH / 2 ** zoom
+    last = 2 ** zoom - 1
+    first_col = min(max(int((xmin + WEB_MERCATOR_HALF_WIDTH) // span), 0), last)
+    last_col = min(max(int((xmax + WEB_MERCATOR_HALF_WIDTH) // span), 0), last)
+    first_row = min(max(int((WEB_MERCATOR_HALF_WIDTH - ymax) // span), 0), last)
+    last_row = min(max(int((WEB_MERCATOR_HALF_WIDTH - ymin) // span), 0), last)
+    return range(first_col, last_col + 1), range(first_row, last_row + 1)
+
+def padded_cells(grid, x, y):
+    # Columns and rows of map coordinates in the padded class indices; the padding row and column
+    # hold the transparent index for coordinates outside the raster or that failed to project
+    cell = grid["cell_size"]
+    cols = np.nan_to_num(np.floor((x - grid["xmin"]) / cell), nan=-1, posinf=-1, neginf=-1)
+    rows = np.nan_to_num(np.floor((grid["ymax"] - y) / cell), nan=-1, posinf=-1, neginf=-1)
+    cols = np.clip(cols, -1, grid["ncols"]).astype(np.int64) + 1
+    rows = np.clip(rows, -1, grid["nrows"]).astype(np.int64) + 1
+    return cols, rows
+
+def render_tile(padded, grid, lut, zoom, tile_col, tile_row, out_folder, transformer=None):
+    # Write one XYZ tile by nearest sampling of the padded class indices; empty tiles are skipped
+    resolution = 2 * WEB_MERCATOR_HALF_WIDTH / 2 ** zoom / TILE_SIZE
+    pixels = np.arange(TILE_SIZE) + 0.5
+    x = -WEB_MERCATOR_HALF_WIDTH + (tile_col * TILE_SIZE + pixels) * resolution
+    y = WEB_MERCATOR_HALF_WIDTH - (tile_row * TILE_SIZE + pixels) * resolution
+    if transformer is None:
+        cols, rows = padded_cells(grid, x, y)
+        tile = apply_palette(padded[np.ix_(rows, cols)], lut)
+    else:
+        # Tile pixel centres are projected back to the raster's coordinate system
+        source_x, source_y = transformer.transform(*np.meshgrid(x, y), direction="INVERSE")
+        cols, rows = padded_cells(grid, np.asarray(source_x), np.asarray(source_y))
+        tile = apply_palette(padded[rows, cols], lut)
+    if not tile[..., 3].any():
+        return None
+    tile_folder = os.path.join(out_folder, str(zoom), str(tile_col))
+    os.makedirs(tile_folder, exist_ok=True)
+    tile_path = os.path.join(tile_folder, f"{tile_row}.png")
+    write_png(tile_path, tile)
+    return tile_path
+
+def render_tiles(indices, grid, lut, out_folder, min_zoom, max_zoom, pool, transformer=None):
+    # Write the XYZ tile pyramid of a class raster on the thread pool
+    padded = np.pad(indices, 1, constant_values=NODATA_INDEX)
+    bounds = web_mercator_bounds(grid, transformer)
+    futures = []
+    for zoom in range(min_zoom, max_zoom + 1):
+        cols, rows = tile_range(bounds, zoom)
+        futures += [
+            pool.submit(render_tile, padded, grid, lut, zoom, tile_col, tile_row, out_folder, transformer)
+            for tile_col in cols for tile_row in rows
+        ]
+    return sum(future.result() is not None for future in futures)
+
+def render_class_array(values, grid, lut, name, out_folder, pool, tiles=False, min_zoom=None, max_zoom=None):
+    # Quick-look PNG and optional XYZ tiles of class values on a grid, encoded on the thread pool;
+    # returns the PNG path
+    os.makedirs(out_folder, exist_ok=True)
+    indices = class_indices(values)
+    out_png = os.path.join(out_folder, f"{name}.png")
+    quick_look = pool.submit(render_quick_look, indices, lut, out_png)
+
+    if tiles:
+        transformer = web_mercator_transformer(grid["crs"])
+        xmin, _, xmax, _ = web_mercator_bounds(grid, transformer)
+        top = max_zoom if max_zoom is not None else zoom_for_cell_size((xmax - xmin) / grid["ncols"])
+        bottom = min_zoom if min_zoom is not None else max(top - 4, 0)
+        count = render_tiles(
+            indices, grid, lut, os.path.join(out_folder, f"{name}_tiles"), bottom, top, pool, transformer
+        )
+        log_message(f"{count} tiles at zoom {bottom}-{top} written for {name}")
+    quick_look.result()
+    log_message(f"Quick look saved to {out_png}")
+    return out_png
+
+def render_raster(raster_path, out_folder, pool, layerfile_folder=LAYERFILE_FOLDER, tiles=False,
+                  min_zoom=None, max_zoom=None):
+    # Quick-look PNG and optional XYZ tiles of one class raster; returns the PNG path or None
+    layerfile = layerfile_for(raster_path, layerfile_folder)
+    if layerfile is None:
+        log_message(f"No layer file for {raster_path}, skipped")
+        return None
+    lut, _ = load_palette(layerfile)
+    name = os.path.splitext(os.path.basename(raster_path))[0]
+    values, grid = read_class_raster(raster_path)
+    return render_class_array(values, grid, lut, name, out_folder, pool, tiles, min_zoom, max_zoom)
+
+def geodatabase_rasters(workspace):
+    # Names of the rasters in a file geodatabase, listed with GDAL's OpenFileGDB driver
+    from osgeo import gdal
+    dataset = gdal.OpenEx(workspace, gdal.OF_RASTER)
+    if dataset is None:
+        return []
+    return [subdataset.rsplit(":", 1)[-1] for subdataset, _ in dataset.GetSubDatasets()]
+
+def list_class_rasters(inputs):
+    # Class rasters from a ";" list of rasters and workspaces; workspaces contribute the known outputs
+    rasters = []
+    for item in (value.strip().strip("'\"") for value in inputs.split(";")):
+        if not item:
+            continue
+        if item.lower().endswith(".gdb"):
+            names = geodatabase_rasters(item)
+            rasters += [os.path.join(item, name) for name in RASTER_LAYERFILES if name in names]
+        elif os.path.isdir(item):
+            paths = [os.path.join(item, name + ext) for name in RASTER_LAYERFILES for ext in RASTER_EXTENSIONS]
+            rasters += [path for path in paths if os.path.isfile(path)]
+        else:
+            rasters.append(item)
+    return rasters
+
+def render_quick_looks(inputs, out_folder, layerfile_folder=LAYERFILE_FOLDER, tiles=False,
+                       min_zoom=None, max_zoom=None, threads=DEFAULT_THREADS):
+    # Render every class raster, one folder per input workspace name when several are given
+    rasters = list_class_rasters(inputs)
+    written = []
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for raster_path in rasters:
+            parent = os.path.basename(os.path.dirname(raster_path)) or "Quick_Look"
+            raster_folder = os.path.join(out_folder, os.path.splitext(parent)[0])
+            out_png = render_raster(raster_path, raster_folder, pool, layerfile_folder, tiles, min_zoom, max_zoom)
+            if out_png:
+                written.append(out_png)
+    log_message(f"{len(written)} of {len(rasters)} rasters rendered to {out_folder}")
+    return written
+
+def main():
+    # ArcPy is imported here and only used for the tool parameters and messages
+    import arcpy
+    try:
+        # Get parameters
+        inputs = arcpy.GetParameterAsText(0)  # Class rasters or workspaces, separated by ";"
+        out_folder = arcpy.GetParameterAsText(1)
+        layerfile_folder = arcpy.GetParameterAsText(2) or LAYERFILE_FOLDER
+        tiles = arcpy.GetParameterAsText(3).lower() == "true"
+        min_zoom = arcpy.GetParameterAsText(4)
+        max_zoom = arcpy.GetParameterAsText(5)
+        threads = int(arcpy.GetParameterAsText(6) or DEFAULT_THREADS)
+
+        render_quick_looks(
+            inputs, out_folder, layerfile_folder, tiles,
+            int(min_zoom) if min_zoom else None, int(max_zoom) if max_zoom else None, threads
+        )
+
+        log_message("Quick look rendering complete.")
+
+    except Exception as e:
+        arcpy.AddError(f"Error: {e}")
+        raise
+
+if __name__ == "__main__":
+    main()
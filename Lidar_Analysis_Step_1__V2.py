@@ -9,6 +9,10 @@ It handles LAS file conversion, statistics computation, and raster generation.
 
 import os
 import arcpy
+from Lidar_Analysis_LAS_Index import build_las_indexes, extract_las_extent, list_las_files
+from Lidar_Analysis_LAS_Class_Store import build_class_stores
+from Lidar_Analysis_LAS_Catalog import build_las_catalog, dataset_statistics, write_statistics_text
+from Lidar_Analysis_LAS_Reproject import resolve_crs, reprojected_bounds, reproject_las, StreamingGrid
 
 def log_message(message):
     # Log a message to ArcGIS
@@ -29,8 +33,21 @@ def convert_las(input_las, target_folder, output_las, projection):
     )
     log_message(f"LAS files converted and saved to {target_folder}")
 
-def compute_las_statistics(output_las, stats_text):
-    # Compute statistics for the LAS dataset and write them to a text file
+def convert_las_streaming(input_las, target_folder, output_las, projection, workspace):
+    # Reproject the LAS files chunk by chunk on a process pool and build the point count raster
+    # from the same stream of reprojected chunks
+    point_count = StreamingGrid(reprojected_bounds(list_las_files(input_las), resolve_crs(projection)), 1)
+    out_files = reproject_las(input_las, target_folder, projection, grids=[point_count])
+    arcpy.management.CreateLasDataset(out_files, output_las, "NO_RECURSION", None, None, "COMPUTE_STATS")
+    point_count.save(os.path.join(workspace, "LAS_Point_Count"), arcpy.Describe(output_las).spatialReference)
+    log_message(f"LAS files reprojected and saved to {target_folder}")
+
+def compute_las_statistics(output_las, stats_text, catalog_path=None, target_folder=None):
+    # Compute statistics for the LAS dataset and write them to a text file,
+    # aggregated from the statistics catalog over the target folder's tiles when one was built
+    if catalog_path:
+        write_statistics_text(dataset_statistics(catalog_path, las_files=list_las_files(target_folder)), stats_text)
+        return
     arcpy.management.LasDatasetStatistics(
         output_las,
         "OVERWRITE_EXISTING_STATS",
@@ -41,8 +58,8 @@ def compute_las_statistics(output_las, stats_text):
     )
     log_message(f"LAS statistics saved to {stats_text}")
 
-def create_las_rasters(output_las, workspace):
-    # Create raster datasets from the LAS file for various statistics
+def create_las_rasters(output_las, workspace, skip=()):
+    # Create raster datasets from the LAS file for various statistics, except those in skip
     rasters = [
         ("LAS_Pulse_Count", "PULSE_COUNT"),
         ("LAS_Point_Count", "POINT_COUNT"),
@@ -53,6 +70,8 @@ def create_las_rasters(output_las, workspace):
     ]
 
     for raster_name, stat_type in rasters:
+        if raster_name in skip:
+            continue
         out_raster = os.path.join(workspace, raster_name)
         arcpy.management.LasPointStatsAsRaster(
             output_las,
@@ -74,13 +93,36 @@ def main():
         projection = arcpy.GetParameterAsText(3)
         stats_text = arcpy.GetParameterAsText(4)
         workspace = arcpy.GetParameterAsText(5)
+        processing_extent = arcpy.GetParameterAsText(6)  # Optional bounding box or polygon
+        class_store_folder = arcpy.GetParameterAsText(7)  # Optional class-sorted point store
+        catalog_path = arcpy.GetParameterAsText(8)  # Optional SQLite statistics catalog
+        streaming = arcpy.GetParameterAsText(9).lower() == "true"  # Optional streaming reprojection
 
         arcpy.env.workspace = workspace
 
         # Run processing steps
-        convert_las(input_las, target_folder, output_las, projection)
-        compute_las_statistics(output_las, stats_text)
-        create_las_rasters(output_las, workspace)
+        if streaming:
+            convert_las_streaming(input_las, target_folder, output_las, projection, workspace)
+        else:
+            convert_las(input_las, target_folder, output_las, projection)
+        if catalog_path:
+            build_las_catalog(target_folder, catalog_path, with_indexes=True)
+        else:
+            build_las_indexes(target_folder)
+        if class_store_folder:
+            build_class_stores(target_folder, class_store_folder)
+        compute_las_statistics(output_las, stats_text, catalog_path, target_folder)
+
+        # Rasterize only the indexed chunks inside the processing extent when one is given
+        raster_las = output_las
+        if processing_extent:
+            raster_las = extract_las_extent(
+                target_folder, processing_extent, os.path.join(arcpy.env.scratchFolder, "Step_1_Extent")
+            )
+            arcpy.env.extent = processing_extent
+        # The streamed point count raster covers the full dataset
+        skip = ("LAS_Point_Count",) if streaming and not processing_extent else ()
+        create_las_rasters(raster_las, workspace, skip)
 
         log_message("All processing complete.")
 
@@ -6,7 +6,10 @@ Script created by Robert Grow 4/2025
 Automates extraction of vegetation points from a LAS (LiDAR) dataset and generation of a DSM raster using ArcPy.
 '''
 
+import os
 import arcpy
+from Lidar_Analysis_LAS_Index import extract_las_extent
+from Lidar_Analysis_LAS_Class_Store import is_class_store, extract_filtered_las
 
 def log_message(message):
     # Log a message to ArcGIS
@@ -51,11 +54,26 @@ def main():
         input_las = arcpy.GetParameterAsText(0)
         output_veg_las = arcpy.GetParameterAsText(1)
         out_dsm = arcpy.GetParameterAsText(2)
+        processing_extent = arcpy.GetParameterAsText(3)  # Optional bounding box or polygon
 
         # Define filters
         return_values = "LAST;FIRST_OF_MANY;LAST_OF_MANY;SINGLE;1;2;3;4;5;6;7;8;9;10;11;12;13;14;15"
         veg_point_filters = "0;1;3;4;5"
 
+        # Resolve the filters to class slices when the input is a class-sorted point store,
+        # otherwise read only the indexed chunks inside the processing extent when one is given
+        if is_class_store(input_las):
+            input_las = extract_filtered_las(
+                input_las, veg_point_filters, return_values, processing_extent,
+                os.path.join(arcpy.env.scratchFolder, "Step_2_1_Vegetation")
+            )
+        elif processing_extent:
+            input_las = extract_las_extent(
+                input_las, processing_extent, os.path.join(arcpy.env.scratchFolder, "Step_2_1_Extent")
+            )
+        if processing_extent:
+            arcpy.env.extent = processing_extent
+
         # Run variables
         make_vegetation_las_layer(input_las, output_veg_las, veg_point_filters, return_values)
         create_dsm_from_las(output_veg_las, out_dsm)
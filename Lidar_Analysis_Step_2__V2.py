@@ -5,7 +5,22 @@ Script created by Robert Grow 4/2025
 
 Automates the creation of DEM and DSM rasters from LAS (LiDAR) data using ArcPy for ArcGIS Pro.
 '''
+import os
+import time
 import arcpy
+from Lidar_Analysis_LAS_Index import extract_las_extent
+from Lidar_Analysis_LAS_Class_Store import is_class_store, extract_filtered_las
+from Lidar_Analysis_Point_Thinning import (
+    DEFAULT_THINNING_CELL_SIZE, DEFAULT_Z_TOLERANCE, thin_las, report_dem_error
+)
+
+# LAS filters
+GROUND_POINT_FILTERS = "2"
+VEG_POINT_FILTERS = "3;4;5"
+RETURN_VALUES = (
+    "LAST;FIRST_OF_MANY;LAST_OF_MANY;SINGLE;"
+    "1;2;3;4;5;6;7;8;9;10;11;12;13;14;15"
+)
 
 def log_message(message):
     # Log a message to ArcGIS
@@ -55,6 +70,16 @@ def create_raster_from_las(las_layer, out_raster, method):
         )
     log_message(f"{method} created at: {out_raster}")
 
+def create_unthinned_dem(ground_las, ground_point_filters, return_values, scratch):
+    # Reference DEM from all ground points, timed, for measuring the thinning error
+    reference_layer = "Step_2_Unthinned_Ground"
+    reference_dem = os.path.join(scratch, "Step_2_Unthinned_DEM.tif")
+    make_las_dataset_layer(ground_las, reference_layer, ground_point_filters, return_values)
+    started = time.perf_counter()
+    create_raster_from_las(reference_layer, reference_dem, "DEM")
+    log_message(f"Unthinned DEM triangulated in {time.perf_counter() - started:.1f} s")
+    return reference_dem
+
 def main():
     try:
         arcpy.env.overwriteOutput = True
@@ -65,19 +90,55 @@ def main():
         output_veg_las = arcpy.GetParameterAsText(2)
         out_dem = arcpy.GetParameterAsText(3)
         out_dsm = arcpy.GetParameterAsText(4)
+        processing_extent = arcpy.GetParameterAsText(5)  # Optional bounding box or polygon
+        thinning_method = arcpy.GetParameterAsText(6).upper()  # Optional LOWEST, CLOSEST_TO_MEAN, or Z_TOLERANCE
+        thinning_cell_size = float(arcpy.GetParameterAsText(7) or DEFAULT_THINNING_CELL_SIZE)
+        z_tolerance = float(arcpy.GetParameterAsText(8) or DEFAULT_Z_TOLERANCE)
+        report_thinning_error = arcpy.GetParameterAsText(9).lower() == "true"
 
         # Set LAS filters
-        ground_point_filters = "2"
-        veg_point_filters = "3;4;5"
-        return_values = (
-            "LAST;FIRST_OF_MANY;LAST_OF_MANY;SINGLE;"
-            "1;2;3;4;5;6;7;8;9;10;11;12;13;14;15"
-        )
+        ground_point_filters = GROUND_POINT_FILTERS
+        veg_point_filters = VEG_POINT_FILTERS
+        return_values = RETURN_VALUES
+
+        # Resolve the filters to class slices when the input is a class-sorted point store,
+        # otherwise read only the indexed chunks inside the processing extent when one is given
+        ground_las = veg_las = input_las
+        scratch = arcpy.env.scratchFolder
+        if is_class_store(input_las):
+            ground_las = extract_filtered_las(
+                input_las, ground_point_filters, return_values, processing_extent,
+                os.path.join(scratch, "Step_2_Ground")
+            )
+            veg_las = extract_filtered_las(
+                input_las, veg_point_filters, return_values, processing_extent,
+                os.path.join(scratch, "Step_2_Vegetation")
+            )
+        elif processing_extent:
+            ground_las = veg_las = extract_las_extent(
+                input_las, processing_extent, os.path.join(scratch, "Step_2_Extent")
+            )
+        if processing_extent:
+            arcpy.env.extent = processing_extent
+
+        # Thin the ground points before triangulation
+        dem_las = ground_las
+        if thinning_method:
+            dem_las = thin_las(
+                ground_las, os.path.join(scratch, "Step_2_Thinned"), thinning_method,
+                thinning_cell_size, z_tolerance, ground_point_filters, return_values
+            )
 
         # Run the functions
-        make_las_dataset_layer(input_las, output_ground_las, ground_point_filters, return_values)
-        make_las_dataset_layer(input_las, output_veg_las, veg_point_filters, return_values)
+        make_las_dataset_layer(dem_las, output_ground_las, ground_point_filters, return_values)
+        make_las_dataset_layer(veg_las, output_veg_las, veg_point_filters, return_values)
+        started = time.perf_counter()
         create_raster_from_las(output_ground_las, out_dem, "DEM")
+        if thinning_method:
+            log_message(f"Thinned DEM triangulated in {time.perf_counter() - started:.1f} s")
+            if report_thinning_error:
+                reference_dem = create_unthinned_dem(ground_las, ground_point_filters, return_values, scratch)
+                report_dem_error(out_dem, reference_dem)
         create_raster_from_las(output_veg_las, out_dsm, "DSM")
 
         log_message("LiDAR LAS processing complete.")
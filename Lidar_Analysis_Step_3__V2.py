@@ -8,19 +8,145 @@ using ArcPy in ArcGIS Pro.
 '''
 
 import os
-import arcpy
+import numpy as np
+from Lidar_Analysis_Block_IO import raster_grid, read_window
+
+# Height of the shadow surface where nothing casts a shadow (finite, so it can be interpolated)
+NO_SURFACE = -1e30
+
+# Hillshade batches read the whole surface; above this many cells a memory warning is given
+LARGE_SURFACE_CELLS = 100000000
 
 def log_message(message):
     # Log a message to ArcGIS
+    import arcpy
     arcpy.AddMessage(message)
 
 def calculate_hillshade(input_raster, output_path):
     # Calculate hillshade for a raster surface.
+    import arcpy
     arcpy.ddd.HillShade(input_raster, output_path, 315, 45, "NO_SHADOWS", 1)
     log_message(f"Hillshade created: {output_path}")
 
+def parse_angles(angles_text):
+    # Parse a "0;45;90" list of angles in degrees
+    return [float(value) for value in angles_text.replace(",", ";").split(";") if value.strip()]
+
+def surface_normals(z, cell_size):
+    # Unit surface normals (east, north, up) from Horn's 3x3 gradients, shared by every light direction
+    p = np.pad(z, 1, mode="edge")
+    a, b, c = p[:-2, :-2], p[:-2, 1:-1], p[:-2, 2:]
+    d, f = p[1:-1, :-2], p[1:-1, 2:]
+    g, h, i = p[2:, :-2], p[2:, 1:-1], p[2:, 2:]
+    dz_east = ((c + 2 * f + i) - (a + 2 * d + g)) / (8 * cell_size)
+    dz_south = ((g + 2 * h + i) - (a + 2 * b + c)) / (8 * cell_size)
+    length = np.sqrt(dz_east ** 2 + dz_south ** 2 + 1)
+    return np.stack([-dz_east / length, dz_south / length, 1 / length])
+
+def light_vector(azimuth, altitude):
+    # Unit vector toward the light source (east, north, up)
+    azimuth, zenith = np.radians(azimuth), np.radians(90 - altitude)
+    return np.array([np.sin(zenith) * np.sin(azimuth), np.sin(zenith) * np.cos(azimuth), np.cos(zenith)])
+
+def shade(normals, azimuth, altitude):
+    # Lambertian hillshade (0-1) for one light direction
+    return np.clip(np.tensordot(light_vector(azimuth, altitude), normals, axes=1), 0, 1)
+
+def cast_shadows(z, cell_size, azimuth, altitude):
+    # Cells in cast shadow, from one sweep along lines parallel to the light: O(n) per direction.
+    # The grid is transposed and flipped so the light travels along increasing columns; each line
+    # carries the height of the shadow surface, which drops by tan(altitude) per unit distance.
+    # Lines cross each column between rows, so terrain heights are interpolated where a line
+    # crosses and the shadow height where a cell lies between two lines. Against a ray march with
+    # bilinear heights this only differs on cells at the edge of a shadow.
+    travel_col, travel_row = -np.sin(np.radians(azimuth)), np.cos(np.radians(azimuth))
+    transpose = abs(travel_row) > abs(travel_col)
+    a = z.T if transpose else z
+    if transpose:
+        travel_col, travel_row = travel_row, travel_col
+    flip = travel_col < 0
+    if flip:
+        a = a[:, ::-1]
+    rate = travel_row / abs(travel_col)
+    drop = cell_size * np.sqrt(1 + rate ** 2) * np.tan(np.radians(altitude))
+
+    # Terrain with a "no surface" row above and two below, so lines leaving the grid carry nothing
+    nrows, ncols = a.shape
+    padded = np.full((nrows + 3, ncols), NO_SURFACE)
+    padded[1:nrows + 1] = np.where(np.isnan(a), NO_SURFACE, a)
+    positions = np.arange(ncols) * rate
+    bases = np.floor(positions).astype(np.int64)
+    fractions = positions - bases
+
+    # Line k crosses column c at row k + fractions[c]; lines are kept for k = -1 .. nrows
+    first = -bases.max() - 1
+    surface = np.full(nrows + 2 + bases.max() - bases.min(), NO_SURFACE)
+    rows = np.arange(-1, nrows + 1)
+    shadow = np.zeros(a.shape, dtype=bool)
+    for col in range(ncols):
+        fraction = fractions[col]
+        lines = rows - bases[col] - first
+        surface -= drop
+        crossing = surface[lines]
+        # A cell lies between the line above it (weight fraction) and the line through its own row
+        shadow[:, col] = fraction * crossing[:nrows] + (1 - fraction) * crossing[1:nrows + 1] > padded[1:nrows + 1, col]
+        surface[lines] = np.maximum(
+            crossing, (1 - fraction) * padded[rows + 1, col] + fraction * padded[rows + 2, col]
+        )
+    shadow &= ~np.isnan(a)
+
+    if flip:
+        shadow = shadow[:, ::-1]
+    return shadow.T if transpose else shadow
+
+def multidirectional_weights(normals, azimuths):
+    # Oblique weights per azimuth, sin^2 of the angle to the downslope direction (flat cells equally)
+    aspect = np.arctan2(normals[0], normals[1])
+    weights = np.stack([np.sin(aspect - np.radians(azimuth)) ** 2 for azimuth in azimuths])
+    return (weights + 1e-6) / (weights + 1e-6).sum(axis=0)
+
+def save_array(values, grid, output_path):
+    # Save an array on the grid of its source raster
+    import arcpy
+    cell = grid["cell_size"]
+    lower_left = arcpy.Point(grid["xmin"], grid["ymax"] - grid["nrows"] * cell)
+    raster = arcpy.NumPyArrayToRaster(values.astype(np.float32), lower_left, cell, cell, np.nan)
+    raster.save(output_path)
+    arcpy.management.DefineProjection(output_path, grid["spatial_reference"])
+
+def calculate_hillshade_batch(input_raster, workspace, prefix, azimuths, altitudes, shadows=False):
+    # Hillshades for every azimuth/altitude pair and a multidirectional composite per altitude,
+    # all from one set of surface normals, optionally with cast shadows set to 0
+    grid = raster_grid(input_raster)
+    cells = grid["nrows"] * grid["ncols"]
+    if cells > LARGE_SURFACE_CELLS:
+        # The surface, its normals, per-azimuth weights, and one hillshade are held at once
+        import arcpy
+        gigabytes = cells * (4 * 6 + 8 * len(azimuths)) / 1e9
+        arcpy.AddWarning(
+            f"{input_raster} has {cells} cells; the hillshade batch reads it whole and needs about "
+            f"{gigabytes:.1f} GB of memory. Clip it or use fewer azimuths if memory runs short."
+        )
+    z = read_window(input_raster, grid, (0, 0, grid["nrows"], grid["ncols"], 0))
+    normals = surface_normals(z, grid["cell_size"])
+    weights = multidirectional_weights(normals, azimuths)
+    for altitude in altitudes:
+        composite = np.zeros(z.shape, dtype=np.float32)
+        for azimuth, weight in zip(azimuths, weights):
+            hillshade = shade(normals, azimuth, altitude)
+            if shadows:
+                hillshade[cast_shadows(z, grid["cell_size"], azimuth, altitude)] = 0
+            composite += weight * hillshade
+            output_path = os.path.join(workspace, f"{prefix}_Hillshade_{azimuth:g}_{altitude:g}")
+            save_array(np.where(np.isnan(z), np.nan, hillshade * 255), grid, output_path)
+            log_message(f"Hillshade created: {output_path}")
+        output_path = os.path.join(workspace, f"{prefix}_Hillshade_Multidirectional_{altitude:g}")
+        save_array(np.where(np.isnan(z), np.nan, composite * 255), grid, output_path)
+        log_message(f"Multidirectional hillshade created: {output_path}")
+
 def calculate_surface_parameters(input_raster, output_path, parameter_type, z_unit="Meter", slope_type="PERCENT_RISE"):
     # Calculate surface parameters (slope, aspect, curvature, etc.) for a raster.
+    import arcpy
     arcpy.ddd.SurfaceParameters(
         input_raster,
         output_path,
@@ -77,6 +203,7 @@ def process_dem_products(input_raster, workspace, prefix):
     )
 
 def main():
+    import arcpy
     try: 
         # Set overwrite to True
         arcpy.env.overwriteOutput = True
@@ -85,12 +212,22 @@ def main():
         Input_DEM = arcpy.GetParameterAsText(0)
         Input_DSM = arcpy.GetParameterAsText(1)
         Workspace = arcpy.GetParameterAsText(2)
+        Azimuths = arcpy.GetParameterAsText(3)  # Optional, e.g. "0;45;90;135;180;225;270;315"
+        Altitudes = arcpy.GetParameterAsText(4) or "45"
+        Cast_Shadows = arcpy.GetParameterAsText(5).lower() == "true"
         arcpy.env.workspace = Workspace
 
         # Process DEM and DSM products
         process_dem_products(Input_DEM, Workspace, "DEM")
         process_dem_products(Input_DSM, Workspace, "DSM")
 
+        # Multi-azimuth hillshades from shared gradients
+        if Azimuths:
+            for input_raster, prefix in ((Input_DEM, "DEM"), (Input_DSM, "DSM")):
+                calculate_hillshade_batch(
+                    input_raster, Workspace, prefix, parse_angles(Azimuths), parse_angles(Altitudes), Cast_Shadows
+                )
+
         log_message("Terrain analysis product generation complete.")
     
     except Exception as e:
@@ -11,6 +11,9 @@ spatial analysis and decision-making.
 import os
 import arcpy
 from arcpy.sa import *
+from Lidar_Analysis_Block_IO import process_blocks
+from Lidar_Analysis_Grid_Align import target_grid, process_aligned_blocks
+from Lidar_Analysis_Index_Formulas import BAND_INDEX, BLOCK_INDICES, BLOCK_OUTPUTS, calculate_indices_block
 
 def check_out_extensions():
     # Check out required ArcGIS extensions
@@ -53,10 +56,18 @@ def reclassify_evi(evi_raster, output_path):
     arcpy.ddd.Reclassify(evi_raster, "VALUE", reclass_rules, output_path, "NODATA")
     log_message(f"EVI reclassified raster saved to {output_path}")
 
-def compare_evi_ndvi(evi_raster, ndvi_raster, output_path):
+def compare_evi_ndvi(evi_raster, ndvi_raster, output_path, cell_size=None):
     # Calculate and save the difference between EVI and NDVI rasters
-    compare = Raster(evi_raster) - Raster(ndvi_raster)
-    compare.save(output_path)
+    if cell_size:
+        # Resample both inputs once onto a common grid snapped to the EVI raster
+        grid = target_grid([evi_raster, ndvi_raster], cell_size)
+        process_aligned_blocks(
+            {"evi": evi_raster, "ndvi": ndvi_raster}, {"evi_ndvi": output_path},
+            lambda blocks: {"evi_ndvi": blocks["evi"] - blocks["ndvi"]}, grid
+        )
+    else:
+        compare = Raster(evi_raster) - Raster(ndvi_raster)
+        compare.save(output_path)
     log_message(f"EVI-NDVI difference saved to {output_path}")
 
 def calculate_msavi(nir, red, output_path):
@@ -122,6 +133,17 @@ def reclassify_ndvi(ndvi_raster, output_path):
     ndvi_reclass.save(output_path)
     log_message(f"NDVI reclassified for field boundary saved to {output_path}")
 
+def calculate_indices_by_block(bands, ndvi_input, outputs, block_size, cell_size=None):
+    # Calculate all indices block by block, prefetching band reads and writing outputs behind
+    index_outputs = {name: outputs[name] for name in BLOCK_OUTPUTS}
+    inputs = dict(bands, ndvi=ndvi_input)
+    if cell_size:
+        grid = target_grid([bands["nir"], bands["red"], bands["green"], bands["blue"], ndvi_input], cell_size)
+        process_aligned_blocks(inputs, index_outputs, calculate_indices_block, grid, block_size=block_size)
+    else:
+        process_blocks(inputs, index_outputs, calculate_indices_block, template=bands["nir"], block_size=block_size)
+    log_message(f"{len(index_outputs)} indices calculated block by block")
+
 def main():
     check_out_extensions()
     try:
@@ -132,6 +154,8 @@ def main():
         band_4 = arcpy.GetParameterAsText(3)  # NIR
         ndvi_input = arcpy.GetParameterAsText(4)
         workspace = arcpy.GetParameterAsText(5)
+        block_size = arcpy.GetParameterAsText(6)  # Optional block size for block processing
+        cell_size = arcpy.GetParameterAsText(7)  # Optional alignment cell size (number, MINOF, MAXOF, or raster)
 
         if not all([band_1, band_2, band_3, band_4, ndvi_input, workspace]):
             raise ValueError("All input parameters must be provided.")
@@ -155,6 +179,14 @@ def main():
             "ndvi_field": os.path.join(workspace, "NDVI_Field_Boundary"),
         }
 
+        if block_size:
+            band_inputs = [band_1, band_2, band_3, band_4]
+            bands = {band: band_inputs[number] for band, number in BAND_INDEX.items()}
+            calculate_indices_by_block(bands, ndvi_input, outputs, int(block_size), cell_size)
+            reclassify_evi(outputs["evi"], outputs["evi_reclass"])
+            reclassify_ndvi(ndvi_input, outputs["ndvi_field"])
+            return
+
         # Normalize bands
         nir = normalize_band(band_4)
         red = normalize_band(band_1)
@@ -164,7 +196,7 @@ def main():
         # Calculate indices and outputs
         calculate_evi(nir, red, blue, outputs["evi"])
         reclassify_evi(outputs["evi"], outputs["evi_reclass"])
-        compare_evi_ndvi(outputs["evi"], ndvi_input, outputs["evi_ndvi"])
+        compare_evi_ndvi(outputs["evi"], ndvi_input, outputs["evi_ndvi"], cell_size)
         calculate_msavi(nir, red, outputs["msavi"])
         calculate_msavi2(nir, red, outputs["msavi2"])
         calculate_clg(nir, green, outputs["clg"])
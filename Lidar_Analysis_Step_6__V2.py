@@ -11,6 +11,7 @@ Intended for agricultural/forestry spatial analysis in ArcGIS.
 import os
 import arcpy
 from arcpy.sa import *
+from Lidar_Analysis_Grid_Align import target_grid, process_aligned_blocks
 
 def log_message(message):
     # Log a message to ArcGIS
@@ -93,13 +94,23 @@ def create_obstacles_layer(canopy_height_raster, output_path):
     log_message(f"Obstacles raster saved to {output_path}")
     return output_path
 
-def calculate_irrigation_efficiency(ndvi_input, slope_raster, canopy_height_raster, output_path):
+def calculate_irrigation_efficiency(ndvi_input, slope_raster, canopy_height_raster, output_path, cell_size=None):
     # Calculate irrigation efficiency raster
-    ndvi = Raster(ndvi_input)
-    slopes = Float(Raster(slope_raster))
-    canopy = Float(Raster(canopy_height_raster))
-    irrigation_efficiency = ndvi * (1 - slopes / 100) * canopy
-    irrigation_efficiency.save(output_path)
+    if cell_size:
+        # Resample imagery and LiDAR inputs once onto a common grid snapped to the canopy height raster
+        grid = target_grid([canopy_height_raster, slope_raster, ndvi_input], cell_size)
+        process_aligned_blocks(
+            {"ndvi": ndvi_input, "slope": slope_raster, "canopy": canopy_height_raster},
+            {"irrigation_efficiency": output_path},
+            lambda blocks: {"irrigation_efficiency": blocks["ndvi"] * (1 - blocks["slope"] / 100) * blocks["canopy"]},
+            grid
+        )
+    else:
+        ndvi = Raster(ndvi_input)
+        slopes = Float(Raster(slope_raster))
+        canopy = Float(Raster(canopy_height_raster))
+        irrigation_efficiency = ndvi * (1 - slopes / 100) * canopy
+        irrigation_efficiency.save(output_path)
     log_message(f"Irrigation efficiency raster saved to {output_path}")
     return output_path
 
@@ -164,6 +175,7 @@ def main():
         workspace = arcpy.GetParameterAsText(3)
         ndvi_input = arcpy.GetParameterAsText(4)
         ndvi_field_boundary = arcpy.GetParameterAsText(5)
+        cell_size = arcpy.GetParameterAsText(6)  # Optional alignment cell size (number, MINOF, MAXOF, or raster)
 
         # Validate inputs
         validate_inputs(dsm_input, dem_input, slope_raster, ndvi_input, ndvi_field_boundary)
@@ -186,7 +198,7 @@ def main():
         canopy_height_reclass = reclassify_canopy_height(canopy_height, reclass_canopy_height)
         cover_pct = calculate_canopy_cover(canopy_height, 3, canopy_cover)
         obstacles = create_obstacles_layer(canopy_height, obstacles_reclass_path)
-        irrigation_eff = calculate_irrigation_efficiency(ndvi_input, slope_raster, canopy_height, irrigation_efficiency_path)
+        irrigation_eff = calculate_irrigation_efficiency(ndvi_input, slope_raster, canopy_height, irrigation_efficiency_path, cell_size)
         irrigation_eff_reclass = reclassify_irrigation_efficiency(irrigation_eff, irrigation_eff_reclass_path)
         canopy_polygon = convert_canopy_cover_to_polygon(canopy_cover, canopy_cover_polygon_path)
         ndvi_excl_trees = extract_ndvi_excluding_trees(ndvi_field_boundary, canopy_polygon, ndvi_excl_trees_path)
@@ -9,15 +9,27 @@ It leverages the ArcPy and Spatial Analyst extension for raster processing.
 '''
 
 import os
-import arcpy
-from arcpy.sa import *
+import numpy as np
+from Lidar_Analysis_Block_IO import (
+    DEFAULT_BLOCK_SIZE, raster_grid, block_windows, rasterize_zones, accumulate_zones, BlockOutput, BlockScheduler
+)
+from Lidar_Analysis_Grid_Align import target_grid, read_aligned_window
+
+SWEEP_INPUTS = ("slope", "flow", "curvature")
+NORMALIZATIONS = ("MINMAX", "ZSCORE", "PERCENTILE")
+PERCENTILE_SAMPLE_SIZE = 1000000
+
+# Memory for the scores of one block; weight sets are scored in slices that fit in it
+SCORE_BUDGET_BYTES = 64 * 1024 * 1024
 
 def log_message(message):
     # Log a message to ArcGIS
+    import arcpy
     arcpy.AddMessage(message)
 
 def check_out_extensions():
     # Check out required ArcGIS extensions
+    import arcpy
     try:
         arcpy.CheckOutExtension("Spatial")
         log_message("Spatial Analyst extension checked out successfully.")
@@ -27,6 +39,7 @@ def check_out_extensions():
 
 def check_in_extensions():
     # Check in ArcGIS extensions
+    import arcpy
     arcpy.CheckInExtension("Spatial")
     log_message("Spatial Analyst extension checked in.")
 
@@ -37,6 +50,7 @@ def calculate_soil_composition(slope_raster, flow_accum, curvature_raster, outpu
     - Flow Accumulation (30%)
     - Curvature (30%)
     """
+    from arcpy.sa import Float, Raster
     slope = Float(Raster(slope_raster))
     flow = Float(Raster(flow_accum))
     curv = Float(Raster(curvature_raster))
@@ -45,7 +59,200 @@ def calculate_soil_composition(slope_raster, flow_accum, curvature_raster, outpu
     log_message(f"Soil composition raster saved to: {output_path}")
     return soil_comp
 
+def parse_weight_sets(weights_text):
+    # Weight vectors from "0.4 0.3 0.3;0.6 0.2 0.2", or every vector summing to 1 for one step such as "0.1"
+    sets = [value.replace(",", " ").split() for value in weights_text.split(";") if value.strip()]
+    if len(sets) == 1 and len(sets[0]) == 1:
+        step = float(sets[0][0])
+        steps = int(round(1 / step)) if 0 < step <= 1 else 0
+        if not steps or abs(steps * step - 1) > 1e-6:
+            raise ValueError(f"A weight step must divide 1 evenly (e.g. 0.1, 0.25, 0.5); got {step}.")
+        return np.array([
+            (a, b, steps - a - b) for a in range(steps + 1) for b in range(steps + 1 - a)
+        ], dtype=np.float32) / steps
+    if any(len(values) != len(SWEEP_INPUTS) for values in sets):
+        raise ValueError("Each weight set needs a slope, flow accumulation, and curvature weight.")
+    return np.array(sets, dtype=np.float32)
+
+class NormalizationStatistics:
+    # Streaming minimum, maximum, mean, variance, and value sample of one input raster
+
+    def __init__(self, sample_rate, seed):
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.sample_rate = sample_rate
+        self.rng = np.random.default_rng(seed)
+        self.samples = []
+
+    def update(self, values):
+        # Merge one block into the running statistics (Chan's parallel variance update)
+        values = values[~np.isnan(values)].astype(np.float64)
+        if not values.size:
+            return
+        self.minimum = min(self.minimum, values.min())
+        self.maximum = max(self.maximum, values.max())
+        count, mean = values.size, values.mean()
+        m2 = ((values - mean) ** 2).sum()
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+        self.samples.append(values[self.rng.random(count) < self.sample_rate])
+
+    def finish(self):
+        # Sort the value sample used for percentile ranks
+        self.samples = np.sort(np.concatenate(self.samples)) if self.samples else np.empty(0)
+        self.std = np.sqrt(self.m2 / self.count) if self.count else 0.0
+
+    def normalize(self, values, method):
+        # Scale a block of values with the dataset-wide statistics
+        if method == "MINMAX":
+            # An input without values has infinite bounds, so it is treated like a constant one
+            span = self.maximum - self.minimum if self.count else 0
+            result = (values - self.minimum) / span if span else np.zeros_like(values)
+        elif method == "ZSCORE":
+            result = (values - self.mean) / self.std if self.std else np.zeros_like(values)
+        elif len(self.samples) and self.samples[-1] > self.samples[0]:
+            # Ties take the middle of their rank range so constant areas do not skew low
+            left = np.searchsorted(self.samples, values, side="left")
+            right = np.searchsorted(self.samples, values, side="right")
+            result = (left + right) / (2.0 * len(self.samples))
+        else:
+            # An empty or constant sample has no ranks to spread the values over
+            result = np.zeros_like(values)
+        return np.where(np.isnan(values), np.nan, result).astype(np.float32)
+
+def read_aligned_block(rasters, sources, grid, window):
+    # Read a window of every input on the sweep grid; inputs on other grids are resampled, and
+    # zones (integer ids) are taken from the nearest cell
+    return {
+        name: read_aligned_window(path, sources[name], grid, window, "NEAREST" if name == "zones" else "AUTO")
+        for name, path in rasters.items()
+    }
+
+def collect_normalization_statistics(rasters, sources, grid, block_size):
+    # One streaming reduction pass over the inputs
+    inputs = {name: rasters[name] for name in SWEEP_INPUTS}
+
+    def read_block(window):
+        return read_aligned_block(inputs, sources, grid, window)
+
+    sample_rate = min(1.0, PERCENTILE_SAMPLE_SIZE / float(grid["nrows"] * grid["ncols"]))
+    statistics = {name: NormalizationStatistics(sample_rate, seed) for seed, name in enumerate(SWEEP_INPUTS)}
+    scheduler = BlockScheduler(read_block, block_windows(grid["nrows"], grid["ncols"], block_size))
+    try:
+        for _, inputs in scheduler:
+            for name in SWEEP_INPUTS:
+                statistics[name].update(inputs[name])
+    finally:
+        scheduler.close()
+    for name, values in statistics.items():
+        values.finish()
+        log_message(
+            f"{name}: min {values.minimum:.4g}, max {values.maximum:.4g}, "
+            f"mean {values.mean:.4g}, std {values.std:.4g}"
+        )
+    return statistics
+
+def evaluate_weight_sets(normalized, weights):
+    # Score every weight set for one block as a single (cells x inputs) @ (inputs x sets) product
+    rows, cols = normalized[0].shape
+    cells = np.stack([values.ravel() for values in normalized], axis=1)
+    return (cells @ weights.T).T.reshape(len(weights), rows, cols)
+
+def weight_slices(set_count, cells, budget=SCORE_BUDGET_BYTES):
+    # Slices of the weight sets whose float32 scores for a block of `cells` cells fit in the budget
+    per_slice = max(1, int(budget // (cells * 4)))
+    return [slice(start, min(start + per_slice, set_count)) for start in range(0, set_count, per_slice)]
+
+def write_weight_table(weights, zone_rows, output_table):
+    # Save the weight sets, with per-field summaries when supplied, as a table
+    import arcpy
+    if zone_rows is None:
+        zone_rows = [("", number, 0.0, 0.0, 0) for number in range(len(weights))]
+    table = np.array([
+        (zone, number + 1, *weights[number], mean, std, count) for zone, number, mean, std, count in zone_rows
+    ], dtype=[
+        ("ZONE", "U64"), ("CANDIDATE", "i4"), ("W_SLOPE", "f8"), ("W_FLOW", "f8"), ("W_CURVATURE", "f8"),
+        ("MEAN", "f8"), ("STD", "f8"), ("CELL_COUNT", "i8")
+    ])
+    if arcpy.Exists(output_table):
+        arcpy.management.Delete(output_table)
+    arcpy.da.NumPyArrayToTable(table, output_table)
+    log_message(f"Weight sweep table saved to {output_table}")
+
+def sweep_soil_composition(slope_raster, flow_accum, curvature_raster, workspace, weights,
+                           normalization="MINMAX", crop_boundary=None, crop_field=None,
+                           block_size=DEFAULT_BLOCK_SIZE):
+    # Evaluate many weight sets over normalized inputs: one statistics pass and one scoring pass.
+    # Without a crop boundary every candidate raster is written; with one, per-field summaries.
+    # Flow accumulation and curvature are aligned onto the slope grid (clipped to their overlap).
+    import arcpy
+    rasters = dict(zip(SWEEP_INPUTS, (slope_raster, flow_accum, curvature_raster)))
+    grid = target_grid(list(rasters.values()))
+    sources = {name: raster_grid(path) for name, path in rasters.items()}
+
+    zone_raster = None
+    if crop_boundary:
+        zone_raster, zone_names = rasterize_zones(crop_boundary, crop_field, slope_raster, arcpy.env.scratchGDB)
+        if not zone_names:
+            raise ValueError(f"Crop boundary {crop_boundary} has no polygons to summarize.")
+        rasters["zones"] = zone_raster
+        sources["zones"] = raster_grid(zone_raster)
+        sums = np.zeros((max(zone_names) + 1, len(weights)))
+        squares = np.zeros_like(sums)
+        counts = np.zeros(sums.shape, dtype=np.int64)
+
+    def read_block(window):
+        return read_aligned_block(rasters, sources, grid, window)
+
+    statistics = collect_normalization_statistics(rasters, sources, grid, block_size)
+
+    outputs = {}
+    if not zone_raster:
+        outputs = {
+            number: BlockOutput(os.path.join(workspace, f"Soil_Composition_Sweep_{number + 1:03d}"), grid,
+                                arcpy.env.scratchFolder)
+            for number in range(len(weights))
+        }
+
+    scheduler = BlockScheduler(read_block, block_windows(grid["nrows"], grid["ncols"], block_size))
+    try:
+        for window, inputs in scheduler:
+            normalized = [statistics[name].normalize(inputs[name], normalization) for name in SWEEP_INPUTS]
+            if zone_raster:
+                zones = np.nan_to_num(inputs["zones"], nan=0).astype(np.int64)
+            for sets in weight_slices(len(weights), window[2] * window[3]):
+                scores = evaluate_weight_sets(normalized, weights[sets])
+                if zone_raster:
+                    accumulate_zones(zones, scores, sums[:, sets], counts[:, sets])
+                    accumulate_zones(zones, scores.astype(np.float64) ** 2, squares[:, sets])
+                else:
+                    scheduler.write(outputs, window, dict(zip(range(sets.start, sets.stop), scores)))
+    finally:
+        scheduler.close()
+
+    zone_rows = None
+    if zone_raster:
+        zone_rows = []
+        for zone_id, zone_name in sorted(zone_names.items()):
+            for number in range(len(weights)):
+                count = counts[zone_id, number]
+                if count:
+                    mean = sums[zone_id, number] / count
+                    std = np.sqrt(max(squares[zone_id, number] / count - mean ** 2, 0.0))
+                    zone_rows.append((zone_name, number, mean, std, count))
+    for output in outputs.values():
+        output.save()
+    write_weight_table(weights, zone_rows, os.path.join(workspace, "Soil_Composition_Sweep"))
+    log_message(f"{len(weights)} weight sets evaluated with {normalization} normalization")
+
 def main():
+    import arcpy
     check_out_extensions()
     try:
         # Set overwrite to True
@@ -56,10 +263,27 @@ def main():
         flow_accum = arcpy.GetParameterAsText(1)
         curvature_raster = arcpy.GetParameterAsText(2)
         workspace = arcpy.GetParameterAsText(3)
+        weights_text = arcpy.GetParameterAsText(4)
+        normalization = (arcpy.GetParameterAsText(5) or "MINMAX").upper()
+        crop_boundary = arcpy.GetParameterAsText(6)
+        crop_field = arcpy.GetParameterAsText(7)
+        block_size = arcpy.GetParameterAsText(8)
 
         arcpy.env.workspace = workspace
         log_message(f"Workspace set to: {workspace}")
 
+        # Weight sweep mode
+        if weights_text:
+            if normalization not in NORMALIZATIONS:
+                raise ValueError(f"Normalization must be one of {', '.join(NORMALIZATIONS)}")
+            sweep_soil_composition(
+                slope_raster, flow_accum, curvature_raster, workspace, parse_weight_sets(weights_text),
+                normalization, crop_boundary, crop_field,
+                int(block_size) if block_size else DEFAULT_BLOCK_SIZE
+            )
+            log_message("Soil composition weight sweep complete.")
+            return
+
         output_path = os.path.join(workspace, "Soil_Composition")
         log_message(f"Output will be saved to: {output_path}")
 
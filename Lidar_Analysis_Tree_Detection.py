@@ -0,0 +1,167 @@
+'''
+Tree Detection - Individual Trees from the Canopy Height Model
+--------------------------------------------------------------
+Script created by Robert Grow 10/2026
+
+Finds tree tops as local maxima of the smoothed Canopy_Height raster from Step 6, with a maximum
+filter window that grows with the expected crown width at each height, and grows crowns from the
+tops by marker-controlled watershed. The raster is processed in tiles with a halo as wide as the
+largest crown, each tree is kept by the tile that holds its top, and the result is a compact
+columnar table of tree position, height, and crown area instead of crown polygons.
+'''
+
+import math
+import numpy as np
+from scipy import ndimage
+from Lidar_Analysis_Block_IO import DEFAULT_BLOCK_SIZE, raster_grid, block_windows, read_window, BlockScheduler
+
+DEFAULT_MIN_TREE_HEIGHT = 3.0
+DEFAULT_SMOOTHING_SIGMA = 1.0
+DEFAULT_MAX_CROWN_DIAMETER = 15.0
+
+# Expected crown width (m) from tree height (m): width = intercept + slope * height^2
+CROWN_WIDTH_INTERCEPT = 3.09632
+CROWN_WIDTH_SLOPE = 0.00895
+
+# Watershed height quantization: 2 mm levels cover canopies up to 131 m in 16 bits
+WATERSHED_LEVELS_PER_METRE = 500
+
+TREE_FIELDS = [("TREE_ID", "i8"), ("X", "f8"), ("Y", "f8"), ("HEIGHT", "f8"),
+               ("CROWN_AREA", "f8"), ("CROWN_DIAMETER", "f8")]
+
+def log_message(message):
+    # Log a message to ArcGIS
+    import arcpy
+    arcpy.AddMessage(message)
+
+def crown_window_sizes(heights, cell_size, max_crown_diameter):
+    # Odd maximum filter window in cells for each height, from the expected crown width
+    width = np.minimum(CROWN_WIDTH_INTERCEPT + CROWN_WIDTH_SLOPE * heights ** 2, max_crown_diameter)
+    return np.maximum(2 * np.floor(width / (2 * cell_size)).astype(np.int64) + 1, 3)
+
+def find_tree_tops(smoothed, cell_size, min_height, max_crown_diameter):
+    # Markers at the variable-window local maxima; adjacent maxima of a plateau share one marker
+    canopy = smoothed >= min_height
+    sizes = crown_window_sizes(smoothed, cell_size, max_crown_diameter)
+    local_max = np.zeros(smoothed.shape, dtype=bool)
+    for size in np.unique(sizes[canopy]):
+        cells = canopy & (sizes == size)
+        local_max[cells] = smoothed[cells] >= ndimage.maximum_filter(smoothed, size=int(size))[cells]
+    return ndimage.label(local_max, structure=np.ones((3, 3)))
+
+def grow_crowns(smoothed, markers, min_height):
+    # Watershed from the markers over the inverted canopy surface, run once per connected canopy
+    # patch so a crown never floods across a gap into another patch; cells below min height stay 0.
+    # Heights are quantized on a fixed scale so every tile floods on the same levels.
+    structure = np.ones((3, 3))
+    levels = np.clip(np.round(smoothed * WATERSHED_LEVELS_PER_METRE), 0, 65535)
+    cost = (65535 - levels).astype(np.uint16)
+    patches, _ = ndimage.label(smoothed >= min_height, structure=structure)
+    crowns = np.zeros(markers.shape, dtype=np.int32)
+    for patch_id, patch_slice in enumerate(ndimage.find_objects(patches), 1):
+        in_patch = patches[patch_slice] == patch_id
+        patch_markers = np.where(in_patch, markers[patch_slice], 0).astype(np.int32)
+        if not patch_markers.any():
+            continue
+        patch_cost = np.where(in_patch, cost[patch_slice], 65535).astype(np.uint16)
+        flooded = ndimage.watershed_ift(patch_cost, patch_markers, structure=structure)
+        crowns[patch_slice][in_patch] = flooded[in_patch]
+    return crowns
+
+def detect_tile_trees(canopy_height, window, grid, min_height, sigma, max_crown_diameter):
+    # Columns of the trees whose tops fall in the core of one tile read with its halo
+    row, col, rows, cols, halo = window
+    cell = grid["cell_size"]
+    heights = np.nan_to_num(canopy_height, nan=0.0)
+    smoothed = ndimage.gaussian_filter(heights, sigma) if sigma else heights
+    markers, count = find_tree_tops(smoothed, cell, min_height, max_crown_diameter)
+    if not count:
+        return None
+
+    index = np.arange(1, count + 1)
+    tops = np.array(ndimage.maximum_position(smoothed, markers, index)).reshape(-1, 2)
+    crowns = grow_crowns(smoothed, markers, min_height)
+    owned = (
+        (tops[:, 0] >= halo) & (tops[:, 0] < halo + rows)
+        & (tops[:, 1] >= halo) & (tops[:, 1] < halo + cols)
+    )
+    crown_cells = np.bincount(crowns.ravel(), minlength=count + 1)[1:]
+    crown_height = np.asarray(ndimage.maximum(heights, crowns, index))
+    crown_area = crown_cells * cell * cell
+    return {
+        "X": grid["xmin"] + (col - halo + tops[owned, 1] + 0.5) * cell,
+        "Y": grid["ymax"] - (row - halo + tops[owned, 0] + 0.5) * cell,
+        "HEIGHT": crown_height[owned],
+        "CROWN_AREA": crown_area[owned],
+        "CROWN_DIAMETER": 2 * np.sqrt(crown_area[owned] / np.pi),
+    }
+
+def detect_trees(canopy_height, min_height=DEFAULT_MIN_TREE_HEIGHT, sigma=DEFAULT_SMOOTHING_SIGMA,
+                 max_crown_diameter=DEFAULT_MAX_CROWN_DIAMETER, block_size=DEFAULT_BLOCK_SIZE):
+    # Tree table columns over the whole canopy height raster, tile by tile with a crown-wide halo
+    grid = raster_grid(canopy_height)
+    cell = grid["cell_size"]
+    halo = int(math.ceil(max_crown_diameter / cell)) + int(math.ceil(3 * sigma))
+
+    def read_block(window):
+        return read_window(canopy_height, grid, window)
+
+    columns = {name: [] for name, _ in TREE_FIELDS[1:]}
+    scheduler = BlockScheduler(read_block, block_windows(grid["nrows"], grid["ncols"], block_size, halo))
+    try:
+        for window, values in scheduler:
+            trees = detect_tile_trees(values, window, grid, min_height, sigma, max_crown_diameter)
+            if trees is not None:
+                for name, tree_values in trees.items():
+                    columns[name].append(tree_values)
+    finally:
+        scheduler.close()
+
+    columns = {name: np.concatenate(parts) if parts else np.zeros(0) for name, parts in columns.items()}
+    columns["TREE_ID"] = np.arange(1, columns["X"].size + 1)
+    return columns
+
+def write_tree_table(columns, output_table):
+    # Save the tree columns as a table
+    import arcpy
+    table = np.zeros(columns["TREE_ID"].size, dtype=TREE_FIELDS)
+    for name, _ in TREE_FIELDS:
+        table[name] = columns[name]
+    if arcpy.Exists(output_table):
+        arcpy.management.Delete(output_table)
+    arcpy.da.NumPyArrayToTable(table, output_table)
+    log_message(f"Tree table saved to {output_table}")
+
+def main():
+    import arcpy
+    try:
+        # Set overwrite to True
+        arcpy.env.overwriteOutput = True
+
+        # Get parameters
+        canopy_height = arcpy.GetParameterAsText(0)  # Canopy_Height from Step 6
+        output_table = arcpy.GetParameterAsText(1)
+        min_height = float(arcpy.GetParameterAsText(2) or DEFAULT_MIN_TREE_HEIGHT)
+        sigma = float(arcpy.GetParameterAsText(3) or DEFAULT_SMOOTHING_SIGMA)  # Smoothing in cells
+        max_crown_diameter = float(arcpy.GetParameterAsText(4) or DEFAULT_MAX_CROWN_DIAMETER)
+        block_size = int(arcpy.GetParameterAsText(5) or DEFAULT_BLOCK_SIZE)
+
+        columns = detect_trees(canopy_height, min_height, sigma, max_crown_diameter, block_size)
+        write_tree_table(columns, output_table)
+
+        count = columns["TREE_ID"].size
+        if count:
+            log_message(
+                f"{count:,} trees detected: mean height {columns['HEIGHT'].mean():.1f}, "
+                f"mean crown area {columns['CROWN_AREA'].mean():.1f}"
+            )
+        else:
+            log_message(f"No trees taller than {min_height} detected.")
+        log_message("Tree detection complete.")
+
+    except Exception as e:
+        arcpy.AddError(f"Error: {e}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+'''
+Warm Worker - Persistent ArcPy Process for Step Invocations
+-----------------------------------------------------------
+Script created by Robert Grow 10/2026
+
+Runs a long-lived local worker that imports ArcPy and checks out the Spatial Analyst extension
+once, then executes step scripts on request with the same parameters their script tools read
+through arcpy.GetParameterAsText. Jobs are submitted over a local socket (a Unix socket, or a
+named pipe on Windows) or as JSON lines on stdin, so the import and license checkout cost is
+paid once per session instead of once per step and farm.
+'''
+
+import os
+import sys
+import json
+import time
+import secrets
+import argparse
+import tempfile
+import importlib
+import traceback
+from contextlib import contextmanager, redirect_stdout
+from multiprocessing.connection import Listener, Client
+
+STEP_MODULES = {
+    "step1": "Lidar_Analysis_Step_1__V2",
+    "step2": "Lidar_Analysis_Step_2__V2",
+    "step2_1": "Lidar_Analysis_Step_2_1_V2",
+    "step3": "Lidar_Analysis_Step_3__V2",
+    "step4": "Lidar_Analysis_Step_4__V2",
+    "step5": "Lidar_Analysis_Step_5__V2",
+    "step6": "Lidar_Analysis_Step_6__V2",
+    "step7": "Lidar_Analysis_Step_7__V2",
+    "step8": "Lidar_Analysis_Step_8__V2",
+    "las_index": "Lidar_Analysis_LAS_Index",
+    "class_store": "Lidar_Analysis_LAS_Class_Store",
+    "las_catalog": "Lidar_Analysis_LAS_Catalog",
+    "las_reproject": "Lidar_Analysis_LAS_Reproject",
+    "incremental": "Lidar_Analysis_Incremental",
+    "time_series": "Lidar_Analysis_NDVI_Time_Series",
+    "catchments": "Lidar_Analysis_Catchments",
+    "trees": "Lidar_Analysis_Tree_Detection",
+    "quick_look": "Lidar_Analysis_Quick_Look",
+}
+
+def default_address():
+    # Local socket address of the worker, one per user
+    if sys.platform == "win32":
+        return rf"\\.\pipe\lidar_analysis_worker_{os.environ.get('USERNAME', 'user')}"
+    return os.path.join(tempfile.gettempdir(), f"lidar_analysis_worker_{os.getuid()}.sock")
+
+def key_path(address):
+    # File holding the session key of the worker at an address, readable only by its owner
+    name = os.path.basename(address.replace("\\", "/").rstrip("/"))
+    return os.path.join(tempfile.gettempdir(), f"{name}.key")
+
+def create_authkey(address):
+    # Random key for one worker session, written to a 0600 key file for its clients
+    authkey = secrets.token_hex(32)
+    path = key_path(address)
+    if os.path.exists(path):
+        os.remove(path)
+    descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(descriptor, "w") as key_file:
+        key_file.write(authkey)
+    return authkey.encode()
+
+def read_authkey(address):
+    # Session key of the running worker at an address
+    path = key_path(address)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No worker key at {path}; is the worker running?")
+    if sys.platform != "win32" and os.stat(path).st_uid != os.getuid():
+        raise PermissionError(f"Worker key {path} is not owned by the current user")
+    with open(path) as key_file:
+        return key_file.read().strip().encode()
+
+def send_json(connection, message):
+    # Send one message as JSON bytes; connections never unpickle
+    connection.send_bytes(json.dumps(message).encode("utf-8"))
+
+def recv_json(connection):
+    # Receive one JSON message
+    return json.loads(connection.recv_bytes().decode("utf-8"))
+
+class JobError(Exception):
+    # A failed step, carrying the messages it reported before failing
+
+    def __init__(self, message, messages):
+        super().__init__(message)
+        self.messages = messages
+
+@contextmanager
+def stdout_to_stderr():
+    # Send everything written to stdout, including output of native code, to stderr
+    sys.stdout.flush()
+    saved = os.dup(1)
+    os.dup2(2, 1)
+    try:
+        with redirect_stdout(sys.stderr):
+            yield
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(saved, 1)
+        os.close(saved)
+
+class Worker:
+    # Holds the imported ArcPy backend and the Spatial Analyst checkout for the whole session
+
+    def __init__(self):
+        started = time.perf_counter()
+        import arcpy
+        self.arcpy = arcpy
+        self.arcpy.CheckOutExtension("Spatial")
+        self.startup_seconds = time.perf_counter() - started
+
+    def close(self):
+        # Check the extension back in at the end of the session
+        self.arcpy.CheckInExtension("Spatial")
+
+    @contextmanager
+    def job_context(self, parameters, messages):
+        # Serve the job parameters through GetParameterAsText and keep the extension checked out
+        arcpy = self.arcpy
+        originals = {
+            name: getattr(arcpy, name)
+            for name in ("GetParameterAsText", "AddMessage", "AddWarning", "AddError", "CheckInExtension")
+        }
+        arcpy.ResetEnvironments()
+        arcpy.GetParameterAsText = lambda index: str(parameters[index]) if index < len(parameters) else ""
+        arcpy.AddMessage = lambda message: messages.append(("message", str(message)))
+        arcpy.AddWarning = lambda message: messages.append(("warning", str(message)))
+        arcpy.AddError = lambda message: messages.append(("error", str(message)))
+        arcpy.CheckInExtension = lambda extension: "CheckedIn"
+        try:
+            yield
+        finally:
+            for name, value in originals.items():
+                setattr(arcpy, name, value)
+
+    def run_step(self, step, parameters):
+        # Run the main() of a step script with the given script tool parameters
+        if step not in STEP_MODULES:
+            raise ValueError(f"Unknown step: {step}")
+        module = importlib.import_module(STEP_MODULES[step])
+        messages = []
+        started = time.perf_counter()
+        try:
+            with self.job_context(list(parameters), messages):
+                module.main()
+        except Exception as e:
+            raise JobError(str(e), messages) from e
+        return {"messages": messages, "seconds": time.perf_counter() - started}
+
+    def handle(self, request):
+        # Answer one JSON-RPC style request
+        method = request.get("method")
+        params = request.get("params", {})
+        if method == "ping":
+            return {"startup_seconds": self.startup_seconds}
+        if method == "run_step":
+            return self.run_step(params["step"], params.get("parameters", []))
+        raise ValueError(f"Unknown method: {method}")
+
+    def respond(self, request):
+        # Run a request and wrap its result or error in a response
+        if not isinstance(request, dict):
+            return {"id": None, "error": "Request must be a JSON object", "traceback": ""}
+        try:
+            return {"id": request.get("id"), "result": self.handle(request)}
+        except Exception as e:
+            return {
+                "id": request.get("id"), "error": str(e), "traceback": traceback.format_exc(),
+                "messages": getattr(e, "messages", []),
+            }
+
+    def serve_socket(self, address):
+        # Accept jobs from clients on a local socket until a shutdown request arrives;
+        # the socket and the session key file are readable only by the worker's user
+        if sys.platform != "win32" and os.path.exists(address):
+            os.remove(address)
+        authkey = create_authkey(address)
+        previous_umask = os.umask(0o177)
+        try:
+            listener = Listener(address, authkey=authkey)
+        finally:
+            os.umask(previous_umask)
+        try:
+            if sys.platform != "win32":
+                os.chmod(address, 0o600)
+            print(f"Worker ready on {address} ({self.startup_seconds:.1f} s startup)", flush=True)
+            while True:
+                try:
+                    connection = listener.accept()
+                except Exception as e:
+                    # Failed authentication or a dropped client; keep serving
+                    print(f"Rejected connection: {e}", file=sys.stderr, flush=True)
+                    continue
+                with connection:
+                    try:
+                        request = recv_json(connection)
+                    except ValueError as e:
+                        send_json(connection, {"id": None, "error": f"Malformed request: {e}", "traceback": ""})
+                        continue
+                    if isinstance(request, dict) and request.get("method") == "shutdown":
+                        send_json(connection, {"id": request.get("id"), "result": "shutdown"})
+                        break
+                    send_json(connection, self.respond(request))
+        finally:
+            listener.close()
+            if os.path.exists(key_path(address)):
+                os.remove(key_path(address))
+        self.close()
+
+    def serve_stdio(self):
+        # Accept JSON requests one per line on stdin and answer on stdout; responses go to a
+        # duplicate of the original stdout while jobs run with stdout sent to stderr, so prints
+        # from the steps cannot corrupt the framing
+        responses = os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding="utf-8")
+
+        def reply(response):
+            responses.write(json.dumps(response) + "\n")
+            responses.flush()
+
+        try:
+            for line in sys.stdin:
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError as e:
+                    reply({"id": None, "error": f"Malformed request: {e}", "traceback": ""})
+                    continue
+                if isinstance(request, dict) and request.get("method") == "shutdown":
+                    break
+                with stdout_to_stderr():
+                    response = self.respond(request)
+                reply(response)
+        finally:
+            responses.close()
+        self.close()
+
+def request(message, address=None):
+    # Send one request to a running worker with its session key and return the response
+    address = address or default_address()
+    with Client(address, authkey=read_authkey(address)) as connection:
+        send_json(connection, message)
+        return recv_json(connection)
+
+def submit(step, parameters, address=None):
+    # Submit a step invocation to a running worker and return its response
+    return request({"id": 1, "method": "run_step", "params": {"step": step, "parameters": list(parameters)}}, address)
+
+def shutdown(address=None):
+    # Ask a running worker to check in its extension and exit
+    return request({"id": 1, "method": "shutdown"}, address)
+
+def print_response(response):
+    # Print the messages of a job response and return a process exit code
+    messages = response.get("messages", []) if "error" in response else response["result"]["messages"]
+    for level, message in messages:
+        print(message if level == "message" else f"{level.upper()}: {message}")
+    if "error" in response:
+        print(response["traceback"], file=sys.stderr)
+        return 1
+    print(f"Completed in {response['result']['seconds']:.1f} s")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Persistent ArcPy worker for the LiDAR analysis steps.")
+    parser.add_argument("--address", default=None, help="Worker socket path or named pipe")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("serve", help="Start a worker listening on a local socket")
+    commands.add_parser("stdio", help="Start a worker reading JSON requests from stdin")
+    submit_parser = commands.add_parser("submit", help="Run a step on a running worker")
+    submit_parser.add_argument("step", choices=sorted(STEP_MODULES))
+    submit_parser.add_argument("parameters", nargs="*", help="Script tool parameters in order")
+    commands.add_parser("shutdown", help="Stop a running worker")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        Worker().serve_socket(args.address or default_address())
+    elif args.command == "stdio":
+        Worker().serve_stdio()
+    elif args.command == "submit":
+        return print_response(submit(args.step, args.parameters, args.address))
+    elif args.command == "shutdown":
+        shutdown(args.address)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+import struct
+import numpy as np
+
+
+def make_las(path, points=10000, point_format=6, seed=0, sort=True, origin=(1000.0, 2000.0), size=500.0):
+    # Write a synthetic LAS 1.4 file with uniform random points and return their x, y, z
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(0, size, points) + origin[0]
+    y = rng.uniform(0, size, points) + origin[1]
+    z = rng.uniform(100, 150, points)
+    if sort:
+        order = np.lexsort((x // 20, y // 20))
+        x, y, z = x[order], y[order], z[order]
+
+    record_length = 30 if point_format >= 6 else 20
+    header = bytearray(375)
+    header[0:4] = b"LASF"
+    header[24], header[25] = 1, 4
+    struct.pack_into("<H", header, 94, 375)
+    struct.pack_into("<I", header, 96, 375)
+    header[104] = point_format
+    struct.pack_into("<H", header, 105, record_length)
+    struct.pack_into("<I", header, 107, 0 if point_format >= 6 else points)
+    scale, offset = (0.01, 0.01, 0.01), (origin[0], origin[1], 0.0)
+    struct.pack_into("<3d", header, 131, *scale)
+    struct.pack_into("<3d", header, 155, *offset)
+    struct.pack_into("<6d", header, 179, x.max(), x.min(), y.max(), y.min(), z.max(), z.min())
+    struct.pack_into("<Q", header, 247, points)
+
+    records = np.zeros(points, dtype=np.dtype({
+        "names": ["X", "Y", "Z", "intensity", "return_byte", "class_byte"],
+        "formats": ["<i4", "<i4", "<i4", "<u2", "u1", "u1"],
+        "offsets": [0, 4, 8, 12, 14, 16 if point_format >= 6 else 15],
+        "itemsize": record_length,
+    }))
+    records["X"] = np.round((x - offset[0]) / scale[0])
+    records["Y"] = np.round((y - offset[1]) / scale[1])
+    records["Z"] = np.round(z / scale[2])
+    records["intensity"] = rng.integers(0, 4000, points)
+    returns = rng.integers(1, 4, points)
+    number = np.minimum(rng.integers(1, 4, points), returns)
+    records["return_byte"] = number | (returns << 4) if point_format >= 6 else number | (returns << 3)
+    records["class_byte"] = rng.choice([1, 2, 3, 4, 5, 7], points)
+    with open(path, "wb") as las_file:
+        las_file.write(header)
+        records.tofile(las_file)
+    return (records["X"] * scale[0] + offset[0], records["Y"] * scale[1] + offset[1], records["Z"] * scale[2])
@@ -0,0 +1,61 @@
+import threading
+
+import numpy as np
+
+import Lidar_Analysis_Block_IO as block_io
+from Lidar_Analysis_Block_IO import block_windows, accumulate_zones, BlockOutput, BlockScheduler, BLOCK_NODATA
+
+GRID = {"xmin": 100.0, "ymax": 500.0, "cell_size": 2.0, "nrows": 5, "ncols": 7, "spatial_reference": None}
+
+
+def test_block_windows_cover_the_grid():
+    windows = list(block_windows(5, 7, 3, halo=1))
+    assert windows == [(0, 0, 3, 3, 1), (0, 3, 3, 3, 1), (0, 6, 3, 1, 1),
+                       (3, 0, 2, 3, 1), (3, 3, 2, 3, 1), (3, 6, 2, 1, 1)]
+
+
+def test_block_output_writes_into_preallocated_file(tmp_path):
+    output = BlockOutput(str(tmp_path / "Out"), GRID, str(tmp_path))
+    expected = np.arange(35, dtype=np.float32).reshape(5, 7)
+    expected[1, 1] = np.nan
+    for window in block_windows(5, 7, 3):
+        row, col, rows, cols, _ = window
+        output.write(window, expected[row:row + rows, col:col + cols])
+    output.values.flush()
+
+    written = np.fromfile(output.bil_path, dtype="<f4").reshape(5, 7)
+    assert written[1, 1] == BLOCK_NODATA
+    written[1, 1] = np.nan
+    np.testing.assert_array_equal(written, expected)
+
+    header = dict(line.split(" ", 1) for line in open(output.bil_path[:-4] + ".hdr").read().splitlines())
+    assert (header["NROWS"], header["NCOLS"], header["PIXELTYPE"]) == ("5", "7", "FLOAT")
+    assert (float(header["ULXMAP"]), float(header["ULYMAP"]), float(header["XDIM"])) == (101.0, 499.0, 2.0)
+
+
+def test_scheduler_prefetches_at_most_prefetch_windows(monkeypatch):
+    monkeypatch.setattr(block_io, "log_message", lambda message: None)
+    gate = threading.Event()
+    submitted = []
+
+    def read_block(window):
+        submitted.append(window)
+        gate.wait()
+        return window
+
+    scheduler = BlockScheduler(read_block, block_windows(5, 7, 1), prefetch=2, io_threads=4)
+    scheduler._queue_reads()
+    assert len(scheduler.reads) == 2
+    gate.set()
+    windows = [window for window, _ in scheduler]
+    scheduler.close()
+    assert len(windows) == 35 and scheduler.blocks == 35
+
+
+def test_accumulate_zones():
+    zones = np.array([[1, 1], [2, 0]])
+    stack = np.array([[[1.0, 2.0], [3.0, 4.0]], [[np.nan, 5.0], [6.0, 7.0]]])
+    sums, counts = np.zeros((3, 2)), np.zeros((3, 2))
+    accumulate_zones(zones, stack, sums, counts)
+    np.testing.assert_array_equal(sums, [[0, 0], [3, 5], [3, 6]])
+    np.testing.assert_array_equal(counts, [[0, 0], [2, 1], [1, 1]])
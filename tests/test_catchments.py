@@ -0,0 +1,57 @@
+import numpy as np
+
+from Lidar_Analysis_Catchments import downstream_cells, label_catchments, nest_basins, total_upstream
+
+# Every row drains east; the last column drains south, and the bottom right cell leaves the grid
+FLOW_DIRECTION = np.array([
+    [1, 1, 1, 1, 4],
+    [1, 1, 1, 1, 4],
+    [1, 1, 1, 1, 1],
+], dtype=np.float32)
+
+
+def test_downstream_cells():
+    down = downstream_cells(FLOW_DIRECTION)
+    assert down.tolist() == [1, 2, 3, 4, 9, 6, 7, 8, 9, 14, 11, 12, 13, 14, -1]
+    nodata = FLOW_DIRECTION.copy()
+    nodata[0, 1] = np.nan
+    nodata[1, 1] = 3  # not a D8 code
+    assert downstream_cells(nodata)[[1, 6]].tolist() == [-1, -1]
+
+
+def test_nested_pour_points():
+    down = downstream_cells(FLOW_DIRECTION)
+    # Outlet at the bottom right, one pour point upstream of it, and one upstream of that
+    pour_cells = np.array([14, 2, 0])
+    slope = np.arange(15, dtype=np.float64)
+    slope[7] = np.nan
+    labels, cells, sums, valid_counts = label_catchments(down, pour_cells, {"slope": slope})
+
+    assert labels.reshape(3, 5).tolist() == [
+        [3, 2, 2, 1, 1],
+        [1, 1, 1, 1, 1],
+        [1, 1, 1, 1, 1],
+    ]
+    assert cells.tolist() == [0, 12, 2, 1]
+    assert sums["slope"].tolist() == [0, 105 - 7 - 3, 3, 0]
+    assert valid_counts["slope"].tolist() == [0, 11, 2, 1]
+
+    downstream, outer = nest_basins(down, labels, pour_cells)
+    assert downstream.tolist() == [0, 0, 1, 2]
+    assert outer.tolist() == [0, 1, 1, 1]
+    assert total_upstream(downstream, cells).tolist() == [0, 15, 3, 1]
+
+
+def test_pour_point_on_a_flow_cycle_terminates():
+    # Cells 0 and 1 drain into each other; cell 2 drains into the cycle
+    down = np.array([1, 0, 1])
+    labels, cells, _, _ = label_catchments(down, np.array([0]))
+    assert labels.tolist() == [1, 1, 1]
+    assert cells.tolist() == [0, 3]
+
+
+def test_flow_cycle_without_a_pour_point_is_not_labelled():
+    down = np.array([1, 0, -1])
+    labels, cells, _, _ = label_catchments(down, np.array([2]))
+    assert labels.tolist() == [0, 0, 1]
+    assert cells.tolist() == [0, 1]
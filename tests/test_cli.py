@@ -0,0 +1,33 @@
+from las_fixtures import make_las
+from Lidar_Analysis_CLI import build_parser, validate, main
+
+
+def parse(argv):
+    return build_parser().parse_args(argv)
+
+
+def test_block_size_must_be_whole(tmp_path):
+    for name in ("red", "green", "blue", "nir", "ndvi"):
+        (tmp_path / f"{name}.tif").write_bytes(b"")
+    base = ["step5"] + [arg for name in ("red", "green", "blue", "nir", "ndvi")
+                        for arg in (f"--{name}", str(tmp_path / f"{name}.tif"))] + ["--workspace", str(tmp_path)]
+    assert validate("step5", parse(base + ["--block-size", "1024"])) == []
+    assert validate("step5", parse(base + ["--block-size", "512.5"])) == ["--block-size: not a whole number: 512.5"]
+
+
+def test_las_without_crs_warns(tmp_path, capsys):
+    make_las(str(tmp_path / "tile.las"), points=100)
+    warnings = []
+    errors = validate("las_index", parse(["las_index", "--input-las", str(tmp_path)]), warnings)
+    assert errors == []
+    assert warnings == [f"LAS files without a coordinate system in {tmp_path}"]
+
+    assert main(["las_index", "--input-las", str(tmp_path), "--dry-run"]) == 0
+    assert "WARNING: LAS files without a coordinate system" in capsys.readouterr().err
+
+
+def test_extent_outside_las_data_is_an_error(tmp_path):
+    make_las(str(tmp_path / "tile.las"), points=100)
+    args = parse(["step2_1", "--input-las", str(tmp_path), "--vegetation-layer", "veg",
+                  "--dsm", str(tmp_path / "dsm.tif"), "--extent", "0 0 10 10"])
+    assert [error.split(":")[0] for error in validate("step2_1", args)] == ["--extent"]
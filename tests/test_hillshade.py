@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from Lidar_Analysis_Step_3__V2 import surface_normals, light_vector, shade, cast_shadows, multidirectional_weights
+
+
+def plane(rows=6, cols=7, cell=2.0, east=0.5, north=-0.25):
+    # Heights rising `east` per unit east and `north` per unit north; rows run south
+    row, col = np.mgrid[0:rows, 0:cols]
+    return east * col * cell - north * row * cell
+
+
+def hills(size=30):
+    y, x = np.mgrid[0:size, 0:size]
+    return (10 * np.exp(-((x - 15) ** 2 + (y - 13) ** 2) / 25) + 6 * np.exp(-((x - 6) ** 2 + (y - 23) ** 2) / 8)
+            + 0.3 * np.sin(x / 3) * np.cos(y / 4))
+
+
+def ray_march(z, cell, azimuth, altitude, step=0.1):
+    # Brute-force shadows: walk toward the light from every cell over bilinear terrain heights
+    nrows, ncols = z.shape
+    east, north = np.sin(np.radians(azimuth)), np.cos(np.radians(azimuth))
+    rise = cell * np.tan(np.radians(altitude))
+    top = np.nanmax(z)
+    shadow = np.zeros(z.shape, dtype=bool)
+    for row in range(nrows):
+        for col in range(ncols):
+            distance = step
+            while z[row, col] + distance * rise <= top:
+                r, c = row - north * distance, col + east * distance
+                r0, c0 = int(np.floor(r)), int(np.floor(c))
+                if r0 < 0 or c0 < 0 or r0 + 1 >= nrows or c0 + 1 >= ncols:
+                    break
+                fr, fc = r - r0, c - c0
+                height = ((1 - fr) * ((1 - fc) * z[r0, c0] + fc * z[r0, c0 + 1])
+                          + fr * ((1 - fc) * z[r0 + 1, c0] + fc * z[r0 + 1, c0 + 1]))
+                if height > z[row, col] + distance * rise + 1e-9:
+                    shadow[row, col] = True
+                    break
+                distance += step
+    return shadow
+
+
+def test_horn_normals_of_a_plane():
+    normals = surface_normals(plane(), 2.0)
+    expected = np.array([-0.5, 0.25, 1.0]) / np.sqrt(0.5 ** 2 + 0.25 ** 2 + 1)
+    np.testing.assert_allclose(normals[:, 1:-1, 1:-1], expected[:, None, None] * np.ones((1, 4, 5)), atol=1e-12)
+    np.testing.assert_allclose((normals ** 2).sum(axis=0), 1.0)
+
+
+def test_shade_of_flat_and_facing_slopes():
+    flat = surface_normals(np.zeros((3, 3)), 1.0)
+    np.testing.assert_allclose(shade(flat, 315, 45), np.sin(np.radians(45)))
+    np.testing.assert_allclose(light_vector(90, 0), [1, 0, 0], atol=1e-12)
+
+    # A slope rising to the west faces an east light at 45 degrees above a 45 degree slope head on
+    facing = surface_normals(plane(east=-1.0, north=0.0), 2.0)
+    np.testing.assert_allclose(shade(facing, 90, 45)[1:-1, 1:-1], 1.0)
+    assert (shade(facing, 270, 30)[:, 1:-1] == 0).all()
+
+
+def test_multidirectional_weights_sum_to_one():
+    weights = multidirectional_weights(surface_normals(hills(10), 1.0), [0, 90, 180, 270])
+    np.testing.assert_allclose(weights.sum(axis=0), 1.0)
+
+
+@pytest.mark.parametrize("azimuth", [10, 45, 90, 200, 300])
+def test_cast_shadows_match_a_ray_march(azimuth):
+    z = hills()
+    expected = ray_march(z, 1.0, azimuth, 25)
+    shadow = cast_shadows(z, 1.0, azimuth, 25)
+    assert expected.sum() > 50
+    mismatched = shadow != expected
+    assert mismatched.sum() <= 0.02 * z.size
+    # Differences are limited to the edge of a shadow
+    padded = np.pad(expected, 1, mode="edge")
+    edge = np.zeros_like(expected)
+    for dr in (-1, 0, 1):
+        for dc in (-1, 0, 1):
+            edge |= padded[1 + dr:1 + dr + z.shape[0], 1 + dc:1 + dc + z.shape[1]] != expected
+    assert not (mismatched & ~edge).any()
+
+
+def test_cast_shadows_ignore_nodata():
+    z = np.zeros((5, 8))
+    z[2, 1] = 50.0
+    z[2, 4] = np.nan
+    shadow = cast_shadows(z, 1.0, 270, 30)
+    assert shadow[2, 2] and shadow[2, 3] and not shadow[2, 4]
+    assert not shadow[2, 0]
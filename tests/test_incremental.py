@@ -0,0 +1,111 @@
+import numpy as np
+
+from las_fixtures import make_las
+from Lidar_Analysis_Incremental import (
+    raster_tiles_for_bounds, scan_las_tiles, load_manifest, save_manifest, find_dirty_tiles, group_dirty_tiles,
+    tile_group_extent, extent_contains, union_extent, basins_touching, basins_extent, drainage_reach,
+    grow_basin_ids, MANIFEST_NAME
+)
+
+# 4 x 4 grid of 10 m cells with its top left corner at (0, 40)
+GEOMETRY = (0.0, 40.0, 10.0)
+OLD_BASINS = np.array([
+    [1, 1, 2, 2],
+    [1, 1, 2, 2],
+    [3, 3, 4, 4],
+    [3, 3, 4, 4],
+])
+
+
+def tile(fingerprint, bounds, tile_size=100.0):
+    return {"fingerprint": fingerprint, "bounds": bounds, "raster_tiles": raster_tiles_for_bounds(bounds, tile_size)}
+
+
+def test_raster_tiles_for_bounds():
+    assert raster_tiles_for_bounds((0, 0, 99, 99), 100) == [[0, 0]]
+    assert raster_tiles_for_bounds((50, 150, 250, 199), 100) == [[0, 1], [1, 1], [2, 1]]
+
+
+def test_manifest_round_trip(tmp_path):
+    make_las(str(tmp_path / "a.las"), points=500, origin=(0.0, 0.0), size=150.0)
+    make_las(str(tmp_path / "b.las"), points=500, seed=1, origin=(300.0, 0.0), size=50.0)
+    manifest_path = str(tmp_path / MANIFEST_NAME)
+    assert load_manifest(manifest_path) is None
+
+    tiles = scan_las_tiles(str(tmp_path), 100.0)
+    assert sorted(tiles) == ["a.las", "b.las"]
+    assert sorted(map(tuple, tiles["a.las"]["raster_tiles"])) == [(0, 0), (0, 1), (1, 0), (1, 1)]
+    assert tiles["b.las"]["raster_tiles"] == [[3, 0]]
+
+    save_manifest(manifest_path, 100.0, tiles)
+    assert load_manifest(manifest_path) == {"tile_size": 100.0, "las_tiles": tiles}
+    assert find_dirty_tiles(load_manifest(manifest_path)["las_tiles"], scan_las_tiles(str(tmp_path), 100.0)) == set()
+
+    # Rewriting a tile with different points changes its fingerprint
+    make_las(str(tmp_path / "b.las"), points=500, seed=2, origin=(300.0, 0.0), size=50.0)
+    assert find_dirty_tiles(tiles, scan_las_tiles(str(tmp_path), 100.0)) == {(3, 0)}
+
+
+def test_find_dirty_tiles_added_replaced_removed():
+    previous = {
+        "kept.las": tile([1, 2], [0, 0, 50, 50]),
+        "replaced.las": tile([3, 4], [100, 0, 150, 50]),
+        "removed.las": tile([5, 6], [200, 0, 250, 50]),
+    }
+    current = {
+        "kept.las": tile([1, 2], [0, 0, 50, 50]),
+        # A replacement covering a larger area dirties its old and its new tiles
+        "replaced.las": tile([7, 8], [100, 0, 150, 150]),
+        "added.las": tile([9, 9], [500, 500, 550, 550]),
+    }
+    assert find_dirty_tiles(previous, current) == {(1, 0), (1, 1), (2, 0), (5, 5)}
+    assert find_dirty_tiles(previous, previous) == set()
+
+
+def test_group_dirty_tiles_splits_distant_changes():
+    groups = group_dirty_tiles({(0, 0), (1, 1), (2, 1), (5, 5)})
+    assert sorted(sorted(group) for group in groups) == [[(0, 0), (1, 1), (2, 1)], [(5, 5)]]
+    assert tile_group_extent([(0, 0), (1, 1), (2, 1)], 100.0) == (0.0, 0.0, 300.0, 200.0)
+    assert tile_group_extent([(5, 5)], 100.0) == (500.0, 500.0, 600.0, 600.0)
+
+
+def test_extent_helpers():
+    assert extent_contains((0, 0, 10, 10), (2, 2, 10, 8))
+    assert not extent_contains((0, 0, 10, 10), (2, 2, 11, 8))
+    assert union_extent([(0, 5, 10, 10), (-5, 0, 3, 20)]) == (-5, 0, 10, 20)
+
+
+def test_basins_touching_and_extent():
+    # The lower left quarter of cell (1, 1) touches basin 1 only
+    assert basins_touching(OLD_BASINS, GEOMETRY, [(10, 20, 15, 25)]) == {1}
+    assert basins_touching(OLD_BASINS, GEOMETRY, [(15, 15, 25, 25)]) == {1, 2, 3, 4}
+    assert basins_touching(OLD_BASINS, GEOMETRY, [(100, 100, 110, 110)]) == set()
+    assert basins_extent(OLD_BASINS, GEOMETRY, {2}) == (20.0, 20.0, 40.0, 40.0)
+    assert basins_extent(OLD_BASINS, GEOMETRY, {1, 4}) == (0.0, 0.0, 40.0, 40.0)
+    assert basins_extent(OLD_BASINS, GEOMETRY, set()) is None
+
+
+def test_drainage_reach_grows_old_basins():
+    # After the change, cells of old basins 1 and 3 drain into new basin 7
+    new_basins = np.array([
+        [7, 7, 2, 2],
+        [7, 7, 2, 2],
+        [7, 3, 4, 4],
+        [7, 3, 4, 4],
+    ])
+    dirty = [(0, 30, 10, 40)]
+    new_ids, reach = drainage_reach(new_basins, GEOMETRY, dirty)
+    assert new_ids == {7}
+    # Basin 7 runs into the left, bottom, and top edges of the window, which grow by a cell
+    assert reach == (-10.0, -10.0, 20.0, 50.0)
+    assert grow_basin_ids({1}, OLD_BASINS, GEOMETRY, reach) == {1, 3}
+    assert grow_basin_ids({1}, OLD_BASINS, GEOMETRY, None) == {1}
+
+
+def test_drainage_reach_inside_window():
+    new_basins = np.zeros((4, 4), dtype=int)
+    new_basins[1:3, 1:3] = 5
+    new_ids, reach = drainage_reach(new_basins, GEOMETRY, [(15, 15, 25, 25)])
+    assert new_ids == {5}
+    assert reach == (10.0, 10.0, 30.0, 30.0)
+    assert drainage_reach(np.zeros((4, 4), dtype=int), GEOMETRY, [(15, 15, 25, 25)]) == (set(), None)
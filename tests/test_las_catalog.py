@@ -0,0 +1,82 @@
+import os
+
+import numpy as np
+import pytest
+
+from las_fixtures import make_las
+import Lidar_Analysis_LAS_Catalog as las_catalog
+import Lidar_Analysis_LAS_Index as las_index
+from Lidar_Analysis_LAS_Catalog import build_las_catalog, query_tiles, dataset_statistics, write_statistics_text
+from Lidar_Analysis_LAS_Index import index_path_for, read_las_header, open_las_points, point_classification
+
+
+@pytest.fixture
+def las_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(las_catalog, "log_message", lambda message: None)
+    monkeypatch.setattr(las_index, "log_message", lambda message: None)
+    folder = tmp_path / "las"
+    folder.mkdir()
+    make_las(str(folder / "a.las"), points=2000, seed=1)
+    make_las(str(folder / "b.las"), points=3000, seed=2, origin=(1500.0, 2000.0))
+    return folder
+
+
+def class_counts(las_path):
+    header = read_las_header(las_path)
+    return np.bincount(point_classification(open_las_points(las_path, header), header), minlength=8)
+
+
+def count_reads(monkeypatch):
+    # Count the LAS files read by summarizing or indexing
+    reads = []
+    summarize, index = las_catalog.summarize_las_file, las_catalog.build_spatial_index
+    monkeypatch.setattr(las_catalog, "summarize_las_file", lambda path: reads.append(path) or summarize(path))
+    monkeypatch.setattr(las_catalog, "build_spatial_index",
+                        lambda path, **kwargs: reads.append(path) or index(path, **kwargs))
+    return reads
+
+
+def test_catalog_matches_the_points(las_folder, tmp_path):
+    catalog = build_las_catalog(str(las_folder), str(tmp_path / "catalog.sqlite"))
+    expected = class_counts(str(las_folder / "a.las")) + class_counts(str(las_folder / "b.las"))
+
+    statistics = dataset_statistics(catalog)
+    assert statistics["point_count"] == 5000 and statistics["tile_count"] == 2
+    assert {code: points for code, points, *_ in statistics["classes"]} == {
+        code: count for code, count in enumerate(expected) if count
+    }
+    noise = query_tiles(catalog, class_codes=[7])
+    assert [os.path.basename(path) for path, _ in noise] == ["a.las", "b.las"]
+    assert sum(points for _, points in noise) == expected[7]
+    assert [os.path.basename(path) for path, _ in query_tiles(catalog, extent=(1600, 2100, 1700, 2200))] == ["b.las"]
+
+
+def test_current_tiles_are_not_read_again(las_folder, tmp_path, monkeypatch):
+    catalog = str(tmp_path / "catalog.sqlite")
+    reads = count_reads(monkeypatch)
+    build_las_catalog(str(las_folder), catalog)
+    assert len(reads) == 2
+    build_las_catalog(str(las_folder), catalog)
+    assert len(reads) == 2
+
+    # Current catalog rows without spatial indexes are read once more to build them, then skipped
+    build_las_catalog(str(las_folder), catalog, with_indexes=True)
+    assert len(reads) == 4 and os.path.exists(index_path_for(str(las_folder / "a.las")))
+    build_las_catalog(str(las_folder), catalog, with_indexes=True)
+    assert len(reads) == 4
+
+    os.remove(index_path_for(str(las_folder / "b.las")))
+    build_las_catalog(str(las_folder), catalog, with_indexes=True)
+    assert [os.path.basename(path) for path in reads[4:]] == ["b.las"]
+
+
+def test_statistics_text_layout(las_folder, tmp_path):
+    catalog = build_las_catalog(str(las_folder), str(tmp_path / "catalog.sqlite"))
+    stats_text = str(tmp_path / "stats.txt")
+    write_statistics_text(dataset_statistics(catalog, las_files=[str(las_folder / "a.las")]), stats_text)
+    lines = open(stats_text).read().splitlines()
+    assert lines[0] == "Category,Item,Points,Percent,Z_Min,Z_Max,Intensity_Min,Intensity_Max"
+    assert lines[1].startswith("Dataset,All Points,2000,100.00,")
+    categories = {line.split(",")[0] for line in lines[1:]}
+    assert categories == {"Dataset", "ClassCodes", "Returns", "Histogram_Z", "Histogram_INTENSITY"}
+    assert sum(int(line.split(",")[2]) for line in lines if line.startswith("ClassCodes,")) == 2000
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from las_fixtures import make_las
+import Lidar_Analysis_LAS_Index as las_index
+from Lidar_Analysis_LAS_Index import (
+    parse_area, parse_extent, points_in_polygons, build_spatial_index, read_las_header, point_coordinates,
+    read_points_in_extent
+)
+
+SQUARE = np.array([[0.0, 0.0], [10.0, 0.0], [10.0, 10.0], [0.0, 10.0]])
+HOLE = np.array([[4.0, 4.0], [6.0, 4.0], [6.0, 6.0], [4.0, 6.0]])
+TRIANGLE = np.array([[1100.0, 2100.0], [1400.0, 2100.0], [1100.0, 2400.0]])
+
+
+def test_parse_extent_string():
+    assert parse_extent("1 2 3 4") == (1.0, 2.0, 3.0, 4.0)
+    assert parse_extent("1, 2, 3, 4") == (1.0, 2.0, 3.0, 4.0)
+    assert parse_area("1 2 3 4") == ((1.0, 2.0, 3.0, 4.0), None)
+    assert parse_extent("") is None
+
+
+@pytest.mark.parametrize("text", ["1 2 3", "1 2 3 4 5", "1 2 x 4", "5 2 1 4"])
+def test_parse_extent_rejects_malformed_strings(text):
+    with pytest.raises(ValueError, match="xmin ymin xmax ymax"):
+        parse_extent(text)
+
+
+def test_points_in_polygons_excludes_holes():
+    x = np.array([1.0, 5.0, 9.0, 11.0, 5.0])
+    y = np.array([1.0, 5.0, 9.0, 5.0, -1.0])
+    assert points_in_polygons(x, y, [[SQUARE, HOLE]]).tolist() == [True, False, True, False, False]
+    assert points_in_polygons(x, y, [[SQUARE]]).tolist() == [True, True, True, False, False]
+
+
+def test_read_points_in_polygon(tmp_path, monkeypatch):
+    monkeypatch.setattr(las_index, "log_message", lambda message: None)
+    las_path = str(tmp_path / "tile.las")
+    x, y, _ = make_las(las_path, 20000)
+    build_spatial_index(las_path)
+    extent = (1100.0, 2100.0, 1400.0, 2400.0)
+
+    header = read_las_header(las_path)
+    chunks = list(read_points_in_extent(las_path, extent, polygons=[[TRIANGLE]]))
+    px, py, _ = point_coordinates(np.concatenate(chunks), header)
+    expected = points_in_polygons(x, y, [[TRIANGLE]])
+    assert len(px) == expected.sum()
+    assert np.all((px - 1100.0) + (py - 2100.0) <= 300.0 + 1e-9)
+    envelope = list(read_points_in_extent(las_path, extent))
+    assert sum(len(chunk) for chunk in envelope) > len(px)
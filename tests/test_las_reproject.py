@@ -0,0 +1,112 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from las_fixtures import make_las
+import Lidar_Analysis_LAS_Index as las_index
+from Lidar_Analysis_LAS_Index import (
+    read_las_header, open_las_points, point_coordinates, cell_ids, allocate_las, summarize_points,
+    write_point_summary, sort_las_points
+)
+from Lidar_Analysis_LAS_Reproject import (
+    fitting_offset, output_scale_offset, reproject_range, reproject_into, transform_records
+)
+
+CRS = "EPSG:32611"
+
+
+def header_bytes_with(las_path, offset):
+    # Header and VLR bytes of a LAS file with a new offset
+    header = read_las_header(las_path)
+    with open(las_path, "rb") as las_file:
+        raw = bytearray(las_file.read(header["offset_to_points"]))
+    raw[155:179] = np.array(offset, dtype="<f8").tobytes()
+    return bytes(raw)
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_reproject_into_writes_the_preallocated_file(tmp_path, workers):
+    las_path = str(tmp_path / "tile.las")
+    x, y, z = make_las(las_path, 5000)
+    header = read_las_header(las_path)
+    out_las = str(tmp_path / "out.las")
+    out_offset = (900.0, 1900.0, 50.0)
+    header_bytes = header_bytes_with(las_path, out_offset)
+    allocate_las(out_las, header_bytes, header["point_count"], header["record_length"])
+    out_header = read_las_header(out_las)
+
+    if workers:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(reproject_into(las_path, out_las, CRS, CRS, header["scale"], out_offset, pool, 700, 2))
+    else:
+        chunks = list(reproject_into(las_path, out_las, CRS, CRS, header["scale"], out_offset, None, 700))
+    assert [len(chunk) for chunk in chunks] == [700] * 7 + [100]
+
+    summary = summarize_points(chunks, out_header)
+    write_point_summary(out_las, header_bytes, out_header, summary)
+    out_header = read_las_header(out_las)
+    points = open_las_points(out_las, out_header)
+    out_x, out_y, out_z = point_coordinates(points, out_header)
+    assert summary[0] == out_header["point_count"] == 5000
+    assert np.allclose(out_x, x) and np.allclose(out_y, y) and np.allclose(out_z, z)
+    # The offset shift is whole steps of the unchanged scale, so the records move by integers
+    source = open_las_points(las_path)
+    assert np.array_equal(points["X"], source["X"] + 10000) and np.array_equal(points["Z"], source["Z"] - 5000)
+    assert np.array_equal(points["intensity"], source["intensity"])
+    assert out_header["bounds"] == pytest.approx((x.min(), y.min(), x.max(), y.max()))
+
+
+def test_reproject_range_returns_only_the_count(tmp_path):
+    las_path = str(tmp_path / "tile.las")
+    make_las(las_path, 1000)
+    header = read_las_header(las_path)
+    out_las = str(tmp_path / "out.las")
+    allocate_las(out_las, header_bytes_with(las_path, header["offset"]), 1000, header["record_length"])
+    assert reproject_range(las_path, out_las, 200, 600, CRS, CRS, header["scale"], header["offset"]) == 400
+    written = open_las_points(out_las)
+    source = open_las_points(las_path)
+    assert np.array_equal(written[200:600]["X"], source[200:600]["X"])
+    assert not written[:200]["X"].any() and not written[600:]["X"].any()
+    expected = transform_records(source[200:600], header, None, header["scale"], header["offset"])
+    assert np.array_equal(written[200:600], expected)
+
+
+def test_fitting_offset():
+    assert fitting_offset(0.0, 1000.0, 2000.0, 0.01) == 0.0
+    # UTM northings at 1 mm from a zero offset overflow; the middle of the range fits
+    assert fitting_offset(0.0, 4000000.0, 4010000.0, 0.001) == 4005000.0
+    with pytest.raises(ValueError, match="coarser output scale"):
+        fitting_offset(0.0, 0.0, 5000000.0, 0.001)
+
+
+def test_output_scale_offset_without_transform():
+    header = {
+        "scale": (0.01, 0.01, 0.01), "offset": (0.0, 0.0, 0.0), "bounds": (2500000.0, 4000000.0, 2501000.0, 4001000.0),
+        "z_range": (100.0, 200.0),
+    }
+    assert output_scale_offset(header, CRS, CRS) == ((0.01, 0.01, 0.01), (0.0, 0.0, 0.0))
+    # At a finer scale the records overflow from a zero offset; heights still fit
+    assert output_scale_offset(header, CRS, CRS, 0.001) == ((0.001, 0.001, 0.01), (2500500.0, 4000500.0, 0.0))
+
+
+def test_sort_las_points_in_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(las_index, "log_message", lambda message: None)
+    las_path = str(tmp_path / "tile.las")
+    make_las(las_path, 20000, sort=False)
+    header = read_las_header(las_path)
+    original = np.array(open_las_points(las_path, header))
+    with open(las_path, "rb") as las_file:
+        original_header = las_file.read(header["offset_to_points"])
+
+    sort_las_points(las_path, grid_dim=8, chunk_size=3000)
+
+    min_x, min_y, max_x, max_y = header["bounds"]
+    cell_size = max(max_x - min_x, max_y - min_y, 1.0) / 8
+    x, y, _ = point_coordinates(original, header)
+    ids = cell_ids(x, y, (min_x, min_y), cell_size, 8, 8)
+    # The chunked counting sort matches one stable sort of the whole file
+    expected = original[np.argsort(ids, kind="stable")]
+    assert np.array_equal(np.array(open_las_points(las_path)), expected)
+    with open(las_path, "rb") as las_file:
+        assert las_file.read(header["offset_to_points"]) == original_header
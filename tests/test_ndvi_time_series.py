@@ -0,0 +1,70 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from Lidar_Analysis_Index_Formulas import calculate_indices_block
+from Lidar_Analysis_NDVI_Time_Series import (
+    parse_dates, create_cubes, open_cubes, cube_window, index_stack, trend_statistics
+)
+
+
+def synthetic_images(dates=3, rows=4, cols=5, seed=0):
+    # 8-bit 4-band images as (band, y, x) blocks
+    rng = np.random.default_rng(seed)
+    return [rng.integers(1, 255, (4, rows, cols)).astype(np.float32) for _ in range(dates)]
+
+
+def test_parse_dates():
+    assert parse_dates("2026-05-01; 2026-05-08;") == [datetime.date(2026, 5, 1), datetime.date(2026, 5, 8)]
+
+
+def test_time_series_slice_matches_step_5():
+    images = synthetic_images()
+    names = ["ndvi", "evi", "gndvi", "vari"]
+    indices = index_stack(images, names)
+    for date, image in enumerate(images):
+        # Step 5 reads band 1 as Red, 2 as Green, 3 as Blue, and 4 as NIR
+        step_5 = calculate_indices_block({"red": image[0], "green": image[1], "blue": image[2], "nir": image[3]}, names)
+        for name in names:
+            np.testing.assert_array_equal(indices[name][date], step_5[name])
+    np.testing.assert_allclose(indices["ndvi"][0], (images[0][3] - images[0][0]) / (images[0][3] + images[0][0]), rtol=1e-5)
+
+
+def test_trend_statistics():
+    days = np.array([0, 10, 20, 30], dtype=np.float32)
+    stack = np.empty((4, 1, 3), dtype=np.float32)
+    stack[:, 0, 0] = 0.1 + 0.01 * days  # rising
+    stack[:, 0, 1] = [0.2, 0.8, np.nan, 0.4]  # peak on day 10, one date missing
+    stack[:, 0, 2] = np.nan  # never observed
+    statistics = trend_statistics(stack, days)
+
+    np.testing.assert_allclose(statistics["Trend"][0, 0], 0.01, rtol=1e-5)
+    np.testing.assert_allclose(statistics["Max"][0, :2], [0.4, 0.8])
+    np.testing.assert_array_equal(statistics["Max_Day_Offset"][0, :2], [30, 10])
+    np.testing.assert_allclose(statistics["Mean"][0, 1], (0.2 + 0.8 + 0.4) / 3, rtol=1e-6)
+    np.testing.assert_allclose(statistics["Latest_Anomaly"][0, 0], 0.4 - 0.25, rtol=1e-5)
+    assert np.isnan(statistics["Max"][0, 2]) and np.isnan(statistics["Max_Day_Offset"][0, 2])
+
+
+def test_cube_round_trip(tmp_path):
+    grid = {"xmin": 0.0, "ymax": 10.0, "cell_size": 1.0, "nrows": 5, "ncols": 7}
+    dates = [datetime.date(2026, 5, 1), datetime.date(2026, 5, 8)]
+    cubes = create_cubes(str(tmp_path), ["ndvi"], dates, grid, block_size=3)
+    expected = np.arange(2 * 5 * 7, dtype=np.float32).reshape(2, 5, 7)
+    for row in range(0, 5, 3):
+        for col in range(0, 7, 3):
+            rows, cols = min(3, 5 - row), min(3, 7 - col)
+            cubes["ndvi"][row // 3, col // 3, :, :rows, :cols] = expected[:, row:row + rows, col:col + cols]
+    cubes["ndvi"].flush()
+    del cubes
+
+    metadata, cubes = open_cubes(str(tmp_path))
+    assert metadata["dates"] == ["2026-05-01", "2026-05-08"]
+    np.testing.assert_array_equal(cube_window(cubes["ndvi"], metadata, 0, 0, 5, 7), expected)
+    np.testing.assert_array_equal(cube_window(cubes["ndvi"], metadata, 2, 2, 3, 4), expected[:, 2:5, 2:6])
+
+
+def test_unknown_index_is_rejected():
+    with pytest.raises(KeyError):
+        index_stack(synthetic_images(1), ["not_an_index"])
@@ -0,0 +1,121 @@
+import os
+import struct
+import sys
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import Lidar_Analysis_Quick_Look as quick_look
+from Lidar_Analysis_Quick_Look import (
+    LAYERFILE_FOLDER, NODATA_INDEX, TILE_SIZE, load_palette, class_indices, apply_palette, render_class_array,
+    render_tile, tile_range, web_mercator_bounds, read_class_raster, list_class_rasters
+)
+
+NDVI_LAYERFILE = os.path.join(LAYERFILE_FOLDER, "NDVI_Reclass.lyrx")
+# 300 x 200 m just north-east of the Web Mercator origin, inside tile 32768/32767 at zoom 16
+MERCATOR_GRID = {"xmin": 100.0, "ymax": 300.0, "cell_size": 5.0, "nrows": 40, "ncols": 60, "crs": "EPSG:3857"}
+
+
+def read_png(path):
+    # RGBA pixels of a PNG written by write_png (one IDAT chunk, no filtering)
+    with open(path, "rb") as png_file:
+        data = png_file.read()
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    width, height = struct.unpack(">II", data[16:24])
+    idat = data.index(b"IDAT")
+    length = struct.unpack(">I", data[idat - 4:idat])[0]
+    scanlines = np.frombuffer(zlib.decompress(data[idat + 4:idat + 4 + length]), dtype=np.uint8)
+    return scanlines.reshape(height, width * 4 + 1)[:, 1:].reshape(height, width, 4)
+
+
+def ndvi_classes(rows=40, cols=60):
+    # Class bands 0-4 with a NoData corner and an out-of-range value
+    values = np.tile(np.arange(cols, dtype=np.float32) // 12, (rows, 1))
+    values[:5, :5] = np.nan
+    values[-1, -1] = 300
+    return values
+
+
+class ShiftTransformer:
+    # Stand-in for a pyproj transformer whose source CRS is Web Mercator shifted by a fixed offset
+    def __init__(self, dx, dy):
+        self.dx, self.dy = dx, dy
+
+    def transform(self, x, y, direction="FORWARD"):
+        sign = -1 if direction == "INVERSE" else 1
+        return x + sign * self.dx, y + sign * self.dy
+
+    def transform_bounds(self, xmin, ymin, xmax, ymax, densify_pts=21):
+        return xmin + self.dx, ymin + self.dy, xmax + self.dx, ymax + self.dy
+
+
+def test_render_synthetic_array_without_arcpy(tmp_path, monkeypatch):
+    # A None entry makes `import arcpy` raise ImportError
+    monkeypatch.setitem(sys.modules, "arcpy", None)
+    lut, _ = load_palette(NDVI_LAYERFILE)
+    values = ndvi_classes()
+    grid = dict(MERCATOR_GRID)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        out_png = render_class_array(values, grid, lut, "NDVI_Reclass", str(tmp_path), pool, tiles=True, max_zoom=16)
+
+    pixels = read_png(out_png)
+    assert pixels.shape == (40, 60, 4)
+    assert np.array_equal(pixels, apply_palette(class_indices(values), lut))
+    assert not pixels[:5, :5, 3].any() and pixels[-1, -1, 3] == 0
+    assert tuple(pixels[10, 0]) == tuple(lut[0]) and tuple(pixels[10, 59]) == tuple(lut[4])
+
+    # One tile per zoom from 16 down four levels
+    tiles = sorted(
+        os.path.relpath(os.path.join(folder, name), tmp_path / "NDVI_Reclass_tiles")
+        for folder, _, names in os.walk(tmp_path / "NDVI_Reclass_tiles") for name in names
+    )
+    assert len(tiles) == 5
+    assert os.path.join("16", "32768", "32767.png") in tiles
+    assert read_png(tmp_path / "NDVI_Reclass_tiles" / "16" / "32768" / "32767.png").shape == (TILE_SIZE, TILE_SIZE, 4)
+
+
+def test_render_tile_reprojects_through_transformer(tmp_path):
+    lut, _ = load_palette(NDVI_LAYERFILE)
+    indices = class_indices(ndvi_classes())
+    padded = np.pad(indices, 1, constant_values=NODATA_INDEX)
+    # The same raster in a CRS offset by (1000, -500) from Web Mercator renders to the same tile
+    shifted = dict(MERCATOR_GRID, xmin=1100.0, ymax=-200.0, crs="EPSG:32611")
+    transformer = ShiftTransformer(-1000.0, 500.0)
+    assert web_mercator_bounds(shifted, transformer) == (100.0, 100.0, 400.0, 300.0)
+
+    expected = render_tile(padded, MERCATOR_GRID, lut, 16, 32768, 32767, str(tmp_path / "mercator"))
+    reprojected = render_tile(padded, shifted, lut, 16, 32768, 32767, str(tmp_path / "shifted"), transformer)
+    assert np.array_equal(read_png(expected), read_png(reprojected))
+    assert read_png(reprojected)[..., 3].any()
+    # Tiles away from the raster are empty and not written
+    assert render_tile(padded, shifted, lut, 16, 0, 0, str(tmp_path / "shifted"), transformer) is None
+
+
+def test_tile_range_clamps_to_the_world():
+    assert tile_range((100.0, 100.0, 400.0, 300.0), 16) == (range(32768, 32769), range(32767, 32768))
+    assert tile_range((-3e7, -3e7, 3e7, 3e7), 1) == (range(0, 2), range(0, 2))
+
+
+def test_read_class_raster_falls_back_to_the_next_reader(monkeypatch):
+    def missing(raster_path):
+        raise ImportError("no library")
+
+    def reader(raster_path):
+        return raster_path, "grid"
+
+    monkeypatch.setattr(quick_look, "RASTER_READERS", (missing, reader))
+    assert read_class_raster("a.tif") == ("a.tif", "grid")
+    monkeypatch.setattr(quick_look, "RASTER_READERS", (missing,))
+    with pytest.raises(ImportError, match="GDAL, rasterio, or tifffile"):
+        read_class_raster("a.tif")
+
+
+def test_list_class_rasters_in_folders(tmp_path):
+    for name in ("NDVI_Reclass.tif", "EVI_Reclass.img", "Other.tif"):
+        (tmp_path / name).write_bytes(b"")
+    single = str(tmp_path / "elsewhere" / "Steepness_For_Equipment.tif")
+    rasters = list_class_rasters(f"{tmp_path};'{single}'")
+    assert sorted(rasters) == sorted([str(tmp_path / "NDVI_Reclass.tif"), str(tmp_path / "EVI_Reclass.img"), single])
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from Lidar_Analysis_Step_8__V2 import (
+    parse_weight_sets, NormalizationStatistics, evaluate_weight_sets, weight_slices
+)
+
+
+def test_weight_step_enumerates_every_set_summing_to_one():
+    weights = parse_weight_sets("0.1")
+    assert weights.shape == (66, 3)
+    np.testing.assert_allclose(weights.sum(axis=1), 1.0, rtol=1e-6)
+    assert len({tuple(np.round(row, 6)) for row in weights}) == 66
+    assert parse_weight_sets("0.5").tolist() == [[0, 0, 1], [0, 0.5, 0.5], [0, 1, 0], [0.5, 0, 0.5], [0.5, 0.5, 0], [1, 0, 0]]
+
+
+def test_explicit_weight_sets():
+    np.testing.assert_allclose(parse_weight_sets("0.4 0.3 0.3; 0.6,0.2,0.2"), [[0.4, 0.3, 0.3], [0.6, 0.2, 0.2]])
+
+
+@pytest.mark.parametrize("text", ["0.3", "0", "1.5"])
+def test_uneven_weight_step_is_rejected(text):
+    with pytest.raises(ValueError, match="divide 1 evenly"):
+        parse_weight_sets(text)
+
+
+def test_weight_sets_need_three_weights():
+    with pytest.raises(ValueError, match="slope, flow accumulation, and curvature"):
+        parse_weight_sets("0.5 0.5;0.2 0.3 0.5")
+
+
+def statistics_of(*blocks):
+    statistics = NormalizationStatistics(1.0, 0)
+    for block in blocks:
+        statistics.update(np.asarray(block, dtype=np.float32))
+    statistics.finish()
+    return statistics
+
+
+def test_streaming_statistics_match_numpy():
+    rng = np.random.default_rng(1)
+    blocks = [rng.normal(5, 2, (20, 30)).astype(np.float32) for _ in range(4)]
+    blocks[1][3, 4] = np.nan
+    statistics = statistics_of(*blocks)
+    values = np.concatenate([block.ravel() for block in blocks]).astype(np.float64)
+    values = values[~np.isnan(values)]
+    np.testing.assert_allclose((statistics.mean, statistics.std), (values.mean(), values.std()), rtol=1e-9)
+    assert (statistics.minimum, statistics.maximum) == (values.min(), values.max())
+
+
+def test_percentile_ranks_and_ties():
+    statistics = statistics_of([[1.0, 2.0, 2.0, 3.0]])
+    ranks = statistics.normalize(np.array([[1.0, 2.0, 3.0, np.nan]], dtype=np.float32), "PERCENTILE")
+    np.testing.assert_allclose(ranks[0, :3], [0.125, 0.5, 0.875])
+    assert np.isnan(ranks[0, 3])
+
+
+@pytest.mark.parametrize("method", ["MINMAX", "ZSCORE", "PERCENTILE"])
+def test_empty_and_constant_samples_normalize_to_zero(method):
+    values = np.array([[4.0, np.nan]], dtype=np.float32)
+    for statistics in (statistics_of([[np.nan, np.nan]]), statistics_of([[4.0, 4.0, 4.0]])):
+        normalized = statistics.normalize(values, method)
+        assert normalized[0, 0] == 0 and np.isnan(normalized[0, 1])
+
+
+def test_sliced_scores_match_full_product():
+    rng = np.random.default_rng(2)
+    normalized = [rng.random((8, 9)).astype(np.float32) for _ in range(3)]
+    weights = parse_weight_sets("0.1")
+    full = evaluate_weight_sets(normalized, weights)
+    slices = weight_slices(len(weights), 8 * 9, budget=8 * 9 * 4 * 10)
+    assert [(part.start, part.stop) for part in slices] == [(start, min(start + 10, 66)) for start in range(0, 66, 10)]
+    sliced = np.concatenate([evaluate_weight_sets(normalized, weights[part]) for part in slices])
+    np.testing.assert_array_equal(sliced, full)
+    np.testing.assert_allclose(full[5], sum(w * values for w, values in zip(weights[5], normalized)), rtol=1e-6)
+
+
+def test_default_budget_bounds_a_full_block():
+    slices = weight_slices(66, 1024 * 1024)
+    assert max(part.stop - part.start for part in slices) * 1024 * 1024 * 4 <= 64 * 1024 * 1024
+    assert weight_slices(3, 4096 * 4096) == [slice(0, 1), slice(1, 2), slice(2, 3)]
@@ -0,0 +1,82 @@
+import numpy as np
+from scipy import ndimage
+from Lidar_Analysis_Block_IO import block_windows
+import Lidar_Analysis_Tree_Detection as tree_detection
+
+SIZE = 200
+MIN_HEIGHT = 3.0
+SIGMA = 1.0
+MAX_CROWN_DIAMETER = 15.0
+TREES = [(30, 30, 15.0), (40, 150, 12.0), (100, 100, 10.0), (160, 40, 14.0), (165, 160, 8.0)]
+
+
+def separated_trees():
+    # Canopy height of five Gaussian crowns separated by bare ground
+    rows, cols = np.mgrid[0:SIZE, 0:SIZE]
+    canopy = np.zeros((SIZE, SIZE))
+    for row, col, height in TREES:
+        canopy = np.maximum(canopy, height * np.exp(-((rows - row) ** 2 + (cols - col) ** 2) / (2 * 6.0 ** 2)))
+    return canopy
+
+
+def run_tiles(canopy, block_size):
+    # Trees as sorted (X, Y, crown area) from a tiled run over the canopy array
+    grid = {"xmin": 0.0, "ymax": float(SIZE), "cell_size": 1.0, "nrows": SIZE, "ncols": SIZE}
+    halo = int(np.ceil(MAX_CROWN_DIAMETER)) + int(np.ceil(3 * SIGMA))
+    padded = np.pad(canopy, halo)
+    trees = []
+    for window in block_windows(SIZE, SIZE, block_size, halo):
+        row, col, rows, cols, _ = window
+        values = padded[row:row + rows + 2 * halo, col:col + cols + 2 * halo]
+        columns = tree_detection.detect_tile_trees(values, window, grid, MIN_HEIGHT, SIGMA, MAX_CROWN_DIAMETER)
+        if columns is not None:
+            trees += zip(columns["X"], columns["Y"], columns["CROWN_AREA"])
+    return sorted(trees)
+
+
+def test_separated_crowns_cover_their_canopy_patch():
+    canopy = separated_trees()
+    patches, count = ndimage.label(ndimage.gaussian_filter(canopy, SIGMA) >= MIN_HEIGHT, structure=np.ones((3, 3)))
+    trees = run_tiles(canopy, SIZE)
+    assert len(trees) == count == len(TREES)
+    patch_areas = sorted(np.bincount(patches.ravel())[1:])
+    assert sorted(area for _, _, area in trees) == patch_areas
+
+
+def test_crowns_do_not_depend_on_tiling():
+    canopy = separated_trees()
+    assert run_tiles(canopy, 64) == run_tiles(canopy, SIZE)
+
+
+def touching_trees():
+    # Two crowns of different heights whose canopies merge into one patch
+    rows, cols = np.mgrid[0:60, 0:80]
+    return np.maximum(
+        14.0 * np.exp(-((rows - 30) ** 2 + (cols - 25) ** 2) / (2 * 6.0 ** 2)),
+        10.0 * np.exp(-((rows - 30) ** 2 + (cols - 47) ** 2) / (2 * 6.0 ** 2)),
+    )
+
+
+def test_watershed_splits_touching_crowns():
+    canopy = touching_trees()
+    smoothed = ndimage.gaussian_filter(canopy, SIGMA)
+    markers, count = tree_detection.find_tree_tops(smoothed, 1.0, MIN_HEIGHT, MAX_CROWN_DIAMETER)
+    assert count == 2
+    crowns = tree_detection.grow_crowns(smoothed, markers, MIN_HEIGHT)
+    # The crowns fill the merged patch, meet near the saddle, and the taller tree gets the larger crown
+    np.testing.assert_array_equal(crowns > 0, smoothed >= MIN_HEIGHT)
+    saddle = 25 + np.argmin(smoothed[30, 25:47])
+    assert set(crowns[30, 25:saddle - 1]) == {crowns[30, 25]} and set(crowns[30, saddle + 2:48]) == {crowns[30, 47]}
+    assert crowns[30, 25] != crowns[30, 47]
+    areas = np.bincount(crowns.ravel())
+    assert areas[crowns[30, 25]] > areas[crowns[30, 47]]
+
+
+def test_tile_trees_report_map_coordinates_and_heights():
+    grid = {"xmin": 500.0, "ymax": 900.0, "cell_size": 0.5, "nrows": 60, "ncols": 80}
+    trees = tree_detection.detect_tile_trees(touching_trees(), (0, 0, 60, 80, 0), grid, MIN_HEIGHT, SIGMA, 15.0)
+    order = np.argsort(trees["X"])
+    np.testing.assert_allclose(trees["X"][order], [500.0 + 25.5 * 0.5, 500.0 + 47.5 * 0.5])
+    np.testing.assert_allclose(trees["Y"][order], [900.0 - 30.5 * 0.5] * 2)
+    np.testing.assert_allclose(trees["HEIGHT"][order], [14.0, 10.0], atol=0.05)
+    np.testing.assert_allclose(trees["CROWN_DIAMETER"], 2 * np.sqrt(trees["CROWN_AREA"] / np.pi))
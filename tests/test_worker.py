@@ -0,0 +1,68 @@
+import io
+import json
+import sys
+import types
+
+import pytest
+
+import Lidar_Analysis_Worker as worker_module
+from Lidar_Analysis_Worker import Worker
+
+
+def fake_arcpy():
+    # Just the ArcPy calls the worker swaps for each job
+    return types.SimpleNamespace(
+        ResetEnvironments=lambda: None, GetParameterAsText=None, AddMessage=None, AddWarning=None,
+        AddError=None, CheckInExtension=lambda extension: "CheckedIn"
+    )
+
+
+def noisy_step():
+    # A step that prints to stdout, reports messages, and fails on a "fail" parameter
+    def main():
+        arcpy = sys.modules["arcpy"]
+        print("progress printed by the step")
+        arcpy.AddMessage(f"processing {arcpy.GetParameterAsText(0)}")
+        if arcpy.GetParameterAsText(0) == "fail":
+            arcpy.AddWarning("about to fail")
+            raise RuntimeError("step failed")
+    return types.SimpleNamespace(main=main)
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    arcpy = fake_arcpy()
+    monkeypatch.setitem(sys.modules, "arcpy", arcpy)
+    monkeypatch.setitem(sys.modules, "noisy_step", noisy_step())
+    monkeypatch.setitem(worker_module.STEP_MODULES, "noisy", "noisy_step")
+    worker = Worker.__new__(Worker)
+    worker.arcpy, worker.startup_seconds = arcpy, 0.0
+    worker.close = lambda: None
+    return worker
+
+
+def run_stdio(worker, monkeypatch, capfd, requests):
+    monkeypatch.setattr(sys, "stdin", io.StringIO("".join(json.dumps(r) + "\n" for r in requests)))
+    worker.serve_stdio()
+    out, err = capfd.readouterr()
+    return [json.loads(line) for line in out.splitlines()], err
+
+
+def test_stdio_prints_do_not_corrupt_responses(worker, monkeypatch, capfd):
+    responses, err = run_stdio(worker, monkeypatch, capfd, [
+        {"id": 1, "method": "run_step", "params": {"step": "noisy", "parameters": ["farm"]}},
+        {"id": 2, "method": "ping"},
+        {"id": 3, "method": "shutdown"},
+    ])
+    assert [response["id"] for response in responses] == [1, 2]
+    assert responses[0]["result"]["messages"] == [["message", "processing farm"]]
+    assert "progress printed by the step" in err
+
+
+def test_error_response_includes_messages(worker, monkeypatch, capfd):
+    responses, _ = run_stdio(worker, monkeypatch, capfd, [
+        {"id": 1, "method": "run_step", "params": {"step": "noisy", "parameters": ["fail"]}},
+    ])
+    assert responses[0]["error"] == "step failed"
+    assert responses[0]["messages"] == [["message", "processing fail"], ["warning", "about to fail"]]
+    assert worker_module.print_response(responses[0]) == 1